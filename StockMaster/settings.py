@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -88,6 +89,38 @@ DATABASES = {
     }
 }
 
+# Set POSTGRES_DB to run against PostgreSQL instead (requires psycopg)
+if os.getenv('POSTGRES_DB'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB'),
+        'USER': os.getenv('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+    }
+
+
+# Cache
+# Local memory by default; set REDIS_URL to share the cache between workers in production.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'stockmaster',
+        }
+    }
+
+# Dashboard payloads are invalidated on every stock/status change; this is the fallback expiry
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '30'))  # seconds
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,6 +159,17 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # Rendered PDFs of validated operations; swap in an object-store backend
+    # (e.g. django-storages' S3Storage) to share them between servers
+    'operation_pdfs': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': os.getenv('OPERATION_PDF_ROOT', str(BASE_DIR / 'media' / 'operation_pdfs'))},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -134,7 +178,6 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.User'
 
 # Email Configuration
-import os
 
 # Toggle between console (development) and SMTP (production)
 # Set USE_SMTP_EMAIL=True in your environment to send real emails
@@ -155,3 +198,51 @@ else:
     DEFAULT_FROM_EMAIL = 'noreply@stockmaster.com'
 
 MANAGER_EMAIL = os.getenv('MANAGER_EMAIL', 'manager@stockmaster.com')  # Email to receive low stock alerts
+
+# Stock locking: retries for deadlocks / serialization failures during validation
+STOCK_LOCK_MAX_ATTEMPTS = int(os.getenv('STOCK_LOCK_MAX_ATTEMPTS', '5'))
+STOCK_LOCK_BACKOFF_BASE = 0.05  # seconds, doubled on every attempt
+STOCK_LOCK_BACKOFF_MAX = 1.0  # seconds
+
+# Notification outbox: emails are queued inside stock transactions and sent after commit
+NOTIFICATION_OUTBOX_AUTO_DISPATCH = os.getenv('NOTIFICATION_OUTBOX_AUTO_DISPATCH', 'True').lower() == 'true'
+NOTIFICATION_OUTBOX_BATCH_SIZE = 100
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = 5
+NOTIFICATION_OUTBOX_BACKOFF_BASE = 30  # seconds, doubled on every failed attempt
+NOTIFICATION_OUTBOX_BACKOFF_MAX = 3600  # seconds
+
+# Operation PDFs are rendered once per validation by a background pool and served from storage
+OPERATION_PDF_PRERENDER = os.getenv('OPERATION_PDF_PRERENDER', 'True').lower() == 'true'
+OPERATION_PDF_WORKERS = int(os.getenv('OPERATION_PDF_WORKERS', '2'))
+# Product typeahead: the in-process SKU prefix index is rebuilt after product changes, and at
+# least this often to pick up writes that bypass the ORM
+PRODUCT_SKU_INDEX_TTL = 300  # seconds
+
+# Bulk export: the API renders in the request's process, so it takes moderate batches; the
+# export_operation_pdfs command renders ZIPs in a pool of OPERATION_PDF_EXPORT_WORKERS processes
+OPERATION_PDF_EXPORT_WORKERS = int(os.getenv('OPERATION_PDF_EXPORT_WORKERS', str(min(4, os.cpu_count() or 1))))
+OPERATION_PDF_EXPORT_MAX_DOCUMENTS = 500
+OPERATION_PDF_MERGE_MAX_DOCUMENTS = 500
+
+# Idempotency-Key on operation create/validate/bulk: responses are kept this long for replay
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', str(24 * 3600)))  # seconds
+# A duplicate of a request still running waits up to this long for its response, then gets 409
+IDEMPOTENCY_WAIT = 30  # seconds
+# An attempt still unfinished after this long is assumed dead and a retry may run again
+IDEMPOTENCY_LOCK_TIMEOUT = 300  # seconds
+
+# Demand forecasting (forecast_reorder_points): defaults for the suggested reorder points
+FORECAST_HISTORY_DAYS = 90  # days of DELIVERY history per run
+FORECAST_LEAD_TIME_DAYS = 7  # supplier lead time
+FORECAST_REVIEW_DAYS = 7  # days of demand an order covers beyond the lead time
+FORECAST_SERVICE_LEVEL = 0.95  # chance of not running out during the lead time
+FORECAST_SMOOTHING = 0.3  # alpha for exponential smoothing
+FORECAST_COUNT_UOMS = ['pcs', 'box']  # suggested in whole units; other units to 2 decimals
+
+# Alert stream (SSE, served under ASGI): each process polls the AlertEvent feed once per
+# interval while clients are connected; streams are closed after a while so clients reconnect
+ALERT_FEED_POLL_INTERVAL = 2.0  # seconds
+ALERT_FEED_HEARTBEAT = 15  # seconds between keep-alive comments
+ALERT_FEED_MAX_SECONDS = 300  # stream lifetime before the client reconnects with Last-Event-ID
+ALERT_FEED_RETRY_MS = 5000  # reconnect delay suggested to EventSource
+ALERT_FEED_QUEUE_SIZE = 1000  # events buffered per client before it is told to resync
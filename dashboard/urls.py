@@ -1,8 +1,15 @@
 from django.urls import path
-from .views import DashboardKPIView, dashboard_view, DashboardChartsView
+from .views import (
+    DashboardKPIView, dashboard_view, DashboardChartsView, DashboardCacheStatsView, MovementTrendView,
+    dashboard_kpi_async_view, dashboard_charts_async_view,
+)
 
 urlpatterns = [
     path('kpi/', DashboardKPIView.as_view(), name='dashboard-kpi'),
     path('charts/', DashboardChartsView.as_view(), name='dashboard-charts'),
+    path('async/kpi/', dashboard_kpi_async_view, name='dashboard-kpi-async'),
+    path('async/charts/', dashboard_charts_async_view, name='dashboard-charts-async'),
+    path('movement-trend/', MovementTrendView.as_view(), name='dashboard-movement-trend'),
+    path('cache-stats/', DashboardCacheStatsView.as_view(), name='dashboard-cache-stats'),
     path('', dashboard_view, name='dashboard-ui'),
 ]
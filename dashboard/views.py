@@ -1,10 +1,16 @@
+import asyncio
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Q, F
-from inventory.models import Product, Operation, DocumentStatus, ProductStock, StockMovement
+from rest_framework.utils.encoders import JSONEncoder
+from django.db.models import Sum
+from inventory.models import Product, Operation, MovementRollup
+from services.dashboard_service import DashboardService
+from services.movement_rollup_service import MovementRollupService
 from django.utils import timezone
 from datetime import timedelta
+from django.http import JsonResponse
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 
@@ -12,134 +18,113 @@ class DashboardKPIView(APIView):
     # permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # 1. Total Products
-        total_products = Product.objects.count()
-
-        # 2. Low Stock Items (Global check - if total stock across all warehouses < min_stock)
-        # This is a bit complex if min_stock is per product globally. 
-        # Let's assume min_stock_level is global for the product.
-        # We need to annotate total quantity first.
-        low_stock_count = 0
-        out_of_stock_count = 0
-        
-        products = Product.objects.annotate(total_qty=Sum('stocks__quantity'))
-        for p in products:
-            qty = p.total_qty or 0
-            if qty == 0:
-                out_of_stock_count += 1
-            elif qty < p.min_stock_level:
-                low_stock_count += 1
-
-        # 3. Pending Operations
-        pending_receipts = Operation.objects.filter(
-            operation_type=Operation.Type.RECEIPT, 
-            status__in=[DocumentStatus.DRAFT, DocumentStatus.WAITING, DocumentStatus.READY]
-        ).count()
-
-        pending_deliveries = Operation.objects.filter(
-            operation_type=Operation.Type.DELIVERY, 
-            status__in=[DocumentStatus.DRAFT, DocumentStatus.WAITING, DocumentStatus.READY]
-        ).count()
-
-        pending_transfers = Operation.objects.filter(
-            operation_type=Operation.Type.TRANSFER, 
-            status__in=[DocumentStatus.DRAFT, DocumentStatus.WAITING, DocumentStatus.READY]
-        ).count()
-
-        data = {
-            'total_products': total_products,
-            'low_stock_items': low_stock_count,
-            'out_of_stock_items': out_of_stock_count,
-            'pending_receipts': pending_receipts,
-            'pending_deliveries': pending_deliveries,
-            'pending_transfers': pending_transfers,
-        }
-        return Response(data)
+        return Response(DashboardService.cached('kpi', DashboardService.get_kpis))
 
 class DashboardChartsView(APIView):
     def get(self, request):
+        return Response(DashboardService.cached('charts', self.build_charts))
+
+    @staticmethod
+    def build_charts():
+        return {
+            'stock_by_category': list(DashboardChartsView.stock_by_category()),
+            'top_movers': DashboardChartsView.top_movers()
+        }
+
+    @staticmethod
+    async def abuild_charts():
+        async def fetch(queryset):
+            return [row async for row in queryset]
+
+        stock_by_category, top_movers = await asyncio.gather(
+            fetch(DashboardChartsView.stock_by_category()),
+            sync_to_async(DashboardChartsView.top_movers)(),
+        )
+        return {
+            'stock_by_category': stock_by_category,
+            'top_movers': top_movers
+        }
+
+    @staticmethod
+    def stock_by_category():
         # 1. Stock Quantity by Category
-        stock_by_category = Product.objects.values('category__name').annotate(
-            total_qty=Sum('stocks__quantity')
+        return Product.objects.values('category__name').annotate(
+            total_qty=Sum('stock_total__quantity')
         ).order_by('-total_qty')
-        
-        # 2. Top Movers (Most moved products in last 30 days)
+
+    @staticmethod
+    def top_movers():
+        # 2. Top Movers (Most moved products in last 30 days), from the movement rollups
         last_30_days = timezone.now() - timedelta(days=30)
-        
-        top_movers = StockMovement.objects.filter(
-            timestamp__gte=last_30_days
-        ).values('product__name').annotate(
-            moves=Count('id'),
-            total_qty=Sum('quantity')
-        ).order_by('-total_qty')[:5]
-        
-        return Response({
-            'stock_by_category': stock_by_category,
-            'top_movers': top_movers
-        })
+        return [
+            {'product__name': row['product__name'], 'moves': row['moves'], 'total_qty': row['total_qty']}
+            for row in MovementRollupService.top_products(last_30_days, limit=5)
+        ]
+
+class MovementTrendView(APIView):
+    """
+    Moved quantities per day (or hour) and transaction type, read from the movement rollups.
+    URL: /api/dashboard/movement-trend/?days=30&interval=day&product=&location=&warehouse=&transaction_type=
+    """
+    MAX_DAYS = {MovementRollup.Period.DAY: 366, MovementRollup.Period.HOUR: 31}
+
+    def get(self, request):
+        params = request.query_params
+        interval = params.get('interval', 'day').upper()
+        if interval not in self.MAX_DAYS:
+            return Response({'error': 'interval must be day or hour'}, status=400)
+        filters = {}
+        try:
+            days = int(params.get('days', 30))
+            for name in ('product', 'location', 'warehouse'):
+                if params.get(name):
+                    filters[f'{name}_id'] = int(params[name])
+        except ValueError:
+            return Response({'error': 'days, product, location and warehouse must be integers'}, status=400)
+        if not 1 <= days <= self.MAX_DAYS[interval]:
+            return Response({'error': f'days must be between 1 and {self.MAX_DAYS[interval]} for this interval'}, status=400)
+        transaction_type = params.get('transaction_type')
+        if transaction_type:
+            if transaction_type not in Operation.Type.values:
+                return Response({'error': f'Unknown transaction_type "{transaction_type}"'}, status=400)
+            filters['transaction_type'] = transaction_type
+
+        since = timezone.now() - timedelta(days=days)
+        name = ':'.join(['trend', interval, str(days)] + [f'{k}={v}' for k, v in sorted(filters.items())])
+        results = DashboardService.cached(name, lambda: MovementRollupService.trend(since, interval=interval, **filters))
+        return Response({'interval': interval.lower(), 'days': days, 'results': results})
+
+async def dashboard_kpi_async_view(request):
+    """
+    Async variant of DashboardKPIView for ASGI deployments; same payload and cache entries.
+    URL: /api/dashboard/async/kpi/
+    """
+    return JsonResponse(await DashboardService.acached('kpi', DashboardService.aget_kpis), encoder=JSONEncoder)
+
+async def dashboard_charts_async_view(request):
+    """
+    Async variant of DashboardChartsView; both chart queries are awaited together.
+    URL: /api/dashboard/async/charts/
+    """
+    return JsonResponse(await DashboardService.acached('charts', DashboardChartsView.abuild_charts), encoder=JSONEncoder)
+
+class DashboardCacheStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(DashboardService.cache_stats())
 
 @login_required
 def dashboard_view(request):
-    # 1. Total Products
-    total_products = Product.objects.count()
-
-    # 2. Low Stock Items
-    low_stock_count = 0
-    out_of_stock_count = 0
-    low_stock_items = []
-    
-    # Annotate total quantity
-    products = Product.objects.annotate(total_qty=Sum('stocks__quantity'))
-    for p in products:
-        qty = p.total_qty or 0
-        if qty == 0:
-            out_of_stock_count += 1
-        elif qty <= p.min_stock_level:
-            low_stock_count += 1
-            # Add to list for table
-            # We need to find the location for the alert, or just list the product
-            # For simplicity, we'll just list the product and its total qty
-            # But the template expects 'alert' objects with 'current_quantity' and 'threshold'
-            # Or we can fetch actual LowStockAlert objects if they exist
-            pass
-
-    # Fetch actual LowStockAlerts for the table
-    # Assuming LowStockAlerts are generated by a background task or signal
-    # If not, we might need to generate them on the fly or just pass products
-    # The template uses: {% for alert in low_stock_items %} ... alert.product.name ... alert.current_quantity
-    from inventory.models import LowStockAlert
-    low_stock_items = LowStockAlert.objects.filter(is_resolved=False).select_related('product', 'location')[:5]
-
-    # 3. Pending Operations
-    pending_receipts = Operation.objects.filter(
-        operation_type=Operation.Type.RECEIPT, 
-        status__in=[DocumentStatus.DRAFT, DocumentStatus.WAITING, DocumentStatus.READY]
-    ).count()
-
-    pending_deliveries = Operation.objects.filter(
-        operation_type=Operation.Type.DELIVERY, 
-        status__in=[DocumentStatus.DRAFT, DocumentStatus.WAITING, DocumentStatus.READY]
-    ).count()
-
-    # 4. Recent Activity
-    recent_activity = []
-    # Combine recent operations and stock movements?
-    # Let's just use recent StockMovements
-    recent_moves = StockMovement.objects.all().order_by('-timestamp')[:10]
-    for move in recent_moves:
-        recent_activity.append({
-            'type': move.transaction_type.lower(), # 'receipt', 'delivery'
-            'description': f"{move.product.sku} - {move.quantity} ({move.transaction_type})",
-            'timestamp': move.timestamp
-        })
+    kpis = DashboardService.cached('kpi', DashboardService.get_kpis)
 
     context = {
-        'total_products': total_products,
-        'low_stock_count': low_stock_count,
-        'out_of_stock_count': out_of_stock_count,
-        'pending_receipts': pending_receipts,
-        'pending_deliveries': pending_deliveries,
-        'low_stock_items': low_stock_items,
-        'recent_activity': recent_activity,
+        'total_products': kpis['total_products'],
+        'low_stock_count': kpis['low_stock_items'],
+        'out_of_stock_count': kpis['out_of_stock_items'],
+        'pending_receipts': kpis['pending_receipts'],
+        'pending_deliveries': kpis['pending_deliveries'],
+        'low_stock_items': DashboardService.get_low_stock_alerts(),
+        'recent_activity': DashboardService.get_recent_activity(),
     }
     return render(request, 'dashboard/index.html', context)
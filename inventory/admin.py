@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Warehouse, Location, Category, Product, ProductStock, Operation, OperationLine, StockMovement
+from .models import Warehouse, Location, Category, Product, ProductStock, Operation, OperationLine, StockMovement, NotificationOutbox, ReorderSuggestion
+from services.forecast_service import ForecastService
 
 @admin.register(Warehouse)
 class WarehouseAdmin(admin.ModelAdmin):
@@ -46,3 +47,24 @@ class StockMovementAdmin(admin.ModelAdmin):
     list_filter = ('transaction_type', 'timestamp')
     search_fields = ('product__name', 'product__sku', 'reference_doc__reference_number')
     readonly_fields = ('timestamp', 'user', 'product', 'from_location', 'to_location', 'quantity', 'transaction_type', 'reference_doc')
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'kind', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('subject', 'dedupe_key')
+
+@admin.register(ReorderSuggestion)
+class ReorderSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('product', 'daily_demand', 'safety_stock', 'reorder_point', 'suggested_quantity',
+                    'method', 'computed_at', 'applied_at')
+    list_filter = ('method', 'applied_at')
+    search_fields = ('product__name', 'product__sku')
+    list_select_related = ('product',)
+    readonly_fields = [field.name for field in ReorderSuggestion._meta.fields]
+    actions = ['apply_reorder_point']
+
+    @admin.action(description='Use the reorder point as minimum stock level')
+    def apply_reorder_point(self, request, queryset):
+        changed = ForecastService.apply(queryset)
+        self.message_user(request, f'Minimum stock level updated for {changed} product(s).')
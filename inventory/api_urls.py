@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     WarehouseViewSet, LocationViewSet, CategoryViewSet, 
     ProductViewSet, OperationViewSet, StockMovementViewSet, PartnerViewSet, LowStockAlertViewSet,
-    ReorderReportView
+    ReorderReportView, StockImportView, StockExportView, StockAsOfView, StockAvailabilityView, alert_stream_view,
+    product_list_async_view, product_detail_async_view, reorder_report_async_view,
 )
 
 router = DefaultRouter()
@@ -17,6 +18,15 @@ router.register(r'partners', PartnerViewSet, basename='api-partner')
 router.register(r'alerts', LowStockAlertViewSet, basename='api-alert')
 
 urlpatterns = [
+    # Ahead of the router so 'stream' is not taken for an alert id
+    path('alerts/stream/', alert_stream_view, name='api-alert-stream'),
+    path('async/products/', product_list_async_view, name='api-product-list-async'),
+    path('async/products/<int:pk>/', product_detail_async_view, name='api-product-detail-async'),
+    path('async/reorder-report/', reorder_report_async_view, name='api-reorder-report-async'),
     path('', include(router.urls)),
     path('reorder-report/', ReorderReportView.as_view(), name='api-reorder-report'),
+    path('stock/import/', StockImportView.as_view(), name='api-stock-import'),
+    path('stock/export/', StockExportView.as_view(), name='api-stock-export'),
+    path('stock/as-of/', StockAsOfView.as_view(), name='api-stock-as-of'),
+    path('stock/atp/', StockAvailabilityView.as_view(), name='api-stock-atp'),
 ]
@@ -1,5 +1,10 @@
+import datetime
 import django_filters
-from .models import Operation
+from rest_framework.filters import SearchFilter
+from django.db.models import Q
+from django.utils import timezone
+from services.product_search_service import ProductSearchService
+from .models import Operation, StockMovement
 
 class OperationFilter(django_filters.FilterSet):
     start_date = django_filters.DateFilter(field_name='created_at', lookup_expr='gte')
@@ -11,3 +16,39 @@ class OperationFilter(django_filters.FilterSet):
     class Meta:
         model = Operation
         fields = ['operation_type', 'status', 'source_location', 'destination_location']
+
+class MovementFilter(django_filters.FilterSet):
+    """
+    Ledger filters shared by the stock ledger page and the ledger export.
+    Date bounds are inclusive days, applied as plain timestamp ranges so the indexes apply.
+    """
+    product = django_filters.NumberFilter(field_name='product_id')
+    warehouse = django_filters.NumberFilter(method='filter_warehouse')
+    start_date = django_filters.DateFilter(method='filter_start_date')
+    end_date = django_filters.DateFilter(method='filter_end_date')
+
+    class Meta:
+        model = StockMovement
+        fields = ['transaction_type']
+
+    def filter_warehouse(self, queryset, name, value):
+        # Either side of the move can belong to the warehouse
+        return queryset.filter(Q(to_location__warehouse_id=value) | Q(from_location__warehouse_id=value))
+
+    def filter_start_date(self, queryset, name, value):
+        return queryset.filter(timestamp__gte=_start_of_day(value))
+
+    def filter_end_date(self, queryset, name, value):
+        return queryset.filter(timestamp__lt=_start_of_day(value + datetime.timedelta(days=1)))
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    ?search= for products through ProductSearchService, so it uses the search index
+    instead of LIKE '%term%' scans over name and SKU.
+    """
+    def filter_queryset(self, request, queryset, view):
+        return ProductSearchService.filter(queryset, request.query_params.get(self.search_param, ''))
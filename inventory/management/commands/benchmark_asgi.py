@@ -0,0 +1,256 @@
+import asyncio
+import io
+import json
+import math
+import platform
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from inventory.models import Product
+
+User = get_user_model()
+
+# (name, weight, WSGI path, ASGI path). Each pair returns the same payload.
+REQUEST_MIX = [
+    ('dashboard_kpis', 3, '/api/dashboard/kpi/', '/api/dashboard/async/kpi/'),
+    ('dashboard_charts', 1, '/api/dashboard/charts/', '/api/dashboard/async/charts/'),
+    ('reorder_report', 1, '/api/inventory/reorder-report/', '/api/inventory/async/reorder-report/'),
+    ('product_list', 3, '/api/inventory/products/?search={term}', '/api/inventory/async/products/?q={term}'),
+    ('product_detail', 2, '/api/inventory/products/{pk}/', '/api/inventory/async/products/{pk}/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the read-heavy endpoints: the sync views through the WSGI handler against their '
+        'async variants through the ASGI handler, with the same request mix and concurrency. '
+        'Reports throughput and latency percentiles as JSON. Runs both handlers in-process unless '
+        '--wsgi-url/--asgi-url point at running servers (e.g. gunicorn and uvicorn).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per handler')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at once')
+        parser.add_argument('--only', nargs='+', help='Restrict the mix to these request names')
+        parser.add_argument('--wsgi-url', help='Base URL of a running WSGI server to load instead of the in-process handler')
+        parser.add_argument('--asgi-url', help='Base URL of a running ASGI server to load instead of the in-process handler')
+        parser.add_argument('--label', default='', help='Free-form label stored with the results')
+        parser.add_argument('--output', help='Write the JSON report to this file ("-" for stdout)')
+
+    def handle(self, *args, **options):
+        product = Product.objects.order_by('id')[Product.objects.count() // 2:].first()
+        if product is None:
+            raise CommandError('No products found. Load data with "manage.py generate_data" first.')
+
+        mix = [entry for entry in REQUEST_MIX if not options['only'] or entry[0] in options['only']]
+        if not mix:
+            raise CommandError(f"--only matched nothing; choose from {', '.join(e[0] for e in REQUEST_MIX)}")
+        params = {'term': product.sku, 'pk': product.pk}
+        schedule = list(islice(cycle([
+            (name, wsgi_path.format(**params), asgi_path.format(**params))
+            for name, weight, wsgi_path, asgi_path in mix for _ in range(weight)
+        ]), max(1, options['requests'])))
+        concurrency = max(1, options['concurrency'])
+
+        report = {
+            'label': options['label'],
+            'started_at': timezone.now().isoformat(),
+            'environment': {
+                'vendor': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'wsgi': options['wsgi_url'] or 'in-process',
+                'asgi': options['asgi_url'] or 'in-process',
+            },
+            'requests': len(schedule),
+            'concurrency': concurrency,
+            'mix': {name: weight for name, weight, _, _ in mix},
+            'results': {},
+        }
+
+        # Requests run on other threads and connections, so the session has to be committed
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}', password='benchmark',
+                                        role=User.Role.MANAGER)
+        client = Client()
+        client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        try:
+            with override_settings(ALLOWED_HOSTS=['*']):
+                for handler in ('wsgi', 'asgi'):
+                    requests = [(name, wsgi_path if handler == 'wsgi' else asgi_path)
+                                for name, wsgi_path, asgi_path in schedule]
+                    base_url = options[f'{handler}_url']
+                    if base_url:
+                        samples, elapsed = self._run_http(base_url, requests, concurrency, cookie)
+                    elif handler == 'wsgi':
+                        samples, elapsed = self._run_wsgi(requests, concurrency, cookie)
+                    else:
+                        samples, elapsed = asyncio.run(self._run_asgi(requests, concurrency, cookie))
+                    report['results'][handler] = self._summarize(samples, elapsed)
+                    self._print_row(handler, report['results'][handler])
+        finally:
+            client.logout()
+            user.delete()
+
+        wsgi, asgi = report['results']['wsgi'], report['results']['asgi']
+        if wsgi['throughput_rps']:
+            report['asgi_vs_wsgi'] = {
+                'throughput_ratio': round(asgi['throughput_rps'] / wsgi['throughput_rps'], 3),
+                'p99_ratio': round(asgi['p99_ms'] / wsgi['p99_ms'], 3) if wsgi['p99_ms'] else None,
+            }
+
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    # Drivers. Each returns ([(name, status, seconds)], wall-clock seconds); one warm-up
+    # request per distinct path runs first so cold caches do not count against either side.
+
+    def _run_wsgi(self, requests, concurrency, cookie):
+        from StockMaster.wsgi import application
+
+        def call(request):
+            name, path = request
+            path, _, query = path.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': query,
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie, 'REMOTE_ADDR': '127.0.0.1',
+                'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+                'wsgi.errors': io.StringIO(), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            status = []
+            start = time.perf_counter()
+            body = application(environ, lambda s, headers, exc_info=None: status.append(int(s.split()[0])))
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+            return name, status[0], time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(call, dict(requests).items()))
+            start = time.perf_counter()
+            samples = list(pool.map(call, requests))
+            return samples, time.perf_counter() - start
+
+    async def _run_asgi(self, requests, concurrency, cookie):
+        from StockMaster.asgi import application
+
+        async def call(request):
+            name, path = request
+            path, _, query = path.partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+                'query_string': query.encode(), 'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            status = []
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # The client never disconnects; Django cancels this wait once the response is sent
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            start = time.perf_counter()
+            await application(scope, receive, send)
+            return name, status[0], time.perf_counter() - start
+
+        async def run(batch):
+            pending = iter(batch)
+            samples = []
+
+            async def worker():
+                for request in pending:
+                    samples.append(await call(request))
+
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, len(batch)))))
+            return samples
+
+        await run(list(dict(requests).items()))
+        start = time.perf_counter()
+        samples = await run(requests)
+        return samples, time.perf_counter() - start
+
+    def _run_http(self, base_url, requests, concurrency, cookie):
+        base_url = base_url.rstrip('/')
+        if urlsplit(base_url).scheme not in ('http', 'https'):
+            raise CommandError(f'{base_url} is not an http(s) URL')
+
+        def call(request):
+            name, path = request
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(base_url + path, headers={'Cookie': cookie})) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as exc:
+                status = exc.code
+            except urllib.error.URLError as exc:
+                raise CommandError(f'{base_url}: {exc.reason}')
+            return name, status, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(call, dict(requests).items()))
+            start = time.perf_counter()
+            samples = list(pool.map(call, requests))
+            return samples, time.perf_counter() - start
+
+    def _summarize(self, samples, elapsed):
+        def percentiles(timings):
+            timings = sorted(t * 1000 for t in timings)
+            rank = lambda p: timings[max(0, math.ceil(len(timings) * p) - 1)]
+            return {
+                'median_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(rank(0.95), 3),
+                'p99_ms': round(rank(0.99), 3),
+                'max_ms': round(timings[-1], 3),
+            }
+
+        errors = sum(1 for _, status, _ in samples if status != 200)
+        result = {
+            'requests': len(samples),
+            'errors': errors,
+            'duration_s': round(elapsed, 3),
+            'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else 0,
+            **percentiles([seconds for _, _, seconds in samples]),
+            'by_request': {},
+        }
+        for name in dict.fromkeys(name for name, _, _ in samples):
+            result['by_request'][name] = percentiles([seconds for n, _, seconds in samples if n == name])
+        if errors:
+            self.stderr.write(f'{errors} request(s) did not return 200')
+        return result
+
+    def _print_row(self, handler, result):
+        self.stdout.write(
+            f"{handler:<5} {result['throughput_rps']:>8.1f} req/s  median {result['median_ms']:>9.2f} ms  "
+            f"p99 {result['p99_ms']:>9.2f} ms  errors {result['errors']}"
+        )
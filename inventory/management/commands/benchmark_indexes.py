@@ -0,0 +1,204 @@
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from inventory.models import (
+    Warehouse, Location, Category, Product, Operation, StockMovement, LowStockAlert, DocumentStatus
+)
+from services.dashboard_service import PENDING_STATUSES
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a large throwaway dataset and records query plans and timings for the hot ledger, '
+        'alert and operation filters with and without the indexes added by a migration'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--movements', type=int, default=200000)
+        parser.add_argument('--operations', type=int, default=20000)
+        parser.add_argument('--alerts', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the median is reported')
+        parser.add_argument('--migration', default='0009_hot_filter_indexes',
+                            help='inventory migration whose indexes are compared')
+        parser.add_argument('--json', dest='json_path', help='Write the full report (including plans) to this file')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl:
+            raise CommandError('This benchmark drops indexes inside a transaction and needs a backend with transactional DDL.')
+
+        loader = MigrationLoader(connection)
+        key = ('inventory', options['migration'])
+        if key not in loader.disk_migrations:
+            raise CommandError(f"Unknown migration: inventory.{options['migration']}")
+        if key not in loader.applied_migrations:
+            raise CommandError(f"Migration inventory.{options['migration']} is not applied.")
+
+        rng = random.Random(options['seed'])
+        report = {'vendor': connection.vendor, 'migration': options['migration'], 'dataset': {}, 'queries': {}}
+        try:
+            # SQLite can only alter the schema inside a transaction with FK checks switched off
+            with connection.constraint_checks_disabled(), transaction.atomic():
+                report['dataset'] = self._seed(rng, options)
+                self._analyze()
+                samples = self._samples()
+                after = self._measure(samples, options['repeat'])
+
+                # Reverse the migration's schema changes inside the same transaction
+                with connection.schema_editor(atomic=False) as editor:
+                    loader.get_migration(*key).unapply(loader.project_state(key, at_end=True), editor)
+                self._analyze()
+                before = self._measure(samples, options['repeat'])
+
+                for name in after:
+                    report['queries'][name] = {'before': before[name], 'after': after[name]}
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self._print(report)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(report, fh, indent=2, default=str)
+            self.stdout.write(f"Report written to {options['json_path']}")
+
+    def _seed(self, rng, options):
+        now = timezone.now()
+        warehouses = Warehouse.objects.bulk_create([
+            Warehouse(name=f'Bench WH {i}', code=f'BENCH-WH-{i}') for i in range(3)
+        ])
+        locations = Location.objects.bulk_create([
+            Location(warehouse=wh, name=f'Bench Loc {j}', code=f'BENCH-{j}') for wh in warehouses for j in range(4)
+        ])
+        category = Category.objects.create(name='Bench Category')
+        products = Product.objects.bulk_create([
+            Product(name=f'Bench Product {i}', sku=f'BENCH-{i:07d}', category=category, uom='pcs', min_stock_level=10)
+            for i in range(options['products'])
+        ], batch_size=1000)
+
+        types = [c[0] for c in Operation.Type.choices]
+        statuses = [c[0] for c in DocumentStatus.choices]
+        operations = Operation.objects.bulk_create([
+            Operation(
+                operation_type=rng.choice(types),
+                status=rng.choice(statuses),
+                reference_number=f'BENCH/OP/{i:07d}',
+                source_location=rng.choice(locations),
+            )
+            for i in range(options['operations'])
+        ], batch_size=1000)
+
+        def movement():
+            tx_type = rng.choice(types)
+            src = rng.choice(locations) if tx_type in ('DELIVERY', 'TRANSFER', 'ADJUSTMENT') else None
+            dst = rng.choice(locations) if tx_type in ('RECEIPT', 'TRANSFER') else None
+            return StockMovement(
+                product=rng.choice(products),
+                from_location=src,
+                to_location=dst,
+                quantity=Decimal(rng.randint(1, 50)),
+                transaction_type=tx_type,
+                reference_doc=rng.choice(operations) if operations else None,
+                timestamp=now - timedelta(minutes=rng.randint(0, 180 * 24 * 60)),
+            )
+
+        remaining = options['movements']
+        while remaining > 0:
+            chunk = min(remaining, 5000)
+            StockMovement.objects.bulk_create([movement() for _ in range(chunk)])
+            remaining -= chunk
+
+        # At most one active alert per pair; older resolved alerts make up the rest
+        pairs = rng.sample([(p, loc) for p in products for loc in locations],
+                           min(options['alerts'], len(products) * len(locations)))
+        active = len(pairs) // 5
+        LowStockAlert.objects.bulk_create([
+            LowStockAlert(
+                product=p, location=loc, current_quantity=Decimal('1'), threshold=Decimal('10'),
+                is_resolved=i >= active, is_read=rng.random() < 0.5,
+                resolved_at=now if i >= active else None,
+            )
+            for i, (p, loc) in enumerate(pairs)
+        ], batch_size=1000)
+
+        return {
+            'warehouses': len(warehouses),
+            'locations': len(locations),
+            'products': len(products),
+            'operations': len(operations),
+            'movements': options['movements'],
+            'alerts': len(pairs),
+            'active_alerts': active,
+        }
+
+    def _analyze(self):
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def _samples(self):
+        """
+        The hot queries, as (name, queryset, callable that evaluates it the way the app does).
+        """
+        product = Product.objects.filter(sku__startswith='BENCH-').order_by('?').first()
+        warehouse = Warehouse.objects.filter(code__startswith='BENCH-WH-').first()
+        alert = LowStockAlert.objects.filter(is_resolved=False, product__sku__startswith='BENCH-').first()
+        since = timezone.now() - timedelta(days=30)
+
+        ledger = StockMovement.objects.order_by('-timestamp', '-id')
+        by_warehouse = ledger.filter(
+            Q(to_location__warehouse_id=warehouse.id) | Q(from_location__warehouse_id=warehouse.id)
+        )
+        samples = [
+            ('ledger_by_product', ledger.filter(product_id=product.id)[:20], list),
+            ('ledger_by_type', ledger.filter(transaction_type=Operation.Type.DELIVERY)[:20], list),
+            ('ledger_by_warehouse', by_warehouse[:20], list),
+            ('movements_last_30_days', StockMovement.objects.filter(timestamp__gte=since).values(
+                'product__name').annotate(moves=Count('id'), total_qty=Sum('quantity')).order_by('-total_qty')[:5], list),
+            ('alert_active_lookup', LowStockAlert.objects.filter(
+                product_id=alert.product_id, location_id=alert.location_id, is_resolved=False), list),
+            ('alert_unread_count', LowStockAlert.objects.filter(is_read=False, is_resolved=False), lambda qs: qs.count()),
+            ('alert_list', LowStockAlert.objects.order_by('-created_at')[:50], list),
+            ('operations_by_type_status', Operation.objects.filter(
+                operation_type=Operation.Type.DELIVERY, status=DocumentStatus.READY).order_by('-created_at')[:50], list),
+            ('operations_pending_by_type', Operation.objects.filter(status__in=PENDING_STATUSES).values(
+                'operation_type').annotate(count=Count('id')).order_by(), list),
+        ]
+        return samples
+
+    def _measure(self, samples, repeat):
+        results = {}
+        for name, queryset, run in samples:
+            timings = []
+            for _ in range(max(1, repeat)):
+                start = time.perf_counter()
+                run(queryset._chain())
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = {
+                'median_ms': round(statistics.median(timings), 3),
+                'plan': queryset._chain().explain(),
+            }
+        return results
+
+    def _print(self, report):
+        dataset = ', '.join(f'{k}={v}' for k, v in report['dataset'].items())
+        self.stdout.write(f"{report['vendor']} / {report['migration']}: {dataset}")
+        self.stdout.write(f"{'query':<30} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name, result in report['queries'].items():
+            before, after = result['before']['median_ms'], result['after']['median_ms']
+            speedup = before / after if after else float('inf')
+            self.stdout.write(f"{name:<30} {before:>10.2f} {after:>10.2f} {speedup:>7.1f}x")
@@ -0,0 +1,86 @@
+import json
+import platform
+import statistics
+import time
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from inventory.models import MovementRollup, StockMovement, Warehouse
+from services.movement_rollup_service import MovementRollupService, DAY, HOUR
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares chart/report queries answered from the movement rollups with the same queries '
+        'over the raw ledger, and checks that both give the same result. Load data first with generate_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query')
+        parser.add_argument('--output', help='Write the JSON report to this file ("-" for stdout)')
+
+    def handle(self, *args, **options):
+        if not StockMovement.objects.exists():
+            raise CommandError('No movements found. Load data with "manage.py generate_data" first.')
+
+        started = time.perf_counter()
+        built = MovementRollupService.build()
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'environment': {
+                'vendor': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'dataset': {
+                'movements': StockMovement.objects.count(),
+                'rollup_rows_hour': MovementRollup.objects.filter(period=HOUR).count(),
+                'rollup_rows_day': MovementRollup.objects.filter(period=DAY).count(),
+            },
+            'build': {'movements': built['movements'], 'seconds': round(time.perf_counter() - started, 3)},
+            'results': {},
+        }
+
+        now = timezone.now()
+        warehouse = Warehouse.objects.order_by('id').first()
+        cases = [
+            ('top_movers_30d', 'top_products', {'since': now - timedelta(days=30)}),
+            ('top_movers_365d', 'top_products', {'since': now - timedelta(days=365)}),
+            ('trend_30d_daily', 'trend', {'since': now - timedelta(days=30)}),
+            ('trend_365d_daily', 'trend', {'since': now - timedelta(days=365)}),
+            ('trend_7d_hourly', 'trend', {'since': now - timedelta(days=7), 'interval': HOUR}),
+        ]
+        if warehouse:
+            cases.append(('trend_90d_daily_warehouse', 'trend',
+                          {'since': now - timedelta(days=90), 'warehouse_id': warehouse.id}))
+
+        self.stdout.write(f"{'query':<28} {'ledger ms':>10} {'rollup ms':>10} {'speedup':>8}  same")
+        for name, method, kwargs in cases:
+            ledger, ledger_result = self._time(getattr(MovementRollupService, f'ledger_{method}'), kwargs, options['repeat'])
+            rollup, rollup_result = self._time(getattr(MovementRollupService, method), kwargs, options['repeat'])
+            report['results'][name] = {
+                'ledger_median_ms': ledger,
+                'rollup_median_ms': rollup,
+                'speedup': round(ledger / rollup, 2) if rollup else None,
+                'same_result': ledger_result == rollup_result,
+            }
+            row = report['results'][name]
+            self.stdout.write(f"{name:<28} {ledger:>10.2f} {rollup:>10.2f} {row['speedup'] or 0:>7.1f}x  {row['same_result']}")
+
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def _time(self, query, kwargs, repeat):
+        timings = []
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            result = query(**kwargs)
+            timings.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(timings), 3), result
@@ -0,0 +1,132 @@
+import json
+import platform
+import random
+import statistics
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from inventory.models import Product
+from services.product_search_service import ProductSearchService
+
+ADJECTIVES = ['Steel', 'Brass', 'Nylon', 'Copper', 'Plastic', 'Rubber', 'Galvanized', 'Heavy', 'Compact', 'Flexible']
+NOUNS = ['Bracket', 'Hinge', 'Washer', 'Bearing', 'Valve', 'Gasket', 'Clamp', 'Coupling', 'Spacer', 'Bushing']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Times product search at growing catalogue sizes: the old LIKE scan, the indexed search '
+        'and the autocomplete path. Products are inserted in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Catalogue sizes to measure at (products added on top of existing ones)')
+        parser.add_argument('--queries', type=int, default=50, help='Queries per measurement')
+        parser.add_argument('--limit', type=int, default=10, help='Results per query (top-k)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the JSON report to this file ("-" for stdout)')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.limit = options['limit']
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'environment': {
+                'vendor': connection.vendor,
+                'backend': ProductSearchService.backend(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'queries': options['queries'],
+            'limit': self.limit,
+            'results': {},
+        }
+
+        try:
+            with transaction.atomic():
+                inserted = 0
+                for size in sorted(options['sizes']):
+                    started = time.perf_counter()
+                    self._insert(inserted, size)
+                    inserted = size
+                    load_s = time.perf_counter() - started
+                    report['results'][str(size)] = self._measure(size, options['queries'], load_s)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        # The index built for the benchmark holds rolled-back products
+        ProductSearchService.invalidate()
+
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def _insert(self, start, stop, batch_size=5000):
+        for low in range(start, stop, batch_size):
+            Product.objects.bulk_create([
+                Product(sku=f'BS-{i:07d}', uom='pcs',
+                        name=f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(NOUNS)} {self.rng.randint(1, 999)}mm')
+                for i in range(low, min(low + batch_size, stop))
+            ])
+
+    def _measure(self, size, count, load_s):
+        picks = [f'BS-{self.rng.randrange(size):07d}' for _ in range(count)]
+        names = dict(Product.objects.filter(sku__in=picks).values_list('sku', 'name'))
+        # Substrings of a SKU and of a name, and SKU prefixes as typed into the picker
+        substrings = [sku[4:] if i % 2 else names[sku].split()[-1] + ' ' + names[sku].split()[0][:4]
+                      for i, sku in enumerate(picks)]
+        prefixes = [sku[:self.rng.randint(5, 9)] for sku in picks]
+
+        def legacy(term):
+            return list(Product.objects.filter(Q(name__icontains=term) | Q(sku__icontains=term)).order_by('sku')[:self.limit])
+
+        def legacy_terms(terms):
+            queryset = Product.objects.all()
+            for word in terms.split():
+                queryset = queryset.filter(Q(name__icontains=word) | Q(sku__icontains=word))
+            return list(queryset.order_by('sku')[:self.limit])
+
+        ProductSearchService.invalidate()
+        started = time.perf_counter()
+        index = ProductSearchService.sku_index()
+        build_s = time.perf_counter() - started
+
+        result = {
+            'load_s': round(load_s, 2),
+            'sku_index_build_s': round(build_s, 3),
+            'sku_index_entries': len(index),
+            'scan_substring': self._time(legacy_terms, substrings),
+            'indexed_substring': self._time(lambda t: ProductSearchService.search(t, self.limit), substrings),
+            'scan_prefix': self._time(legacy, prefixes),
+            'autocomplete_prefix': self._time(lambda t: ProductSearchService.autocomplete(t, self.limit), prefixes),
+            'sku_index_lookup': self._time(lambda t: index.lookup(t, self.limit), prefixes),
+        }
+        self.stdout.write(f"{size:>9} products (loaded in {load_s:.1f}s, SKU index built in {build_s:.2f}s)")
+        for name, timing in result.items():
+            if isinstance(timing, dict):
+                self.stdout.write(f"    {name:<22} median {timing['median_ms']:>9.3f} ms  p99 {timing['p99_ms']:>9.3f} ms")
+        return result
+
+    def _time(self, run, terms):
+        timings = []
+        for term in terms:
+            start = time.perf_counter()
+            run(term)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'median_ms': round(statistics.median(timings), 3),
+            'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 3),
+            'max_ms': round(timings[-1], 3),
+        }
@@ -0,0 +1,196 @@
+import json
+import platform
+import statistics
+import time
+from urllib.parse import quote
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from inventory.models import Product, ProductStock, Operation, StockMovement, DocumentStatus
+from inventory.pagination import KeysetPaginator
+from inventory.utils import generate_operation_pdf
+from services.dashboard_service import DashboardService
+from .benchmark_validation import Command as ValidationBenchmark
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the key read/write paths against the current database and emits the results as JSON. '
+        'Load data first with generate_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark')
+        parser.add_argument('--lines', type=int, nargs='+', default=[10, 100, 500],
+                            help='Line counts for validate_operation')
+        parser.add_argument('--deep-page', type=int, default=50, help='Ledger page number for the deep-page benchmark')
+        parser.add_argument('--only', nargs='+', help='Run only benchmarks whose name starts with one of these')
+        parser.add_argument('--label', default='', help='Free-form label stored with the results')
+        parser.add_argument('--output', help='Write the JSON report to this file ("-" for stdout)')
+        parser.add_argument('--compare', help='Previous JSON report to compare median timings against')
+
+    def handle(self, *args, **options):
+        if not Product.objects.exists():
+            raise CommandError('No products found. Load data with "manage.py generate_data" first.')
+
+        self.repeat = max(1, options['repeat'])
+        self.only = options['only']
+        report = {
+            'label': options['label'],
+            'started_at': timezone.now().isoformat(),
+            'environment': {
+                'vendor': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'dataset': {
+                'products': Product.objects.count(),
+                'stock_rows': ProductStock.objects.count(),
+                'operations': Operation.objects.count(),
+                'movements': StockMovement.objects.count(),
+            },
+            'repeat': self.repeat,
+            'results': {},
+        }
+
+        # Everything the suite writes (user, validated operations) is rolled back
+        try:
+            with override_settings(ALLOWED_HOSTS=['*']), transaction.atomic():
+                self.client = APIClient()
+                self.client.force_authenticate(user=User.objects.create_user(
+                    username=f'benchmark-{time.time_ns()}', password='benchmark', role=User.Role.MANAGER
+                ))
+                for name, run in self._benchmarks(options):
+                    if self.only and not any(name.startswith(prefix) for prefix in self.only):
+                        continue
+                    report['results'][name] = self._measure(run)
+                    self._print_row(name, report['results'][name])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        if options['compare']:
+            self._compare(report, options['compare'])
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def _benchmarks(self, options):
+        for count in options['lines']:
+            yield f'validate_operation_{count}_lines', lambda count=count: self._validate(count)
+
+        yield 'dashboard_kpis_cold', lambda: self._get('/api/dashboard/kpi/', cold=True)
+        yield 'dashboard_kpis_cached', lambda: self._get('/api/dashboard/kpi/')
+        yield 'dashboard_charts_cold', lambda: self._get('/api/dashboard/charts/', cold=True)
+        yield 'reorder_report', lambda: self._get('/api/inventory/reorder-report/')
+        yield 'ledger_first_page', lambda: self._get('/api/inventory/movements/?page_size=50')
+
+        cursor = self._deep_cursor(options['deep_page'])
+        yield 'ledger_deep_page', lambda: self._get(f'/api/inventory/movements/?page_size=50&cursor={cursor or ""}')
+
+        term = self._search_term()
+        yield 'product_search', lambda: self._get(f'/api/inventory/products/?search={term}')
+
+        stock = ProductStock.objects.order_by('id').first()
+        if stock:
+            order = {'operation_type': 'DELIVERY', 'source_location': stock.location_id,
+                     'lines': [{'product': stock.product_id, 'quantity_demanded': '1'}] * 5}
+            yield 'operation_create', lambda: self._post('/api/inventory/operations/', order, expected=201)
+            # Per-order cost: compare with operation_create x 100
+            yield 'operation_bulk_create_100', lambda: self._post('/api/inventory/operations/bulk/', [order] * 100, expected=201)
+
+        operation = Operation.objects.filter(status=DocumentStatus.DONE).order_by('-id').first()
+        if operation:
+            yield 'operation_pdf', lambda: generate_operation_pdf(operation)
+            yield 'operation_pdf_view', lambda: self._get(f'/api/inventory/operations/{operation.id}/pdf/')
+
+    def _measure(self, run):
+        timings, queries = [], []
+        for _ in range(self.repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                result = run()
+                elapsed = time.perf_counter() - start
+            # Some runs time themselves (and exclude their setup)
+            if isinstance(result, tuple):
+                elapsed, query_count = result
+            else:
+                query_count = len(ctx.captured_queries)
+            timings.append(elapsed * 1000)
+            queries.append(query_count)
+
+        timings.sort()
+        return {
+            'runs': len(timings),
+            'min_ms': round(timings[0], 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            'max_ms': round(timings[-1], 3),
+            'queries': max(queries),
+        }
+
+    def _validate(self, count):
+        return ValidationBenchmark()._run(count, Operation.Type.DELIVERY)
+
+    def _get(self, url, cold=False):
+        if cold:
+            DashboardService.invalidate()
+        response = self.client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} returned {response.status_code}')
+        # Force rendering so serialization is part of the measurement
+        response.content
+
+    def _post(self, url, data, expected=200):
+        response = self.client.post(url, data, format='json')
+        if response.status_code != expected:
+            raise CommandError(f'POST {url} returned {response.status_code}')
+        response.content
+
+    def _deep_cursor(self, page_number):
+        queryset = StockMovement.objects.all()
+        cursor = None
+        for _ in range(max(0, page_number - 1)):
+            page = KeysetPaginator(queryset, 'timestamp', 50).page(cursor)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        return cursor
+
+    def _search_term(self):
+        # The name of a product from the middle of the catalog
+        product = Product.objects.order_by('id')[Product.objects.count() // 2]
+        return quote(product.name)
+
+    def _print_row(self, name, result):
+        self.stdout.write(
+            f"{name:<32} median {result['median_ms']:>10.2f} ms  p95 {result['p95_ms']:>10.2f} ms  "
+            f"queries {result['queries']:>5}"
+        )
+
+    def _compare(self, report, path):
+        with open(path) as fh:
+            previous = json.load(fh)
+        report['compared_with'] = {'label': previous.get('label', ''), 'started_at': previous.get('started_at')}
+        self.stdout.write(f"\nCompared with {path}:")
+        for name, result in report['results'].items():
+            old = previous.get('results', {}).get(name)
+            if not old:
+                continue
+            change = (result['median_ms'] - old['median_ms']) / old['median_ms'] * 100 if old['median_ms'] else 0
+            result['median_change_pct'] = round(change, 1)
+            self.stdout.write(f"{name:<32} {old['median_ms']:>10.2f} -> {result['median_ms']:>10.2f} ms ({change:+.1f}%)")
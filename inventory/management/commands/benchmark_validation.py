@@ -0,0 +1,95 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from inventory.models import Warehouse, Location, Category, Product, ProductStock, Operation, OperationLine, DocumentStatus
+from services.operation_service import OperationService
+from services.stock_service import StockService
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measures validate_operation latency and query count as the number of lines grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, nargs='+', default=[10, 50, 100, 500])
+        parser.add_argument('--type', default=Operation.Type.DELIVERY, choices=[c[0] for c in Operation.Type.choices])
+        parser.add_argument('--compare-per-line', action='store_true',
+                            help='Also time the per-line StockService path for comparison')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'lines':>6} {'path':>9} {'ms':>10} {'queries':>8}")
+        for count in options['lines']:
+            self._report(count, 'batch', self._run(count, options['type'], batch=True))
+            if options['compare_per_line']:
+                self._report(count, 'per-line', self._run(count, options['type'], batch=False))
+
+    def _report(self, count, path, result):
+        elapsed, queries = result
+        self.stdout.write(f"{count:>6} {path:>9} {elapsed * 1000:>10.1f} {queries:>8}")
+
+    def _run(self, count, op_type, batch=True):
+        """
+        Builds a throwaway operation with `count` lines, validates it and rolls everything back.
+        """
+        result = None
+        try:
+            with transaction.atomic():
+                operation = self._build_operation(count, op_type)
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    if batch:
+                        OperationService.validate_operation(operation.id)
+                    else:
+                        self._validate_per_line(operation)
+                    elapsed = time.perf_counter() - start
+                result = (elapsed, len(ctx.captured_queries))
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return result
+
+    def _build_operation(self, count, op_type):
+        warehouse = Warehouse.objects.create(name='Bench WH', code='BENCH-WH')
+        src = Location.objects.create(warehouse=warehouse, name='Bench Source', code='BENCH-SRC')
+        dst = Location.objects.create(warehouse=warehouse, name='Bench Destination', code='BENCH-DST')
+        category = Category.objects.create(name='Bench Category')
+        products = Product.objects.bulk_create([
+            Product(name=f'Bench Product {i}', sku=f'BENCH-{i:06d}', category=category, uom='pcs', min_stock_level=5)
+            for i in range(count)
+        ])
+        if op_type != Operation.Type.RECEIPT:
+            StockService.lock_stocks({(p.id, src.id) for p in products})
+            ProductStock.objects.filter(location=src).update(quantity=Decimal('100'))
+
+        operation = Operation.objects.create(
+            operation_type=op_type,
+            source_location=src if op_type != Operation.Type.RECEIPT else None,
+            destination_location=dst if op_type in (Operation.Type.RECEIPT, Operation.Type.TRANSFER) else None,
+            status=DocumentStatus.READY
+        )
+        OperationLine.objects.bulk_create([
+            OperationLine(operation=operation, product=p, quantity_demanded=Decimal('10')) for p in products
+        ])
+        return operation
+
+    def _validate_per_line(self, operation):
+        """
+        Reference implementation of the per-line path: one StockService call per line.
+        """
+        for line in operation.lines.select_related('product'):
+            if operation.operation_type == Operation.Type.RECEIPT:
+                StockService.increase_stock(line.product, operation.destination_location, line.quantity_demanded, operation)
+            elif operation.operation_type == Operation.Type.DELIVERY:
+                StockService.decrease_stock(line.product, operation.source_location, line.quantity_demanded, operation)
+            elif operation.operation_type == Operation.Type.TRANSFER:
+                StockService.move_stock(line.product, operation.source_location, operation.destination_location, line.quantity_demanded, operation)
+            else:
+                StockService.adjust_stock(line.product, operation.source_location, line.quantity_demanded, operation)
+            line.quantity_done = line.quantity_demanded
+            line.save()
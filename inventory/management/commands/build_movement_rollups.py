@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from services.movement_rollup_service import MovementRollupService
+
+
+class Command(BaseCommand):
+    help = (
+        'Adds the movements logged since the last run to the hourly/daily movement rollups. '
+        'The first run backfills the whole ledger. Run it from cron, e.g. every 5 minutes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help='Movement ids per transaction')
+
+    def handle(self, *args, **options):
+        self.verbose = options['verbosity'] > 1
+        start = time.perf_counter()
+        result = MovementRollupService.build(options['chunk_size'], progress=self._progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['movements']} movement(s) aggregated in {time.perf_counter() - start:.1f}s, "
+            f"rollups up to #{result['watermark']}"
+        ))
+
+    def _progress(self, done, last):
+        if self.verbose:
+            self.stdout.write(f'  up to #{done} of #{last}')
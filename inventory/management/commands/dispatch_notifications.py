@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from services.notification_service import NotificationService
+
+
+class Command(BaseCommand):
+    help = 'Delivers pending notifications from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help='Keep draining the outbox until interrupted')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            sent = NotificationService.dispatch_pending(batch_size=options['batch_size'])
+            total += sent
+            if sent:
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Sent {sent} notification(s)')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Dispatched {total} notification(s)'))
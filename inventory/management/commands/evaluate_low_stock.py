@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from services.low_stock_service import LowStockService
+
+
+class Command(BaseCommand):
+    help = 'Re-evaluates low-stock alerts for every stock row (catch-up for missed after-commit evaluations)'
+
+    def handle(self, *args, **options):
+        result = LowStockService.evaluate_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} alert(s) created, {result['resolved']} resolved"
+        ))
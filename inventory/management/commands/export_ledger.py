@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from inventory.filters import MovementFilter
+from inventory.models import StockMovement
+from services.stock_export_service import StockExportService, EXPORT_FORMATS
+
+
+class Command(BaseCommand):
+    help = 'Streams the stock ledger in chronological order as CSV, JSONL or columnar row groups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write; stdout by default')
+        parser.add_argument('--format', dest='file_format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--product', type=int, help='Product id')
+        parser.add_argument('--warehouse', type=int, help='Warehouse id (either side of the move)')
+        parser.add_argument('--start-date', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--end-date', help='YYYY-MM-DD, inclusive')
+
+    def handle(self, *args, **options):
+        params = {key: options[key] for key in ('product', 'warehouse', 'start_date', 'end_date') if options[key]}
+        filterset = MovementFilter(params, queryset=StockMovement.objects.all())
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+
+        chunks = StockExportService.encode(
+            options['file_format'], StockExportService.LEDGER_COLUMNS, StockExportService.ledger_rows(filterset.qs)
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='') as fh:
+                fh.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from services.stock_export_service import StockExportService, EXPORT_FORMATS
+
+
+class Command(BaseCommand):
+    help = 'Streams stock by location (or the product catalogue) as CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write; stdout by default')
+        parser.add_argument('--format', dest='file_format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--products', action='store_true', help='Export the product catalogue instead')
+        parser.add_argument('--warehouse', type=int, help='Warehouse id')
+        parser.add_argument('--location', type=int, help='Location id')
+        parser.add_argument('--include-zero', action='store_true', help='Include rows with zero quantity')
+
+    def handle(self, *args, **options):
+        if options['products']:
+            columns, rows = StockExportService.PRODUCT_COLUMNS, StockExportService.product_rows()
+        else:
+            columns = StockExportService.STOCK_COLUMNS
+            rows = StockExportService.stock_rows(
+                warehouse_id=options['warehouse'], location_id=options['location'],
+                include_zero=options['include_zero']
+            )
+
+        chunks = StockExportService.encode(options['file_format'], columns, rows)
+        if options['output']:
+            with open(options['output'], 'w', newline='') as fh:
+                fh.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from inventory.models import ReorderSuggestion
+from services.forecast_service import ForecastService
+
+
+class Command(BaseCommand):
+    help = (
+        'Forecasts daily demand of every product from its DELIVERY history and stores suggested '
+        'safety stock, reorder point and order quantity for review. Defaults come from the '
+        'FORECAST_* settings. Run build_movement_rollups first so the history is read from the rollups'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--method', choices=['sma', 'ses'], default='sma',
+                            help='sma: moving average, ses: exponential smoothing')
+        parser.add_argument('--days', type=int, help='Days of history')
+        parser.add_argument('--lead-time', type=int, help='Supplier lead time in days')
+        parser.add_argument('--review-days', type=int, help='Days of demand an order covers beyond the lead time')
+        parser.add_argument('--service-level', type=float, help='e.g. 0.95')
+        parser.add_argument('--alpha', type=float, help='Smoothing factor for ses')
+
+    def handle(self, *args, **options):
+        self.verbose = options['verbosity'] > 1
+        start = time.perf_counter()
+        try:
+            result = ForecastService.run(
+                method=ReorderSuggestion.Method(options['method'].upper()),
+                history_days=options['days'],
+                lead_time_days=options['lead_time'],
+                review_days=options['review_days'],
+                service_level=options['service_level'],
+                alpha=options['alpha'],
+                progress=self._progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['products']} product(s) forecast from {result['history_days']} day(s) of deliveries "
+            f"in {time.perf_counter() - start:.1f}s, {result['to_reorder']} to reorder"
+        ))
+
+    def _progress(self, done, total):
+        if self.verbose:
+            self.stdout.write(f'  {done} of {total} products')
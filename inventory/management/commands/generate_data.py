@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from services.data_generator import DataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Bulk-loads a large synthetic dataset (warehouses, products, ledger history, open operations)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='GEN', help='Prefix for every generated code, SKU and reference')
+        parser.add_argument('--warehouses', type=int, default=5)
+        parser.add_argument('--locations', type=int, default=50, help='Total locations, spread over the warehouses')
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--movements', type=int, default=1000000)
+        parser.add_argument('--open-operations', type=int, default=10000,
+                            help='Operations left in DRAFT/WAITING/READY/CANCELED')
+        parser.add_argument('--lines-per-operation', type=int, default=5)
+        parser.add_argument('--days', type=int, default=365, help='Length of the generated history')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        generator = DataGenerator(
+            prefix=options['prefix'],
+            warehouses=options['warehouses'],
+            locations=options['locations'],
+            categories=options['categories'],
+            products=options['products'],
+            movements=options['movements'],
+            open_operations=options['open_operations'],
+            lines_per_operation=options['lines_per_operation'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        start = time.perf_counter()
+        try:
+            counts = generator.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        for name, count in counts.items():
+            self.stdout.write(f"{name:>16}: {count}")
+        self.stdout.write(self.style.SUCCESS(f'Generated in {elapsed:.1f}s'))
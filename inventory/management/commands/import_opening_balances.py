@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from services.stock_import_service import StockImportService, ImportFileError, read_rows, format_from_name, BALANCE_COLUMNS
+
+
+class Command(BaseCommand):
+    help = (
+        'Sets stock levels from a CSV or JSONL file (columns: sku, warehouse, location, quantity) '
+        'through a single ADJUSTMENT operation'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'jsonl'],
+                            help='Defaults to the file extension')
+        parser.add_argument('--notes', default='', help='Ledger note for the adjustments')
+        parser.add_argument('--chunk-size', type=int, default=StockImportService.CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate and roll back')
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or format_from_name(options['path'])
+        try:
+            with open(options['path'], 'rb') as fh:
+                result = StockImportService.import_opening_balances(
+                    read_rows(fh, file_format, BALANCE_COLUMNS),
+                    notes=options['notes'], chunk_size=options['chunk_size'], dry_run=options['dry_run']
+                )
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"line {error['line']}: {error['error']}"))
+        summary = f"{result['rows']} row(s) valid, {result['adjusted']} ledger entries, {result['error_count']} rejected"
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {summary}"))
+        elif result['operation']:
+            self.stdout.write(self.style.SUCCESS(f"{result['operation']}: {summary}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Nothing imported: {summary}"))
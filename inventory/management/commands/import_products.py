@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from services.stock_import_service import StockImportService, ImportFileError, read_rows, format_from_name, PRODUCT_COLUMNS
+
+
+class Command(BaseCommand):
+    help = 'Creates/updates products from a CSV or JSONL file (columns: sku, name, category, uom, min_stock_level)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'jsonl'],
+                            help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=StockImportService.CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or format_from_name(options['path'])
+        try:
+            with open(options['path'], 'rb') as fh:
+                result = StockImportService.import_products(
+                    read_rows(fh, file_format, PRODUCT_COLUMNS),
+                    chunk_size=options['chunk_size'], dry_run=options['dry_run']
+                )
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"line {error['line']}: {error['error']}"))
+        prefix = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {result['created']}, updated {result['updated']}, {result['error_count']} row(s) rejected"
+        ))
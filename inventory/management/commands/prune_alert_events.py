@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from services.alert_feed_service import AlertFeedService
+
+
+class Command(BaseCommand):
+    help = 'Deletes alert stream events older than --days; clients further behind resync from a fresh count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+
+    def handle(self, *args, **options):
+        deleted = AlertFeedService.prune(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} alert event(s) deleted'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from services.idempotency_service import IdempotencyService
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored Idempotency-Key responses older than IDEMPOTENCY_TTL'
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyService.prune()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} expired idempotency record(s) deleted'))
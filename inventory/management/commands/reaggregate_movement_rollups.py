@@ -0,0 +1,33 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from services.movement_rollup_service import MovementRollupService
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the movement rollups from the ledger, e.g. after movements were corrected by hand. '
+        'With --since only the days from that date on are rebuilt'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='YYYY-MM-DD, first day to rebuild (default: everything)')
+        parser.add_argument('--chunk-size', type=int, help='Movement ids per pass')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        start = time.perf_counter()
+        result = MovementRollupService.reaggregate(since, options['chunk_size'])
+        scope = f"from {options['since']}" if since else 'all days'
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups rebuilt ({scope}): {result['movements']} movement(s) in {time.perf_counter() - start:.1f}s, "
+            f"up to #{result['watermark']}"
+        ))
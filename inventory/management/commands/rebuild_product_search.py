@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from services.product_search_service import ProductSearchService
+
+
+class Command(BaseCommand):
+    help = (
+        'Drops and recreates the product search index (FTS5 table and triggers on SQLite, trigram '
+        'indexes on PostgreSQL). Run after migrations that rebuild the product table on SQLite.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ProductSearchService.uninstall()
+            ProductSearchService.install()
+        ProductSearchService.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'Product search backend: {ProductSearchService.backend()}'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from services.reservation_service import ReservationService
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds stock reservations from the open deliveries/transfers and reports drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, do not rewrite rows')
+
+    def handle(self, *args, **options):
+        drift = ReservationService.reconcile(fix=not options['dry_run'])
+
+        for row in drift:
+            self.stdout.write(
+                f"product {row['product_id']} @ location {row['location_id']}: "
+                f"expected {row['expected']}, found {row['actual']}"
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Reservations are in sync'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} drifting row(s) found'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(drift)} drifting row(s) rebuilt'))
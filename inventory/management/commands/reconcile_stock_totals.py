@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from services.stock_summary_service import StockSummaryService
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized product/warehouse stock totals from ProductStock and reports drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, do not rewrite rows')
+
+    def handle(self, *args, **options):
+        drift = StockSummaryService.reconcile(fix=not options['dry_run'])
+
+        for row in drift:
+            scope = f"product {row['product_id']}"
+            if row['warehouse_id'] is not None:
+                scope += f" @ warehouse {row['warehouse_id']}"
+            self.stdout.write(f"{scope}: expected {row['expected']}, found {row['actual']}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Stock totals are in sync'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} drifting row(s) found'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(drift)} drifting row(s) rebuilt'))
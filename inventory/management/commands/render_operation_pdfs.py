@@ -0,0 +1,25 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventory.models import Operation, DocumentStatus
+from services.operation_pdf_service import OperationPdfService
+from services.stock_export_service import iter_chunks
+
+
+class Command(BaseCommand):
+    help = 'Renders the cached PDFs of validated operations that do not have one yet (backfill / warm-up)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Only operations validated in the last N days')
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        operations = Operation.objects.filter(status=DocumentStatus.DONE, validated_at__isnull=False)
+        if options['days'] is not None:
+            operations = operations.filter(validated_at__gte=timezone.now() - timedelta(days=options['days']))
+
+        rendered = 0
+        ids = operations.order_by('id').values_list('id', flat=True).iterator(chunk_size=options['batch_size'])
+        for chunk in iter_chunks(ids, options['batch_size']):
+            rendered += OperationPdfService.render(chunk)
+        self.stdout.write(self.style.SUCCESS(f'{rendered} PDF(s) rendered'))
@@ -0,0 +1,32 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from services.snapshot_service import SnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Checkpoints ProductStock for as-of stock queries. Run it from cron, e.g. hourly with --if-older-than 24'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', default='', help='Free text stored on the snapshot')
+        parser.add_argument('--if-older-than', type=float, metavar='HOURS',
+                            help='Skip unless the latest snapshot is at least this many hours old')
+        parser.add_argument('--keep', type=int, help='Afterwards delete all but the N most recent snapshots')
+
+    def handle(self, *args, **options):
+        if options['if_older_than'] is not None:
+            snapshot = SnapshotService.take_if_due(timedelta(hours=options['if_older_than']), options['notes'])
+        else:
+            snapshot = SnapshotService.take(options['notes'])
+
+        if snapshot is None:
+            self.stdout.write('Latest snapshot is recent enough, nothing to do')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Snapshot {snapshot.id} taken at {snapshot.taken_at:%Y-%m-%d %H:%M:%S}: '
+                f'{snapshot.line_count} line(s), movements up to #{snapshot.last_movement_id}'
+            ))
+
+        if options['keep'] is not None:
+            removed = SnapshotService.prune(max(options['keep'], 1))
+            if removed:
+                self.stdout.write(f'Pruned {removed} old snapshot(s)')
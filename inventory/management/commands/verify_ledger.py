@@ -0,0 +1,52 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from services.ledger_verification_service import LedgerVerificationService
+
+
+class Command(BaseCommand):
+    help = ('Recomputes stock from the movement ledger and reports where it disagrees with ProductStock '
+            'or with the balance_after chain. Optionally books corrective ADJUSTMENT movements.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes; each checks a range of product ids (default: CPU count)')
+        parser.add_argument('--range-size', type=int, default=LedgerVerificationService.RANGE_SIZE,
+                            help='Products per range')
+        parser.add_argument('--output', help="Write the JSON report to this file ('-' for stdout)")
+        parser.add_argument('--fix', action='store_true',
+                            help='Book each stock mismatch as an ADJUSTMENT movement so the ledger matches ProductStock')
+        parser.add_argument('--limit', type=int, default=20, help='Discrepancies to print')
+
+    def handle(self, *args, **options):
+        report = LedgerVerificationService.verify(
+            workers=max(options['workers'], 1),
+            range_size=options['range_size'],
+            progress=lambda done, total: self.stderr.write(f'\r{done}/{total} ranges', ending=''),
+        )
+        self.stderr.write('')
+
+        if options['fix']:
+            operation = LedgerVerificationService.correct(report['discrepancies'])
+            report['correction'] = operation.reference_number if operation else None
+
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, indent=2))
+            return
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, cls=DjangoJSONEncoder, indent=2)
+
+        for row in report['discrepancies'][:options['limit']]:
+            self.stdout.write(json.dumps(row, cls=DjangoJSONEncoder))
+        summary = ', '.join(f'{count} {kind}' for kind, count in report['summary'].items())
+        self.stdout.write(
+            f"Checked {report['products']} products and {report['movements']} movements "
+            f"in {report['duration_s']}s with {report['workers']} worker(s): {summary}"
+        )
+        if options['fix']:
+            if report['correction']:
+                self.stdout.write(self.style.SUCCESS(f"Stock mismatches booked in {report['correction']}"))
+        elif report['summary']['stock_mismatch']:
+            raise CommandError(f"{report['summary']['stock_mismatch']} stock row(s) disagree with the ledger")
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.3 on 2026-10-18 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_stock_totals(apps, schema_editor):
+    ProductStock = apps.get_model('inventory', 'ProductStock')
+    ProductStockTotal = apps.get_model('inventory', 'ProductStockTotal')
+    WarehouseStockTotal = apps.get_model('inventory', 'WarehouseStockTotal')
+
+    ProductStockTotal.objects.bulk_create([
+        ProductStockTotal(product_id=row['product_id'], quantity=row['total'])
+        for row in ProductStock.objects.values('product_id').annotate(total=Sum('quantity'))
+    ], batch_size=1000)
+    WarehouseStockTotal.objects.bulk_create([
+        WarehouseStockTotal(product_id=row['product_id'], warehouse_id=row['location__warehouse_id'], quantity=row['total'])
+        for row in ProductStock.objects.values('product_id', 'location__warehouse_id').annotate(total=Sum('quantity'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStockTotal',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_total', serialize=False, to='inventory.product')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WarehouseStockTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='warehouse_totals', to='inventory.product')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_totals', to='inventory.warehouse')),
+            ],
+            options={
+                'unique_together': {('product', 'warehouse')},
+            },
+        ),
+        migrations.RunPython(backfill_stock_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-18 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_stock_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['-created_at', '-id'], name='operation_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['-timestamp', '-id'], name='movement_timestamp_keyset_idx'),
+        ),
+    ]
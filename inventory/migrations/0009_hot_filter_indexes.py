@@ -0,0 +1,55 @@
+# Generated by Django 5.1.3 on 2026-10-18 04:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='lowstockalert',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='lowstockalert',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['is_read'], name='alert_active_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lowstockalert',
+            index=models.Index(fields=['-created_at'], name='alert_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['operation_type', 'status', '-created_at'], name='operation_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['status', 'operation_type'], name='operation_status_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', '-timestamp', '-id'], name='movement_product_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['transaction_type', '-timestamp'], name='movement_type_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['to_location', '-timestamp', '-id'], name='movement_to_loc_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['from_location', '-timestamp', '-id'], name='movement_from_loc_ts_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='lowstockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_resolved', False)), fields=('product', 'location'), name='unique_active_alert'),
+        ),
+    ]
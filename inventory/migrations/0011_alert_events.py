@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-18 04:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_stock_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CREATED', 'Created'), ('RESOLVED', 'Resolved'), ('READ', 'Read')], max_length=20)),
+                ('unread_delta', models.SmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='inventory.lowstockalert')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    # Vendor-specific (FTS5 table + triggers on SQLite, pg_trgm indexes on PostgreSQL),
+    # so it is not expressible as model indexes
+    from services.product_search_service import ProductSearchService
+    ProductSearchService.install(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from services.product_search_service import ProductSearchService
+    ProductSearchService.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_alert_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.3 on 2026-10-18 05:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def reserve_open_operations(apps, schema_editor):
+    # Deliveries and transfers already WAITING/READY hold their demand from the start, as
+    # ReservationService.reconcile() would set it
+    OperationLine = apps.get_model('inventory', 'OperationLine')
+    StockReservation = apps.get_model('inventory', 'StockReservation')
+    open_lines = OperationLine.objects.filter(
+        operation__operation_type__in=('DELIVERY', 'TRANSFER'),
+        operation__status__in=('WAITING', 'READY'),
+        operation__source_location__isnull=False,
+    )
+    open_lines.update(quantity_reserved=F('quantity_demanded'))
+    StockReservation.objects.bulk_create([
+        StockReservation(product_id=row['product_id'], location_id=row['operation__source_location_id'], quantity=row['total'])
+        for row in open_lines.values('product_id', 'operation__source_location_id').annotate(
+            total=Sum('quantity_demanded')).order_by()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operationline',
+            name='quantity_reserved',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='inventory.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='inventory.product')),
+            ],
+            options={
+                'unique_together': {('product', 'location')},
+            },
+        ),
+        migrations.RunPython(reserve_open_operations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 05:11
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_sequences(apps, schema_editor):
+    # Existing references were TYPE-<id>, so every sequence starts above the highest id
+    Operation = apps.get_model('inventory', 'Operation')
+    ReferenceSequence = apps.get_model('inventory', 'ReferenceSequence')
+    last = Operation.objects.aggregate(last=Max('id'))['last'] or 0
+    ReferenceSequence.objects.bulk_create([
+        ReferenceSequence(name=operation_type[:3], last_value=last)
+        for operation_type in ('RECEIPT', 'DELIVERY', 'TRANSFER', 'ADJUSTMENT')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_stock_reservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceSequence',
+            fields=[
+                ('name', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.3 on 2026-10-18 05:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_idempotency_records'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_movement_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MovementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('HOUR', 'Hour'), ('DAY', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('transaction_type', models.CharField(choices=[('RECEIPT', 'Receipt'), ('DELIVERY', 'Delivery'), ('TRANSFER', 'Internal Transfer'), ('ADJUSTMENT', 'Stock Adjustment')], max_length=20)),
+                ('grain', models.CharField(choices=[('PRODUCT', 'All locations'), ('LOCATION', 'Per location pair')], default='LOCATION', max_length=8)),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('quantity_in', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('quantity_out', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('movement_count', models.PositiveIntegerField(default=0)),
+                ('from_location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.location')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.product')),
+                ('to_location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.location')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'grain', 'bucket', 'product', 'transaction_type', 'quantity', 'quantity_in', 'quantity_out', 'movement_count'], name='rollup_window_idx')],
+            },
+        ),
+    ]
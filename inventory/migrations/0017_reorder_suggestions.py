@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 05:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_movement_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('SMA', 'Moving average'), ('SES', 'Exponential smoothing')], max_length=3)),
+                ('history_days', models.PositiveSmallIntegerField()),
+                ('lead_time_days', models.PositiveSmallIntegerField()),
+                ('service_level', models.DecimalField(decimal_places=3, max_digits=4)),
+                ('daily_demand', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('demand_std', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('safety_stock', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('reorder_point', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('order_up_to', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('suggested_quantity', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('computed_at', models.DateTimeField()),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestion', to='inventory.product')),
+            ],
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 
@@ -43,12 +45,23 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class ProductQuerySet(models.QuerySet):
+    def with_total_stock(self):
+        """
+        Annotates total_quantity from the materialized ProductStockTotal row (0 when missing).
+        """
+        return self.annotate(
+            total_quantity=Coalesce(F('stock_total__quantity'), Value(0), output_field=models.DecimalField())
+        )
+
 class Product(models.Model):
     name = models.CharField(max_length=200)
     sku = models.CharField(max_length=50, unique=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='products')
     uom = models.CharField(max_length=20, help_text="Unit of Measure (e.g., kg, pcs)")
     min_stock_level = models.PositiveIntegerField(default=0)
+
+    objects = ProductQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.name} ({self.sku})"
@@ -67,6 +80,87 @@ class ProductStock(models.Model):
     def __str__(self):
         return f"{self.product.sku} @ {self.location.code}: {self.quantity}"
 
+class ProductStockTotal(models.Model):
+    """
+    Materialized total stock of a product across all locations.
+    Maintained by StockService in the same transaction as every stock change.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='stock_total')
+    quantity = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.product.sku}: {self.quantity}"
+
+class WarehouseStockTotal(models.Model):
+    """
+    Materialized total stock of a product per warehouse.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='warehouse_totals')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='stock_totals')
+    quantity = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('product', 'warehouse')
+
+    def __str__(self):
+        return f"{self.product.sku} @ {self.warehouse.code}: {self.quantity}"
+
+class StockReservation(models.Model):
+    """
+    Quantity promised to open (WAITING/READY) deliveries and transfers at a location.
+    Maintained by ReservationService from OperationLine.quantity_reserved.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('product', 'location')
+
+    def __str__(self):
+        return f"{self.product.sku} @ {self.location.code}: {self.quantity} reserved"
+
+class ReferenceSequenceManager(models.Manager):
+    def allocate(self, name: str, count: int = 1) -> int:
+        """
+        Takes `count` consecutive numbers from the named sequence and returns the first one.
+        A single UPDATE .. RETURNING on PostgreSQL and SQLite 3.35+. The row stays locked until
+        the caller's transaction ends, and a rollback gives the numbers back, so there are no gaps.
+        """
+        connection = connections[self.db]
+        for _ in range(2):
+            if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'UPDATE {connection.ops.quote_name(self.model._meta.db_table)} '
+                        'SET last_value = last_value + %s WHERE name = %s RETURNING last_value',
+                        [count, name]
+                    )
+                    row = cursor.fetchone()
+                last = row[0] if row else None
+            else:
+                with transaction.atomic(using=self.db):
+                    last = self.select_for_update().filter(name=name).values_list('last_value', flat=True).first()
+                    if last is not None:
+                        last += count
+                        self.filter(name=name).update(last_value=last)
+            if last is not None:
+                return last - count + 1
+            self.bulk_create([self.model(name=name, last_value=0)], ignore_conflicts=True)
+        raise RuntimeError(f"Could not allocate from sequence {name}")
+
+class ReferenceSequence(models.Model):
+    """
+    Counters for document reference numbers, one row per operation type prefix.
+    """
+    name = models.CharField(max_length=20, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    objects = ReferenceSequenceManager()
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
 class DocumentStatus(models.TextChoices):
     DRAFT = 'DRAFT', 'Draft'
     WAITING = 'WAITING', 'Waiting'
@@ -98,19 +192,30 @@ class Operation(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     validated_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order for the operations API
+            models.Index(fields=['-created_at', '-id'], name='operation_created_keyset_idx'),
+            # List filters by type/status, newest first
+            models.Index(fields=['operation_type', 'status', '-created_at'], name='operation_type_status_idx'),
+            # Pending counts grouped by type (dashboard)
+            models.Index(fields=['status', 'operation_type'], name='operation_status_type_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.reference_number:
-            # Temporary save to get ID if needed, or use UUID/Timestamp
-            # Since we need ID for the format TYPE-ID, we might need to save twice or use another strategy.
-            # Let's use a timestamp-based random string or UUID for simplicity in model save, 
-            # OR just save, get ID, then update.
-            super().save(*args, **kwargs)
-            self.reference_number = f"{self.operation_type[:3]}-{self.id:06d}"
-            # Save again to update reference_number, ensuring we don't force insert
-            kwargs.pop('force_insert', None)
-            return super().save(*args, **kwargs)
+            self.reference_number = Operation.allocate_references(self.operation_type, 1)[0]
         return super().save(*args, **kwargs)
 
+    @staticmethod
+    def allocate_references(operation_type: str, count: int) -> list:
+        """
+        `count` new reference numbers (TYPE-000123) for operations of one type, in one query.
+        """
+        prefix = operation_type[:3]
+        first = ReferenceSequence.objects.allocate(prefix, count)
+        return [f"{prefix}-{n:06d}" for n in range(first, first + count)]
+
     def __str__(self):
         return f"{self.operation_type} - {self.reference_number} ({self.status})"
 
@@ -119,6 +224,8 @@ class OperationLine(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity_demanded = models.DecimalField(max_digits=10, decimal_places=2)
     quantity_done = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Part of quantity_demanded currently held in StockReservation at the source location
+    quantity_reserved = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
     def __str__(self):
         return f"{self.operation.reference_number} - {self.product.sku}"
@@ -140,6 +247,18 @@ class StockMovement(models.Model):
     balance_after = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order for the ledger API and HTML view
+            models.Index(fields=['-timestamp', '-id'], name='movement_timestamp_keyset_idx'),
+            # Ledger filtered by product / type, newest first
+            models.Index(fields=['product', '-timestamp', '-id'], name='movement_product_ts_idx'),
+            models.Index(fields=['transaction_type', '-timestamp'], name='movement_type_ts_idx'),
+            # Ledger filtered by warehouse (either side of the move)
+            models.Index(fields=['to_location', '-timestamp', '-id'], name='movement_to_loc_ts_idx'),
+            models.Index(fields=['from_location', '-timestamp', '-id'], name='movement_from_loc_ts_idx'),
+        ]
+
     def __str__(self):
         return f"{self.timestamp} - {self.product.sku}: {self.quantity}"
 
@@ -154,8 +273,198 @@ class LowStockAlert(models.Model):
     resolved_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        unique_together = ('product', 'location', 'is_resolved')
+        constraints = [
+            # One active alert per product/location; any number of resolved ones.
+            # Also serves as the partial index for the per-stock-change lookup.
+            models.UniqueConstraint(
+                fields=['product', 'location'], condition=Q(is_resolved=False), name='unique_active_alert'
+            ),
+        ]
+        indexes = [
+            # Bell badge: unread count over active alerts
+            models.Index(fields=['is_read'], condition=Q(is_resolved=False), name='alert_active_unread_idx'),
+            # Alert list, newest first
+            models.Index(fields=['-created_at'], name='alert_created_idx'),
+        ]
 
     def __str__(self):
         status = "Resolved" if self.is_resolved else "Active"
         return f"ALERT: {self.product.sku} @ {self.location.code} ({status})"
+
+class NotificationOutbox(models.Model):
+    """
+    Transactional outbox for e-mail notifications.
+    Rows are written inside the stock transaction and delivered after commit by the dispatcher.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    kind = models.CharField(max_length=30)
+    dedupe_key = models.CharField(max_length=100, db_index=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.kind}: {self.subject} ({self.status})"
+
+class StockSnapshot(models.Model):
+    """
+    Checkpoint of ProductStock at a point in time.
+    Stock as of any later moment is this snapshot plus the movements logged after it.
+    """
+    taken_at = models.DateTimeField(db_index=True)
+    # Highest StockMovement id already reflected in the lines; replay starts after it
+    last_movement_id = models.BigIntegerField(default=0)
+    line_count = models.PositiveIntegerField(default=0)
+    notes = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f"Snapshot {self.taken_at:%Y-%m-%d %H:%M} ({self.line_count} lines)"
+
+class StockSnapshotLine(models.Model):
+    """
+    Quantity of a product at a location in a snapshot. Zero quantities are not stored.
+    """
+    snapshot = models.ForeignKey(StockSnapshot, on_delete=models.CASCADE, related_name='lines')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='+')
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        unique_together = ('snapshot', 'product', 'location')
+
+    def __str__(self):
+        return f"{self.snapshot_id}: {self.product_id} @ {self.location_id} = {self.quantity}"
+
+class AlertEvent(models.Model):
+    """
+    Append-only feed of alert changes, pushed to browsers by the alert stream.
+    The id is the SSE event id, so a reconnecting client resumes with Last-Event-ID.
+    """
+    class Kind(models.TextChoices):
+        CREATED = 'CREATED', 'Created'
+        RESOLVED = 'RESOLVED', 'Resolved'
+        READ = 'READ', 'Read'
+
+    alert = models.ForeignKey(LowStockAlert, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    # Change to the number of active unread alerts (the bell badge)
+    unread_delta = models.SmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.id}: {self.kind} alert {self.alert_id}"
+
+class IdempotencyRecord(models.Model):
+    """
+    Outcome of a request sent with an Idempotency-Key, so a retry gets the original response.
+    The row is inserted before the request runs: a duplicate arriving meanwhile finds it and
+    waits for the response instead of running the request a second time.
+    """
+    # sha256 of user, method, path and key
+    scope = models.CharField(max_length=64, unique=True)
+    # sha256 of the request body; the same key with another body is rejected
+    fingerprint = models.CharField(max_length=64)
+    # Null while the first attempt is running
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.scope[:12]}: {self.response_status or 'in progress'}"
+
+class MovementRollup(models.Model):
+    """
+    StockMovement totals per hour or day, product and transaction type, at two grains: per
+    source/destination location pair (for location and warehouse filters), and over all
+    locations (everything else). Built incrementally up to RollupWatermark.last_movement_id.
+    """
+    class Period(models.TextChoices):
+        HOUR = 'HOUR', 'Hour'
+        DAY = 'DAY', 'Day'
+
+    class Grain(models.TextChoices):
+        PRODUCT = 'PRODUCT', 'All locations'
+        LOCATION = 'LOCATION', 'Per location pair'
+
+    period = models.CharField(max_length=4, choices=Period.choices)
+    # Start of the hour or day (TIME_ZONE)
+    bucket = models.DateTimeField()
+    # Not indexed, see Meta.indexes
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', db_index=False)
+    transaction_type = models.CharField(max_length=20, choices=Operation.Type.choices)
+    # PRODUCT rows total every location and leave from/to empty
+    grain = models.CharField(max_length=8, choices=Grain.choices, default=Grain.LOCATION)
+    from_location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    to_location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    quantity = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Share of quantity moved into / out of a location
+    quantity_in = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    quantity_out = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    movement_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Chart and trend windows are answered from the index alone, so it carries the totals.
+            # No index leads with product: SQLite would walk it to skip the GROUP BY sort
+            models.Index(fields=['period', 'grain', 'bucket', 'product', 'transaction_type',
+                                 'quantity', 'quantity_in', 'quantity_out', 'movement_count'],
+                         name='rollup_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket:%Y-%m-%d %H:00} {self.product_id} {self.transaction_type}: {self.quantity}"
+
+class RollupWatermark(models.Model):
+    """
+    Highest StockMovement id already aggregated into a rollup table.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    last_movement_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: #{self.last_movement_id}"
+
+class ReorderSuggestion(models.Model):
+    """
+    Latest forecast-based reorder point for a product, written by ForecastService from its
+    DELIVERY history. Reviewed in the admin, where it can be applied as min_stock_level.
+    """
+    class Method(models.TextChoices):
+        MOVING_AVERAGE = 'SMA', 'Moving average'
+        EXPONENTIAL = 'SES', 'Exponential smoothing'
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='reorder_suggestion')
+    method = models.CharField(max_length=3, choices=Method.choices)
+    history_days = models.PositiveSmallIntegerField()
+    lead_time_days = models.PositiveSmallIntegerField()
+    service_level = models.DecimalField(max_digits=4, decimal_places=3)
+    # Forecast units per day and the spread of daily demand around it
+    daily_demand = models.DecimalField(max_digits=14, decimal_places=4)
+    demand_std = models.DecimalField(max_digits=14, decimal_places=4)
+    safety_stock = models.DecimalField(max_digits=14, decimal_places=2)
+    reorder_point = models.DecimalField(max_digits=14, decimal_places=2)
+    # Reorder point plus the demand of one review period
+    order_up_to = models.DecimalField(max_digits=14, decimal_places=2)
+    # To order now: order_up_to less the stock position (on hand - reserved + open receipts)
+    # when that position is at or below the reorder point
+    suggested_quantity = models.DecimalField(max_digits=14, decimal_places=2)
+    computed_at = models.DateTimeField()
+    applied_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.product_id}: reorder at {self.reorder_point}, order {self.suggested_quantity}"
@@ -0,0 +1,190 @@
+import base64
+import binascii
+import datetime
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(value, pk, reverse: bool = False, ordering: str = None) -> str:
+    payload = {'id': pk, 'r': int(reverse)}
+    if isinstance(value, datetime.datetime):
+        payload['v'] = value.isoformat()
+    else:
+        # Plain values (e.g. status) are marked so that they are not parsed as a datetime
+        payload.update(v=value, t='s')
+    if ordering:
+        payload['o'] = ordering
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, ordering: str = None):
+    """
+    Returns (value, pk, reverse) for an opaque cursor, raising ValueError when it is malformed
+    or was issued for another ordering (e.g. '-created_at') than `ordering`.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload['v'] if payload.get('t') == 's' else parse_datetime(payload['v'])
+        pk = int(payload['id'])
+        reverse = bool(payload.get('r'))
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if value is None or (ordering and payload.get('o', ordering) != ordering):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return value, pk, reverse
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Keyset (seek) pagination over (ordering_field, id), newest (highest) first unless
+    descending is False.
+
+    Each page is a single indexed range scan no matter how deep it is, and rows inserted
+    while a client is paging never shift the rows it has yet to see.
+    """
+
+    def __init__(self, queryset, ordering_field: str, page_size: int, descending: bool = True):
+        self.queryset = queryset
+        self.ordering_field = ordering_field
+        self.page_size = page_size
+        self.descending = descending
+
+    @property
+    def ordering(self) -> str:
+        return f"{'-' if self.descending else ''}{self.ordering_field}"
+
+    def page(self, cursor: str = None) -> KeysetPage:
+        field = self.ordering_field
+        queryset = self.queryset
+        position = None
+        reverse = False
+
+        if cursor:
+            value, pk, reverse = decode_cursor(cursor, self.ordering)
+            position = (value, pk)
+            # Rows past the cursor in the direction of travel; previous-page cursors walk back
+            after = 'gt' if reverse == self.descending else 'lt'
+            queryset = queryset.filter(Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'id__{after}': pk}))
+
+        ascending = reverse == self.descending
+        ordering = (field, 'id') if ascending else (f'-{field}', '-id')
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next, has_previous = (position is not None, has_more) if reverse else (has_more, position is not None)
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(getattr(rows[-1], field), rows[-1].pk, ordering=self.ordering)
+        if rows and has_previous:
+            previous_cursor = encode_cursor(getattr(rows[0], field), rows[0].pk, reverse=True,
+                                            ordering=self.ordering)
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    DRF pagination backed by KeysetPaginator.
+    Responses look like {'next': url, 'previous': url, 'results': [...]}.
+    """
+    ordering_field = 'created_at'
+    # Fields ?ordering= may pick instead (name, or -name for descending); empty to disallow.
+    # Unknown values fall back to the default, newest first, like DRF's OrderingFilter
+    ordering_fields = ()
+    ordering_query_param = 'ordering'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+
+    def get_ordering(self, request):
+        """
+        (field, descending) from ?ordering=; only the first of comma-separated terms is used.
+        """
+        term = request.query_params.get(self.ordering_query_param, '').split(',')[0].strip()
+        if term.lstrip('-') in self.ordering_fields:
+            return term.lstrip('-'), term.startswith('-')
+        return self.ordering_field, True
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        field, descending = self.get_ordering(request)
+        paginator = KeysetPaginator(queryset, field, self.get_page_size(request), descending)
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        except ValueError as e:
+            raise NotFound(str(e))
+        return self.page.object_list
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OperationCursorPagination(KeysetCursorPagination):
+    ordering_field = 'created_at'
+    ordering_fields = ('created_at', 'updated_at', 'status')
+
+
+class MovementCursorPagination(KeysetCursorPagination):
+    ordering_field = 'timestamp'
+
+
+class AlertCursorPagination(KeysetCursorPagination):
+    ordering_field = 'created_at'
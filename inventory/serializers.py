@@ -1,5 +1,6 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Warehouse, Location, Category, Product, ProductStock, Operation, OperationLine, StockMovement, Partner, LowStockAlert
+from .models import Warehouse, Location, Category, Product, ProductStock, ProductStockTotal, Operation, OperationLine, StockMovement, Partner, LowStockAlert
 
 class LowStockAlertSerializer(serializers.ModelSerializer):
     product_sku = serializers.CharField(source='product.sku', read_only=True)
@@ -43,7 +44,18 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_total_stock(self, obj):
-        return sum(stock.quantity for stock in obj.stocks.all())
+        # Prefer the with_total_stock() annotation; fall back to the materialized row
+        if hasattr(obj, 'total_quantity'):
+            return obj.total_quantity
+        try:
+            return obj.stock_total.quantity
+        except ProductStockTotal.DoesNotExist:
+            return 0
+
+class ReorderReportSerializer(ProductSerializer):
+    # From the product's ReorderSuggestion; null until forecast_reorder_points has run
+    suggested_quantity = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    suggested_reorder_point = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
 
 class ProductStockSerializer(serializers.ModelSerializer):
     location_code = serializers.CharField(source='location.code', read_only=True)
@@ -64,7 +76,8 @@ class OperationLineSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = OperationLine
-        fields = ['id', 'product', 'product_sku', 'product_name', 'quantity_demanded', 'quantity_done']
+        fields = ['id', 'product', 'product_sku', 'product_name', 'quantity_demanded', 'quantity_done', 'quantity_reserved']
+        read_only_fields = ['quantity_reserved']
 
 class OperationSerializer(serializers.ModelSerializer):
     lines = OperationLineSerializer(many=True)
@@ -78,6 +91,7 @@ class OperationSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['reference_number', 'created_by', 'created_at', 'updated_at', 'validated_at']
 
+    @transaction.atomic
     def create(self, validated_data):
         # Check if auto-validation is requested
         should_validate = validated_data.get('status') == 'DONE'
@@ -86,14 +100,13 @@ class OperationSerializer(serializers.ModelSerializer):
             validated_data['status'] = 'DRAFT' # Force draft first
             
         lines_data = validated_data.pop('lines')
+        # save() takes the reference number from the type's sequence
         operation = Operation.objects.create(**validated_data)
-        
-        # Generate Reference Number (Simple logic for now)
-        operation.reference_number = f"{operation.operation_type[:3]}-{operation.id:06d}"
-        operation.save()
+        OperationLine.objects.bulk_create([OperationLine(operation=operation, **line_data) for line_data in lines_data])
 
-        for line_data in lines_data:
-            OperationLine.objects.create(operation=operation, **line_data)
+        from services.reservation_service import ReservationService
+        # Created straight into WAITING/READY
+        ReservationService.sync(operation)
             
         if should_validate:
             from services.operation_service import OperationService
@@ -114,8 +127,13 @@ class OperationSerializer(serializers.ModelSerializer):
         
         return operation
 
+    @transaction.atomic
     def update(self, instance, validated_data):
+        from services.reservation_service import ReservationService
         lines_data = validated_data.pop('lines', None)
+
+        # Release against the current lines and source location, then reserve for the new ones
+        ReservationService.release(instance)
         
         # Update instance fields
         for attr, value in validated_data.items():
@@ -127,7 +145,8 @@ class OperationSerializer(serializers.ModelSerializer):
             instance.lines.all().delete()
             for line_data in lines_data:
                 OperationLine.objects.create(operation=instance, **line_data)
-        
+
+        ReservationService.sync(instance)
         return instance
 
 class StockMovementSerializer(serializers.ModelSerializer):
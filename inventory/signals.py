@@ -0,0 +1,30 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Operation, Product, ProductStock
+
+
+@receiver(post_save, sender=ProductStock)
+@receiver(post_delete, sender=ProductStock)
+def refresh_stock_totals(sender, instance, **kwargs):
+    """
+    Keeps the materialized stock totals correct for writes that bypass StockService,
+    such as admin edits and fixtures. StockService never sends this signal: it creates rows
+    with bulk_create (lock_stocks) and changes quantities with update(), and keeps the totals
+    itself through StockSummaryService.apply_deltas.
+    """
+    from services.stock_summary_service import StockSummaryService
+    StockSummaryService.refresh_products([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_sku_index(sender, instance, **kwargs):
+    from services.product_search_service import ProductSearchService
+    ProductSearchService.invalidate_on_commit()
+
+
+@receiver(pre_delete, sender=Operation)
+def release_reservations(sender, instance, **kwargs):
+    # Before the lines cascade away with the quantities they hold
+    from services.reservation_service import ReservationService
+    ReservationService.release(instance)
@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
     product_list_view, product_create_view, product_update_view, product_delete_view,
-    reorder_report_view,
+    reorder_report_view, stock_as_of_view,
     operation_list_view, operation_create_view, operation_detail_view, operation_update_view, operation_validate_view
 )
 
@@ -11,6 +11,7 @@ urlpatterns = [
     path('<int:pk>/edit/', product_update_view, name='product-update'),
     path('<int:pk>/delete/', product_delete_view, name='product-delete'),
     path('reorder-report/', reorder_report_view, name='reorder-report'),
+    path('stock-as-of/', stock_as_of_view, name='stock-as-of'),
     
     # Operations
     path('operations/', operation_list_view, name='operation-list'),
@@ -1,28 +1,74 @@
+import asyncio
+import datetime
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.utils.encoders import JSONEncoder
 from django.db import transaction
-from django.db.models import Sum, F, DecimalField
-from django.db.models.functions import Coalesce
-from django.http import HttpResponse
+from django.db.models import F, Prefetch, Q
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.contrib.auth.decorators import login_required
 from .models import Warehouse, Location, Category, Product, Operation, OperationLine, StockMovement, DocumentStatus, Partner, LowStockAlert
 from .serializers import (
     WarehouseSerializer, LocationSerializer, CategorySerializer, 
-    ProductSerializer, OperationSerializer, StockMovementSerializer, PartnerSerializer, LowStockAlertSerializer
+    ProductSerializer, ReorderReportSerializer, OperationSerializer, StockMovementSerializer, PartnerSerializer, LowStockAlertSerializer
 )
 from .utils import generate_operation_pdf
+from .filters import ProductSearchFilter
+from .pagination import KeysetPaginator, OperationCursorPagination, MovementCursorPagination, AlertCursorPagination
 from services.operation_service import OperationService
+from services.bulk_operation_service import BulkOperationService
+from services.idempotency_service import idempotent
+from services.operation_pdf_service import OperationPdfService
+from services.alert_feed_service import AlertFeedService, AlertFeedHub, sse
+from services.product_search_service import ProductSearchService
+from services.reservation_service import ReservationService
+from services.snapshot_service import SnapshotService
+from services.stock_export_service import StockExportService, CONTENT_TYPES, FILE_EXTENSIONS
+from services.stock_import_service import (
+    StockImportService, ImportFileError, read_rows, format_from_name, PRODUCT_COLUMNS, BALANCE_COLUMNS
+)
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
 from rest_framework.permissions import IsAuthenticated
-from users.permissions import IsManagerOrReadOnly
+from users.permissions import IsManagerOrReadOnly, IsManager
+
+
+def _export_response(request, columns, rows, filename):
+    """
+    Streams rows in the format chosen by ?file_format= (csv by default).
+    """
+    file_format = request.query_params.get('file_format', 'csv')
+    try:
+        chunks = StockExportService.encode(file_format, columns, rows)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{FILE_EXTENSIONS[file_format]}"'
+    return response
+
+
+def _upload_rows(request, required):
+    """
+    Incremental row reader over the uploaded 'file'; the format comes from ?file_format= or the file name.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        raise ImportFileError("Upload the data in a 'file' field")
+    file_format = request.query_params.get('file_format') or format_from_name(upload.name)
+    return read_rows(upload, file_format, required)
 
 
 class WarehouseViewSet(viewsets.ModelViewSet):
@@ -31,7 +77,7 @@ class WarehouseViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 class LocationViewSet(viewsets.ModelViewSet):
-    queryset = Location.objects.all()
+    queryset = Location.objects.select_related('warehouse')
     serializer_class = LocationSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ['warehouse']
@@ -42,15 +88,50 @@ class CategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
+    queryset = Product.objects.with_total_stock().select_related('category')
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     filterset_fields = ['category']
     search_fields = ['name', 'sku']
     ordering_fields = ['name', 'sku']
 
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Top matches for a typeahead: SKU prefixes first, then SKU/name substrings.
+        URL: /api/inventory/products/autocomplete/?q=<term>&limit=10
+        """
+        try:
+            limit = min(max(1, int(request.query_params.get('limit', 10))), 50)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        results = ProductSearchService.autocomplete(request.query_params.get('q', ''), limit)
+        return Response({'results': results})
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Streams the catalogue as CSV or JSONL.
+        URL: /api/inventory/products/export/?file_format=csv|jsonl
+        """
+        return _export_response(request, StockExportService.PRODUCT_COLUMNS, StockExportService.product_rows(), 'products')
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAuthenticated, IsManager])
+    def import_catalogue(self, request):
+        """
+        Creates/updates products from an uploaded CSV or JSONL file, matched by SKU.
+        URL: /api/inventory/products/import/
+        """
+        try:
+            result = StockImportService.import_products(
+                _upload_rows(request, PRODUCT_COLUMNS), dry_run=request.query_params.get('dry_run') == 'true'
+            )
+        except ImportFileError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
 class PartnerViewSet(viewsets.ModelViewSet):
     queryset = Partner.objects.all()
     serializer_class = PartnerSerializer
@@ -58,32 +139,68 @@ class PartnerViewSet(viewsets.ModelViewSet):
     filterset_fields = ['partner_type']
     search_fields = ['name', 'email', 'phone']
 
-from .filters import OperationFilter
+from .filters import OperationFilter, MovementFilter
 
 class OperationViewSet(viewsets.ModelViewSet):
-    queryset = Operation.objects.all().order_by('-created_at')
+    # Matches OperationSerializer: header FKs joined, lines and their products prefetched
+    queryset = Operation.objects.select_related(
+        'created_by', 'source_location', 'destination_location', 'partner'
+    ).prefetch_related(
+        Prefetch('lines', queryset=OperationLine.objects.select_related('product'))
+    ).order_by('-created_at')
     serializer_class = OperationSerializer
     permission_classes = [IsAuthenticated, IsManagerOrReadOnly]
     # permission_classes = [IsAuthenticated]
+
+    # Keyset pagination on (created_at, id); ?ordering= on created_at, updated_at or status is
+    # handled by the paginator, which keys pages on the chosen field, so no OrderingFilter
+    pagination_class = OperationCursorPagination
     
     # Add filter backends
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter]
     
     # Use custom FilterSet
     filterset_class = OperationFilter
     
     # Enable search
     search_fields = ['reference_number', 'partner_name', 'partner__name', 'lines__product__sku']
-    
-    # Enable ordering
-    ordering_fields = ['created_at', 'updated_at', 'status']
+
+    def get_queryset(self):
+        if self.action == 'pdf':
+            return OperationPdfService.queryset()
+        return super().get_queryset()
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        # Retries with the same Idempotency-Key get the first response instead of a duplicate
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         # For now, allow creation without user
         serializer.save(created_by=None)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    @idempotent
+    def bulk(self, request):
+        """
+        Creates many draft/waiting/ready operations with their lines in one request.
+        URL: /api/inventory/operations/bulk/  body: [{...}, ...] or {"operations": [{...}, ...]}
+        Invalid items are reported per index and skipped; the others are created.
+        """
+        items = request.data.get('operations') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Send a non-empty list of operations'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BulkOperationService.MAX_ITEMS:
+            return Response({'error': f'At most {BulkOperationService.MAX_ITEMS} operations per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        user = request.user if request.user.is_authenticated else None
+        result = BulkOperationService.create(items, user=user)
+        # 207: the body holds a status per item
+        return Response(result, status=status.HTTP_201_CREATED if not result['failed'] else status.HTTP_207_MULTI_STATUS)
+
     @action(detail=True, methods=['post'], permission_classes=[IsManagerOrReadOnly])
     @method_decorator(csrf_exempt)
+    @idempotent
     def validate(self, request, pk=None):
         try:
             # Pass None for user if not authenticated
@@ -103,7 +220,7 @@ class OperationViewSet(viewsets.ModelViewSet):
         URL: /api/inventory/operations/<id>/pdf/
         """
         operation = self.get_object()
-        
+
         # Only allow PDF for validated operations
         if operation.status != DocumentStatus.DONE:
             return Response(
@@ -111,21 +228,75 @@ class OperationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Generate PDF
-        pdf_buffer = generate_operation_pdf(operation)
-        
-        # Return as downloadable file with proper filename
-        pdf_bytes = pdf_buffer.getvalue()
-        response = HttpResponse(pdf_bytes, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{operation.reference_number}.pdf"'
+        if operation.validated_at is None:
+            # Legacy rows without a validation time cannot be keyed; render on every request
+            response = HttpResponse(generate_operation_pdf(operation).getvalue(), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="{operation.reference_number}.pdf"'
+            return response
+
+        # Validated operations are immutable: the ETag alone answers revalidations
+        etag = OperationPdfService.etag(operation)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(OperationPdfService.get_pdf(operation), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="{operation.reference_number}.pdf"'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='export-pdf')
+    def export_pdf(self, request):
+        """
+        The validated operations matching the usual filters (operation_type, start_date,
+        end_date, partner_name, sku, ...) as a ZIP of PDFs, or as one merged PDF with
+        ?file_format=pdf. Streamed; the document count is in X-Document-Count.
+        URL: /api/inventory/operations/export-pdf/
+        """
+        file_format = request.query_params.get('file_format', 'zip')
+        if file_format not in ('zip', 'pdf'):
+            return Response({'error': 'file_format must be zip or pdf'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = OperationPdfService.export_ids(self.filter_queryset(self.get_queryset()))
+        limit = settings.OPERATION_PDF_EXPORT_MAX_DOCUMENTS if file_format == 'zip' else settings.OPERATION_PDF_MERGE_MAX_DOCUMENTS
+        if not ids:
+            return Response({'error': 'No validated operations match these filters'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > limit:
+            return Response({'error': f'{len(ids)} operations match; narrow the filters to at most {limit}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if file_format == 'zip':
+            # Rendered in this process: a pool per request would fork the server and close the
+            # request's connections. Larger runs go through export_operation_pdfs.
+            chunks = OperationPdfService.stream_zip(ids)
+            content_type = 'application/zip'
+        else:
+            chunks = OperationPdfService.stream_merged(ids)
+            content_type = 'application/pdf'
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="operations-{timezone.localdate():%Y%m%d}.{file_format}"'
+        response['X-Document-Count'] = len(ids)
         return response
 
 class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = StockMovement.objects.all().order_by('-timestamp')
+    queryset = StockMovement.objects.select_related(
+        'product', 'from_location', 'to_location', 'user'
+    ).order_by('-timestamp')
     serializer_class = StockMovementSerializer
+    pagination_class = MovementCursorPagination
     # permission_classes = [IsAuthenticated]
     filterset_fields = ['product', 'transaction_type']
 
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Streams the ledger in chronological order as CSV, JSONL or columnar row groups.
+        URL: /api/inventory/movements/export/?file_format=csv|jsonl|columnar&product=&warehouse=&start_date=&end_date=
+        """
+        filterset = MovementFilter(request.query_params, queryset=StockMovement.objects.all())
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        return _export_response(request, StockExportService.LEDGER_COLUMNS, StockExportService.ledger_rows(filterset.qs), 'ledger')
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -135,17 +306,12 @@ from .forms import ProductForm, OperationForm, OperationLineForm
 
 @login_required
 def product_list_view(request):
-    from django.db.models import Sum, DecimalField
-    from django.db.models.functions import Coalesce
-    
-    queryset = Product.objects.annotate(
-        total_quantity=Coalesce(Sum('stocks__quantity'), 0, output_field=DecimalField())
-    ).order_by('name')
+    queryset = Product.objects.with_total_stock().order_by('name')
     
     # Filter by search
     q = request.GET.get('q')
     if q:
-        queryset = queryset.filter(name__icontains=q) | queryset.filter(sku__icontains=q)
+        queryset = ProductSearchService.filter(queryset, q)
         
     # Filter by category
     category_id = request.GET.get('category')
@@ -242,13 +408,15 @@ def operation_create_view(request, op_type='RECEIPT'):
         formset = OperationLineFormSet(request.POST)
         
         if form.is_valid() and formset.is_valid():
-            operation = form.save(commit=False)
-            operation.operation_type = op_type
-            operation.created_by = request.user
-            operation.save()
-            
-            formset.instance = operation
-            formset.save()
+            with transaction.atomic():
+                operation = form.save(commit=False)
+                operation.operation_type = op_type
+                operation.created_by = request.user
+                operation.save()
+
+                formset.instance = operation
+                formset.save()
+                ReservationService.sync(operation)
             
             messages.success(request, f'{op_type.title()} created successfully.')
             if op_type == 'RECEIPT':
@@ -281,8 +449,15 @@ def operation_update_view(request, pk):
         formset = OperationLineFormSet(request.POST, instance=operation)
         
         if form.is_valid() and formset.is_valid():
-            form.save()
-            formset.save()
+            with transaction.atomic():
+                # Release against the stored lines, then reserve for the edited ones. The formset's
+                # copies of the lines still carry what they held, which saving them would write back.
+                ReservationService.release(operation)
+                for line_form in formset.initial_forms:
+                    line_form.instance.quantity_reserved = 0
+                form.save()
+                formset.save()
+                ReservationService.sync(operation)
             messages.success(request, 'Operation updated successfully.')
             if operation.operation_type == 'RECEIPT':
                 return redirect('receipt-detail', pk=operation.pk)
@@ -327,27 +502,21 @@ def operation_validate_view(request, pk):
 
 @login_required
 def stock_ledger_view(request):
-    queryset = StockMovement.objects.all().order_by('-timestamp')
+    queryset = StockMovement.objects.select_related('product', 'from_location', 'to_location', 'user')
     
-    # Filters
-    product_id = request.GET.get('product')
-    if product_id:
-        queryset = queryset.filter(product_id=product_id)
+    # Filters (product, warehouse, date range) shared with the ledger export
+    queryset = MovementFilter(request.GET, queryset=queryset).qs
         
-    warehouse_id = request.GET.get('warehouse')
-    if warehouse_id:
-        # StockMovement has from_location and to_location.
-        # We should filter if either location belongs to the warehouse.
-        queryset = queryset.filter(
-            to_location__warehouse_id=warehouse_id
-        ) | queryset.filter(
-            from_location__warehouse_id=warehouse_id
-        )
-        
-    paginator = Paginator(queryset, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: deep pages cost the same as the first one
+    try:
+        page_obj = KeysetPaginator(queryset, 'timestamp', 20).page(request.GET.get('cursor'))
+    except ValueError:
+        page_obj = KeysetPaginator(queryset, 'timestamp', 20).page()
     
+    # Current filters without the cursor, for pagination and export links
+    filter_params = request.GET.copy()
+    filter_params.pop('cursor', None)
+
     context = {
         'movements': page_obj,
         'page_obj': page_obj,
@@ -356,6 +525,9 @@ def stock_ledger_view(request):
         'warehouses': Warehouse.objects.all(),
         'selected_product': request.GET.get('product', ''),  # Add to avoid auto-format issues
         'selected_warehouse': request.GET.get('warehouse', ''),  # Add to avoid auto-format issues
+        'start_date': request.GET.get('start_date', ''),
+        'end_date': request.GET.get('end_date', ''),
+        'filter_query': filter_params.urlencode(),
     }
     return render(request, 'inventory/stock_ledger.html', context)
 
@@ -364,16 +536,18 @@ def reorder_report_view(request):
     return render(request, 'inventory/reorder_report.html')
 
 class LowStockAlertViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = LowStockAlert.objects.all().order_by('-created_at')
+    queryset = LowStockAlert.objects.select_related('product', 'location__warehouse').order_by('-created_at')
     serializer_class = LowStockAlertSerializer
     permission_classes = [IsAuthenticated]
+    # Alerts are never deleted, so the list is paged like operations and movements
+    pagination_class = AlertCursorPagination
+    filter_backends = [DjangoFilterBackend]
     filterset_fields = ['is_resolved', 'is_read']
 
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         alert = self.get_object()
-        alert.is_read = True
-        alert.save()
+        AlertFeedService.mark_read(alert)
         return Response({'status': 'marked as read'})
 
     @action(detail=False, methods=['get'])
@@ -381,14 +555,266 @@ class LowStockAlertViewSet(viewsets.ReadOnlyModelViewSet):
         count = self.queryset.filter(is_read=False, is_resolved=False).count()
         return Response({'count': count})
 
+async def alert_stream_view(request):
+    """
+    Server-Sent Events feed for the alert bell: a 'snapshot' event with the unread count,
+    then one 'alert' event per created/resolved/read alert carrying the count delta.
+    Reconnects resume after Last-Event-ID. Only served under ASGI; under WSGI it answers
+    204 so EventSource stops and the page falls back to polling.
+    URL: /api/inventory/alerts/stream/
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=403)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+    except (TypeError, ValueError):
+        last_id = None
+    response = StreamingHttpResponse(_alert_stream(last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+async def _alert_stream(last_id):
+    hub = AlertFeedHub.get()
+    queue = await hub.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.ALERT_FEED_MAX_SECONDS
+    try:
+        yield f"retry: {settings.ALERT_FEED_RETRY_MS}\n\n"
+
+        # Replay what the client missed, or start it from a fresh count
+        sent = set()
+        if last_id is not None and await sync_to_async(AlertFeedService.can_resume)(last_id):
+            floor = last_id
+            while True:
+                events = await sync_to_async(AlertFeedService.events_after)(floor)
+                for event in events:
+                    sent.add(event['id'])
+                    yield sse('alert', event, event['id'])
+                if not events:
+                    break
+                floor = events[-1]['id']
+            floor = last_id
+        else:
+            floor, snapshot = await _alert_snapshot()
+            yield snapshot
+
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=min(settings.ALERT_FEED_HEARTBEAT, remaining))
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if event is None:
+                # Fell behind: resync from a fresh count
+                floor, snapshot = await _alert_snapshot()
+                sent.clear()
+                yield snapshot
+            elif event['id'] > floor and event['id'] not in sent:
+                yield sse('alert', event, event['id'])
+    finally:
+        hub.unsubscribe(queue)
+
+async def _alert_snapshot():
+    last_id, count = await sync_to_async(AlertFeedService.snapshot)()
+    return last_id, sse('snapshot', {'unread_count': count}, last_id)
+
 class ReorderReportView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        products = Product.objects.annotate(
-            total_quantity=Coalesce(Sum('stocks__quantity'), 0, output_field=DecimalField())
-        ).filter(total_quantity__lte=F('min_stock_level'))
-        
-        serializer = ProductSerializer(products, many=True)
+        serializer = ReorderReportSerializer(_reorder_products(), many=True)
         return Response(serializer.data)
 
+
+def _reorder_products():
+    # Products at or below their minimum level, with the forecast's suggestion when there is one
+    return Product.objects.with_total_stock().select_related('category').filter(
+        total_quantity__lte=F('min_stock_level')
+    ).annotate(
+        suggested_quantity=F('reorder_suggestion__suggested_quantity'),
+        suggested_reorder_point=F('reorder_suggestion__reorder_point'),
+    )
+
+
+async def _async_user(request):
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+def _json(data, status=200):
+    # DRF's encoder, so the async views render Decimals and dates like their DRF counterparts
+    return JsonResponse(data, encoder=JSONEncoder, status=status, safe=False)
+
+async def product_list_async_view(request):
+    """
+    Async product listing for ASGI deployments, filtered like product_list_view
+    (?q= on name/SKU, ?category=) and paginated with ?page= / ?page_size=.
+    URL: /api/inventory/async/products/
+    """
+    if not await _async_user(request):
+        return _json({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    queryset = Product.objects.with_total_stock().select_related('category').order_by('name', 'id')
+    q = request.GET.get('q')
+    if q:
+        # filter() may look up the search backend once per process
+        queryset = await sync_to_async(ProductSearchService.filter)(queryset, q)
+    category_id = request.GET.get('category')
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+        page_size = min(max(1, int(request.GET.get('page_size', 25))), 100)
+    except ValueError:
+        return _json({'detail': 'page and page_size must be integers.'}, status=400)
+
+    offset = (page - 1) * page_size
+    count = await queryset.acount()
+    products = [product async for product in queryset[offset:offset + page_size]]
+    return _json({
+        'count': count,
+        'page': page,
+        'num_pages': max(1, -(-count // page_size)),
+        'results': ProductSerializer(products, many=True).data,
+    })
+
+async def product_detail_async_view(request, pk):
+    """
+    URL: /api/inventory/async/products/<pk>/
+    """
+    if not await _async_user(request):
+        return _json({'detail': 'Authentication credentials were not provided.'}, status=403)
+    try:
+        product = await Product.objects.with_total_stock().select_related('category').aget(pk=pk)
+    except Product.DoesNotExist:
+        return _json({'detail': 'No Product matches the given query.'}, status=404)
+    return _json(ProductSerializer(product).data)
+
+async def reorder_report_async_view(request):
+    """
+    Async variant of ReorderReportView.
+    URL: /api/inventory/async/reorder-report/
+    """
+    if not await _async_user(request):
+        return _json({'detail': 'Authentication credentials were not provided.'}, status=403)
+    products = [product async for product in _reorder_products()]
+    return _json(ReorderReportSerializer(products, many=True).data)
+
+
+class StockImportView(APIView):
+    """
+    Loads opening balances (sku, warehouse, location, quantity) as one ADJUSTMENT operation.
+    URL: /api/inventory/stock/import/
+    """
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def post(self, request):
+        try:
+            result = StockImportService.import_opening_balances(
+                _upload_rows(request, BALANCE_COLUMNS),
+                user=request.user,
+                notes=request.data.get('notes', ''),
+                dry_run=request.query_params.get('dry_run') == 'true',
+            )
+        except ImportFileError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+class StockExportView(APIView):
+    """
+    Streams stock by location as CSV or JSONL.
+    URL: /api/inventory/stock/export/?file_format=csv|jsonl&warehouse=<id>&location=<id>&include_zero=true
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        rows = StockExportService.stock_rows(
+            warehouse_id=request.query_params.get('warehouse'),
+            location_id=request.query_params.get('location'),
+            include_zero=request.query_params.get('include_zero') == 'true',
+        )
+        return _export_response(request, StockExportService.STOCK_COLUMNS, rows, 'stock')
+
+class StockAsOfView(APIView):
+    """
+    Stock by location as it was at a point in time, rebuilt from the nearest snapshot
+    plus the movements logged after it.
+    URL: /api/inventory/stock/as-of/?at=<date or datetime>&product=<id>&warehouse=<id>&location=<id>
+    A bare date means the end of that day. Add ?file_format=csv|jsonl|columnar to download the rows.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        raw = request.query_params.get('at', '')
+        as_of = _parse_as_of(raw)
+        if as_of is None:
+            return Response({'error': "Pass 'at' as YYYY-MM-DD or an ISO datetime"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows, snapshot, replayed = SnapshotService.report(
+            as_of,
+            product_id=request.query_params.get('product'),
+            location_id=request.query_params.get('location'),
+            warehouse_id=request.query_params.get('warehouse'),
+        )
+        if 'file_format' in request.query_params:
+            return _export_response(request, StockExportService.STOCK_COLUMNS, rows, f'stock-as-of-{as_of:%Y%m%d}')
+
+        columns = StockExportService.STOCK_COLUMNS
+        return Response({
+            'as_of': as_of,
+            'snapshot': {'id': snapshot.id, 'taken_at': snapshot.taken_at} if snapshot else None,
+            'replayed_movements': replayed,
+            'results': [dict(zip(columns, row)) for row in rows],
+        })
+
+class StockAvailabilityView(APIView):
+    """
+    Available to promise: on hand minus what open deliveries/transfers have reserved.
+    URL: /api/inventory/stock/atp/?sku=A&sku=B (or ?sku=A,B / ?product=<id>)&location=<id>&warehouse=<id>
+    Without location or warehouse, quantities are totals across all locations.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_PRODUCTS = 500
+
+    def get(self, request):
+        skus = [sku for value in request.query_params.getlist('sku') for sku in value.split(',') if sku]
+        try:
+            product_ids = [int(pk) for value in request.query_params.getlist('product') for pk in value.split(',') if pk]
+            location_id = int(request.query_params['location']) if request.query_params.get('location') else None
+            warehouse_id = int(request.query_params['warehouse']) if request.query_params.get('warehouse') else None
+        except ValueError:
+            return Response({'error': 'product, location and warehouse must be ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if not skus and not product_ids:
+            return Response({'error': 'Pass at least one sku or product'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(skus) + len(product_ids) > self.MAX_PRODUCTS:
+            return Response({'error': f'At most {self.MAX_PRODUCTS} products per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+        products = dict(Product.objects.filter(Q(sku__in=skus) | Q(id__in=product_ids)).values_list('id', 'sku'))
+        atp = ReservationService.available_to_promise(products, location_id=location_id, warehouse_id=warehouse_id)
+        return Response({
+            'location': location_id,
+            'warehouse': warehouse_id,
+            'results': [{'product_id': pk, 'sku': sku, **atp[pk]} for pk, sku in sorted(products.items(), key=lambda p: p[1])],
+            'missing': sorted(set(skus) - set(products.values())),
+        })
+
+def _parse_as_of(raw):
+    try:
+        day = parse_date(raw)
+        value = datetime.datetime.combine(day, datetime.time.max) if day else parse_datetime(raw)
+    except ValueError:
+        return None
+    if value is None:
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+@login_required
+def stock_as_of_view(request):
+    return render(request, 'inventory/stock_as_of.html', {'warehouses': Warehouse.objects.all()})
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import weakref
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from inventory.models import AlertEvent, LowStockAlert
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+class AlertFeedService:
+    """
+    Records alert changes in the AlertEvent feed and reads them back for the alert stream.
+    """
+
+    @staticmethod
+    def record(kind: str, alerts, unread_delta) -> None:
+        """
+        Appends one event per alert; `unread_delta` is a number or a callable alert -> number.
+        Local stream hubs are woken after commit; other processes pick the events up on their next poll.
+        """
+        alerts = list(alerts)
+        if not alerts:
+            return
+        AlertEvent.objects.bulk_create([
+            AlertEvent(alert=alert, kind=kind,
+                       unread_delta=unread_delta(alert) if callable(unread_delta) else unread_delta)
+            for alert in alerts
+        ])
+        transaction.on_commit(AlertFeedHub.wake_all)
+
+    @staticmethod
+    def mark_read(alert: LowStockAlert) -> None:
+        if alert.is_read:
+            return
+        with transaction.atomic():
+            # Conditional update, so two tabs marking the same alert only count it once
+            if LowStockAlert.objects.filter(pk=alert.pk, is_read=False).update(is_read=True):
+                AlertFeedService.record(AlertEvent.Kind.READ, [alert], 0 if alert.is_resolved else -1)
+        alert.is_read = True
+
+    @staticmethod
+    def unread_count() -> int:
+        return LowStockAlert.objects.filter(is_read=False, is_resolved=False).count()
+
+    @staticmethod
+    def snapshot():
+        """
+        (last event id, unread count) read together, as the starting point of a stream.
+        """
+        with transaction.atomic():
+            return AlertFeedService.last_event_id(), AlertFeedService.unread_count()
+
+    @staticmethod
+    def last_event_id() -> int:
+        return AlertEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    @staticmethod
+    def ids_after(last_id: int) -> list:
+        return list(AlertEvent.objects.filter(id__gt=last_id).values_list('id', flat=True))
+
+    @staticmethod
+    def can_resume(last_id: int) -> bool:
+        """
+        False when events after `last_id` may have been pruned, so the client must resync.
+        """
+        oldest = AlertEvent.objects.order_by('id').values_list('id', flat=True).first()
+        return oldest is None or oldest <= last_id + 1
+
+    @staticmethod
+    def events_after(last_id: int, limit: int = 500) -> list:
+        events = AlertEvent.objects.filter(id__gt=last_id).select_related(
+            'alert__product', 'alert__location'
+        ).order_by('id')[:limit]
+        return [AlertFeedService.payload(event) for event in events]
+
+    @staticmethod
+    def payload(event: AlertEvent) -> dict:
+        alert = event.alert
+        return {
+            'id': event.id,
+            'kind': event.kind,
+            'unread_delta': event.unread_delta,
+            'alert': {
+                'id': alert.id,
+                'product_sku': alert.product.sku,
+                'location_name': alert.location.name,
+                'current_quantity': str(alert.current_quantity),
+                'threshold': str(alert.threshold),
+                'is_resolved': alert.is_resolved,
+                'is_read': alert.is_read,
+            },
+        }
+
+    @staticmethod
+    def prune(days: int) -> int:
+        deleted, _ = AlertEvent.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+        return deleted
+
+
+class AlertFeedHub:
+    """
+    Per-process fan-out for the alert stream. One poller per event loop reads new AlertEvent
+    rows and hands them to every connected client, so database load does not grow with the
+    number of open tabs. The poller runs only while clients are connected.
+
+    Event ids are allocated at insert but become visible at commit, so a lower id can show
+    up after a higher one. The poller re-reads a short window below its high-water mark and
+    skips ids it has already delivered.
+    """
+
+    LOOKBACK = 100
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.subscribers = set()
+        self.last_id = None
+        self.recent = set()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    @staticmethod
+    def get() -> 'AlertFeedHub':
+        loop = asyncio.get_running_loop()
+        hub = _hubs.get(loop)
+        if hub is None:
+            hub = _hubs[loop] = AlertFeedHub(loop)
+        return hub
+
+    @staticmethod
+    def wake_all() -> None:
+        for hub in list(_hubs.values()):
+            if not hub.loop.is_closed():
+                hub.loop.call_soon_threadsafe(hub._wakeup.set)
+
+    async def subscribe(self) -> asyncio.Queue:
+        if self.last_id is None:
+            self.last_id = await sync_to_async(AlertFeedService.last_event_id)()
+            self.recent = set(await sync_to_async(AlertFeedService.ids_after)(self.last_id - self.LOOKBACK))
+        queue = asyncio.Queue(maxsize=getattr(settings, 'ALERT_FEED_QUEUE_SIZE', 1000))
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._poll())
+        return queue
+
+    def unsubscribe(self, queue) -> None:
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            self._wakeup.set()
+
+    async def _poll(self):
+        interval = getattr(settings, 'ALERT_FEED_POLL_INTERVAL', 2.0)
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self.subscribers:
+                break
+            events = await sync_to_async(AlertFeedService.events_after)(max(self.last_id - self.LOOKBACK, 0))
+            events = [event for event in events if event['id'] not in self.recent]
+            if events:
+                self._publish(events)
+        # The next subscriber starts from the then-latest event
+        self.last_id = None
+
+    def _publish(self, events) -> None:
+        self.recent.update(event['id'] for event in events)
+        self.last_id = max(self.last_id, *(event['id'] for event in events))
+        self.recent = {i for i in self.recent if i > self.last_id - self.LOOKBACK}
+        for queue in list(self.subscribers):
+            for event in events:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Too slow to keep up: drop its backlog and tell it to resync
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+                    break
+
+
+def sse(event: str, data: dict, event_id=None) -> str:
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,199 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.db import DatabaseError, transaction
+from inventory.models import Operation, OperationLine, DocumentStatus, Location, Partner, Product
+from services.dashboard_service import DashboardService
+from services.reservation_service import ReservationService
+from services.stock_export_service import iter_chunks
+
+# OperationLine.quantity_demanded is max_digits=10, decimal_places=2
+MAX_QUANTITY = Decimal('1e8')
+BULK_STATUSES = (DocumentStatus.DRAFT, DocumentStatus.WAITING, DocumentStatus.READY)
+# Locations an operation needs, as checked again by OperationService.validate_operation
+REQUIRED_LOCATIONS = {
+    Operation.Type.RECEIPT: ('destination_location',),
+    Operation.Type.DELIVERY: ('source_location',),
+    Operation.Type.TRANSFER: ('source_location', 'destination_location'),
+    Operation.Type.ADJUSTMENT: ('source_location',),
+}
+
+
+# Primary keys are BigAutoFields
+MAX_PK = 2 ** 63 - 1
+
+
+def _pk(value):
+    """
+    The id in a JSON number or numeric string, or None if it cannot be one.
+    """
+    if isinstance(value, str) and value.isdecimal():
+        try:
+            value = int(value)
+        except ValueError:
+            return None
+    if not isinstance(value, int) or isinstance(value, bool):
+        return None
+    # Out of range ids match nothing, and the database driver would reject them
+    return value if 0 < value <= MAX_PK else None
+
+
+def _ids(values) -> set:
+    return {pk for pk in map(_pk, values) if pk is not None}
+
+
+class BulkOperationService:
+    """
+    Creates many operations with their lines in a few queries per chunk, for integrations
+    that push documents in batches.
+
+    Each chunk is validated against the locations, partners and products it references
+    (three queries), then written in one transaction: a block of reference numbers per type,
+    one insert for the headers and one for the lines. Invalid items are reported and skipped;
+    the rest of the batch is created.
+    """
+
+    CHUNK_SIZE = 200
+    MAX_ITEMS = 5000
+
+    @staticmethod
+    def create(items, user=None, chunk_size: int = None) -> dict:
+        """
+        Items are dicts shaped like the operations API payload: operation_type, status
+        (DRAFT, WAITING or READY), source_location, destination_location, partner, partner_name
+        and lines of {product or sku, quantity_demanded}. Returns one result per item, in order.
+        """
+        result = {'created': 0, 'failed': 0, 'results': []}
+        for chunk in iter_chunks(enumerate(items), chunk_size or BulkOperationService.CHUNK_SIZE):
+            valid, errors = BulkOperationService._validate_chunk(chunk)
+            created = {}
+            if valid:
+                try:
+                    with transaction.atomic():
+                        created = BulkOperationService._write_chunk(valid, user)
+                except DatabaseError as e:
+                    errors.update({index: {'non_field_errors': [f'Could not be saved: {e}']} for index, _, _ in valid})
+            for index, _ in chunk:
+                if index in created:
+                    operation = created[index]
+                    result['results'].append({'index': index, 'id': operation.id,
+                                              'reference_number': operation.reference_number})
+                    result['created'] += 1
+                else:
+                    result['results'].append({'index': index, 'errors': errors[index]})
+                    result['failed'] += 1
+        return result
+
+    @staticmethod
+    def _validate_chunk(chunk):
+        """
+        Returns ([(index, Operation, [OperationLine])], {index: errors}).
+        """
+        items = [item for _, item in chunk if isinstance(item, dict)]
+        lines = [line for item in items if isinstance(item.get('lines'), list) for line in item['lines'] if isinstance(line, dict)]
+        locations = set(Location.objects.filter(
+            id__in=_ids(item.get(field) for item in items for field in ('source_location', 'destination_location'))
+        ).values_list('id', flat=True))
+        partners = set(Partner.objects.filter(id__in=_ids(item.get('partner') for item in items)).values_list('id', flat=True))
+        skus = dict(Product.objects.filter(
+            sku__in={line['sku'] for line in lines if isinstance(line.get('sku'), str)}
+        ).values_list('sku', 'id'))
+        products = set(Product.objects.filter(id__in=_ids(line.get('product') for line in lines)).values_list('id', flat=True))
+
+        valid, errors = [], {}
+        for index, item in chunk:
+            item_errors = {}
+            if not isinstance(item, dict):
+                errors[index] = {'non_field_errors': ['Expected an object.']}
+                continue
+
+            operation_type = item.get('operation_type')
+            if operation_type not in Operation.Type.values:
+                item_errors['operation_type'] = [f'"{operation_type}" is not a valid choice.']
+            status = item.get('status') or DocumentStatus.DRAFT
+            if status not in BULK_STATUSES:
+                item_errors['status'] = [f'Must be one of {", ".join(BULK_STATUSES)}; validate operations separately.']
+
+            fields = {}
+            for field, known in (('source_location', locations), ('destination_location', locations), ('partner', partners)):
+                value = item.get(field)
+                if value in (None, ''):
+                    fields[field] = None
+                elif _pk(value) not in known:
+                    item_errors[field] = [f'Invalid pk "{value}" - object does not exist.']
+                else:
+                    fields[field] = _pk(value)
+            for field in REQUIRED_LOCATIONS.get(operation_type, ()) if 'operation_type' not in item_errors else ():
+                if field not in item_errors and fields[field] is None:
+                    item_errors[field] = ['This field is required for this operation type.']
+
+            partner_name = item.get('partner_name') or ''
+            if not isinstance(partner_name, str) or len(partner_name) > 100:
+                item_errors['partner_name'] = ['Must be a string of at most 100 characters.']
+
+            line_objects = []
+            raw_lines = item.get('lines')
+            if not isinstance(raw_lines, list) or not raw_lines:
+                item_errors['lines'] = ['At least one line is required.']
+                raw_lines = []
+            for number, line in enumerate(raw_lines):
+                line = line if isinstance(line, dict) else {}
+                if line.get('sku') not in (None, ''):
+                    product_id = skus.get(line['sku']) if isinstance(line['sku'], str) else None
+                    if product_id is None:
+                        item_errors[f'lines[{number}].sku'] = [f'Unknown SKU "{line["sku"]}".']
+                else:
+                    product_id = _pk(line.get('product'))
+                    if product_id not in products:
+                        item_errors[f'lines[{number}].product'] = [f'Invalid pk "{line.get("product")}" - object does not exist.']
+                try:
+                    quantity = Decimal(str(line.get('quantity_demanded', '')))
+                except InvalidOperation:
+                    quantity = None
+                if quantity is None or not quantity.is_finite() or quantity <= 0 \
+                        or quantity.as_tuple().exponent < -2 or quantity >= MAX_QUANTITY:
+                    item_errors[f'lines[{number}].quantity_demanded'] = ['Must be a positive number with at most 2 decimals.']
+                line_objects.append(OperationLine(product_id=product_id, quantity_demanded=quantity))
+
+            if item_errors:
+                errors[index] = item_errors
+                continue
+            operation = Operation(operation_type=operation_type, status=status, partner_name=partner_name,
+                                  source_location_id=fields['source_location'],
+                                  destination_location_id=fields['destination_location'],
+                                  partner_id=fields['partner'])
+            valid.append((index, operation, line_objects))
+        return valid, errors
+
+    @staticmethod
+    def _write_chunk(valid, user) -> dict:
+        by_type = defaultdict(list)
+        for _, operation, _ in valid:
+            operation.created_by = user
+            by_type[operation.operation_type].append(operation)
+        # One sequence update per type instead of a second save per operation
+        for operation_type, operations in by_type.items():
+            for operation, reference in zip(operations, Operation.allocate_references(operation_type, len(operations))):
+                operation.reference_number = reference
+
+        operations = Operation.objects.bulk_create([operation for _, operation, _ in valid])
+        if any(operation.pk is None for operation in operations):
+            # Backends that cannot return ids from a bulk insert
+            ids = dict(Operation.objects.filter(
+                reference_number__in=[o.reference_number for o in operations]
+            ).values_list('reference_number', 'id'))
+            for operation in operations:
+                operation.pk = ids[operation.reference_number]
+
+        lines, deltas = [], defaultdict(Decimal)
+        for _, operation, operation_lines in valid:
+            hold = ReservationService.holds_reservation(operation)
+            for line in operation_lines:
+                line.operation = operation
+                if hold:
+                    line.quantity_reserved = line.quantity_demanded
+                    deltas[(line.product_id, operation.source_location_id)] += line.quantity_demanded
+            lines += operation_lines
+        OperationLine.objects.bulk_create(lines)
+        ReservationService.apply_deltas(deltas)
+        DashboardService.invalidate_on_commit()
+        return {index: operation for index, operation, _ in valid}
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from inventory.models import Product, Operation, DocumentStatus, StockMovement, LowStockAlert
+
+PENDING_STATUSES = [DocumentStatus.DRAFT, DocumentStatus.WAITING, DocumentStatus.READY]
+
+# Low stock is 0 < total <= min_stock_level, the rule of the dashboard page, reorder report and
+# product list. /api/dashboard/kpi/ used total < min_stock_level before both shared this.
+STOCK_COUNTS = {
+    'total_products': Count('id'),
+    'out_of_stock_items': Count('id', filter=Q(total_quantity=0)),
+    'low_stock_items': Count('id', filter=Q(total_quantity__gt=0, total_quantity__lte=F('min_stock_level'))),
+}
+
+CACHE_VERSION_KEY = 'dashboard:version'
+CACHE_HITS_KEY = 'dashboard:stats:hits'
+CACHE_MISSES_KEY = 'dashboard:stats:misses'
+
+
+class DashboardService:
+    """
+    Service for computing dashboard KPIs with a constant number of queries.
+
+    Payloads are cached under a version number that is bumped after every committed stock
+    movement or status change, with DASHBOARD_CACHE_TTL as a fallback expiry.
+    """
+
+    @staticmethod
+    def cached(name: str, builder):
+        """
+        Returns the cached payload for name, building and storing it on a miss.
+        """
+        key = f"dashboard:{name}:v{DashboardService._version()}"
+        data = cache.get(key)
+        if data is not None:
+            DashboardService._count(CACHE_HITS_KEY)
+            return data
+
+        DashboardService._count(CACHE_MISSES_KEY)
+        data = builder()
+        cache.set(key, data, getattr(settings, 'DASHBOARD_CACHE_TTL', 30))
+        return data
+
+    @staticmethod
+    async def acached(name: str, builder):
+        """
+        Async cached(): same keys and version, so sync and async views share payloads.
+        `builder` is a coroutine function.
+        """
+        key = f"dashboard:{name}:v{await DashboardService._aversion()}"
+        data = await cache.aget(key)
+        if data is not None:
+            await DashboardService._acount(CACHE_HITS_KEY)
+            return data
+
+        await DashboardService._acount(CACHE_MISSES_KEY)
+        data = await builder()
+        await cache.aset(key, data, getattr(settings, 'DASHBOARD_CACHE_TTL', 30))
+        return data
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Bumps the cache version so every dashboard payload is rebuilt on next read.
+        """
+        try:
+            cache.incr(CACHE_VERSION_KEY)
+        except ValueError:
+            # Key missing or evicted: start from a fresh, never-used version
+            cache.set(CACHE_VERSION_KEY, time.time_ns(), None)
+
+    @staticmethod
+    def invalidate_on_commit() -> None:
+        # Bumping before commit would let a concurrent reader cache pre-commit data
+        transaction.on_commit(DashboardService.invalidate)
+
+    @staticmethod
+    def cache_stats() -> dict:
+        hits = cache.get(CACHE_HITS_KEY, 0)
+        misses = cache.get(CACHE_MISSES_KEY, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+            'version': cache.get(CACHE_VERSION_KEY),
+        }
+
+    @staticmethod
+    def _version() -> int:
+        version = cache.get(CACHE_VERSION_KEY)
+        if version is None:
+            cache.add(CACHE_VERSION_KEY, time.time_ns(), None)
+            version = cache.get(CACHE_VERSION_KEY)
+        return version
+
+    @staticmethod
+    async def _aversion() -> int:
+        version = await cache.aget(CACHE_VERSION_KEY)
+        if version is None:
+            await cache.aadd(CACHE_VERSION_KEY, time.time_ns(), None)
+            version = await cache.aget(CACHE_VERSION_KEY)
+        return version
+
+    @staticmethod
+    def _count(key: str) -> None:
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+    @staticmethod
+    async def _acount(key: str) -> None:
+        await cache.aadd(key, 0, None)
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def get_kpis() -> dict:
+        """
+        Product counts come from one conditional aggregate over the materialized stock totals;
+        pending operation counts come from one grouped query.
+        """
+        stock = Product.objects.with_total_stock().aggregate(**STOCK_COUNTS)
+        pending = dict(DashboardService._pending_counts())
+        return DashboardService._kpi_payload(stock, pending)
+
+    @staticmethod
+    async def aget_kpis() -> dict:
+        """
+        Async get_kpis(). The two queries are independent and awaited together; Django's async
+        ORM still executes them on its shared sync thread, but the event loop keeps serving other
+        requests meanwhile instead of a worker thread blocking per request.
+        """
+        async def pending():
+            return {operation_type: count async for operation_type, count in DashboardService._pending_counts()}
+
+        stock, pending = await asyncio.gather(
+            Product.objects.with_total_stock().aaggregate(**STOCK_COUNTS),
+            pending(),
+        )
+        return DashboardService._kpi_payload(stock, pending)
+
+    @staticmethod
+    def _pending_counts():
+        return (
+            Operation.objects.filter(status__in=PENDING_STATUSES)
+            .values('operation_type')
+            .annotate(count=Count('id'))
+            .order_by()
+            .values_list('operation_type', 'count')
+        )
+
+    @staticmethod
+    def _kpi_payload(stock: dict, pending: dict) -> dict:
+        return {
+            'total_products': stock['total_products'],
+            'low_stock_items': stock['low_stock_items'],
+            'out_of_stock_items': stock['out_of_stock_items'],
+            'pending_receipts': pending.get(Operation.Type.RECEIPT, 0),
+            'pending_deliveries': pending.get(Operation.Type.DELIVERY, 0),
+            'pending_transfers': pending.get(Operation.Type.TRANSFER, 0),
+        }
+
+    @staticmethod
+    def get_low_stock_alerts(limit: int = 5):
+        return LowStockAlert.objects.filter(is_resolved=False).select_related(
+            'product', 'location__warehouse'
+        ).order_by('-created_at')[:limit]
+
+    @staticmethod
+    def get_recent_activity(limit: int = 10) -> list:
+        recent_moves = StockMovement.objects.select_related('product').order_by('-timestamp')[:limit]
+        return [
+            {
+                'type': move.transaction_type.lower(),  # 'receipt', 'delivery'
+                'description': f"{move.product.sku} - {move.quantity} ({move.transaction_type})",
+                'timestamp': move.timestamp
+            }
+            for move in recent_moves
+        ]
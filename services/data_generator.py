@@ -0,0 +1,316 @@
+import random
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+from django.db import transaction
+from django.utils import timezone
+from inventory.models import (
+    Warehouse, Location, Category, Product, ProductStock, ProductStockTotal, WarehouseStockTotal,
+    Operation, OperationLine, StockMovement, LowStockAlert, DocumentStatus, StockReservation
+)
+from services.product_search_service import ProductSearchService
+from services.reservation_service import ReservationService
+
+# Share of validated operations per type
+TYPE_WEIGHTS = {
+    Operation.Type.RECEIPT: 35,
+    Operation.Type.DELIVERY: 45,
+    Operation.Type.TRANSFER: 15,
+    Operation.Type.ADJUSTMENT: 5,
+}
+OPEN_STATUSES = [DocumentStatus.DRAFT, DocumentStatus.WAITING, DocumentStatus.READY, DocumentStatus.CANCELED]
+UOMS = ['pcs', 'kg', 'box', 'm', 'l']
+MIN_LEVELS = [0, 5, 10, 20, 50, 100]
+
+
+class DataGenerator:
+    """
+    Fast-loads a synthetic but internally consistent dataset through bulk_create.
+
+    History is generated in chronological order from validated operations, so ProductStock,
+    the stock totals and active alerts all agree with the ledger. Product popularity follows
+    a Zipf distribution: a few SKUs account for most movements, the long tail rarely moves.
+    Every code, SKU and reference number starts with `prefix`, so several datasets can coexist.
+    """
+
+    def __init__(self, prefix: str = 'GEN', warehouses: int = 3, locations: int = 30, categories: int = 20,
+                 products: int = 1000, movements: int = 100000, open_operations: int = 1000,
+                 lines_per_operation: int = 5, days: int = 365, batch_size: int = 5000, seed: int = 42, log=None):
+        self.prefix = prefix
+        self.warehouse_count = max(1, warehouses)
+        self.location_count = max(self.warehouse_count, locations)
+        self.category_count = max(1, categories)
+        self.product_count = max(1, products)
+        self.movement_count = movements
+        self.open_operation_count = open_operations
+        self.lines_per_operation = max(1, lines_per_operation)
+        self.days = max(1, days)
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+
+        self.balances = defaultdict(int)  # (product_id, location_id) -> quantity
+        self.reserved = defaultdict(Decimal)  # (product_id, location_id) -> held by open operations
+        self.counts = defaultdict(int)
+
+    def run(self) -> dict:
+        if Warehouse.objects.filter(code__startswith=f'{self.prefix}-').exists():
+            raise ValueError(f"Data with prefix '{self.prefix}' already exists. Use another prefix.")
+
+        with transaction.atomic():
+            self._create_catalog()
+            self._create_history()
+            self._create_open_operations()
+            self._create_stock()
+        return dict(self.counts)
+
+    # Catalog
+
+    def _create_catalog(self):
+        rng, prefix = self.rng, self.prefix
+        self.warehouses = Warehouse.objects.bulk_create([
+            Warehouse(name=f'{prefix} Warehouse {i}', code=f'{prefix}-WH-{i:03d}') for i in range(self.warehouse_count)
+        ])
+        self.locations = Location.objects.bulk_create([
+            Location(warehouse=self.warehouses[i % self.warehouse_count], name=f'{prefix} Location {i}',
+                     code=f'{prefix}-LOC-{i:04d}')
+            for i in range(self.location_count)
+        ], batch_size=self.batch_size)
+        self.location_warehouse = {loc.id: loc.warehouse_id for loc in self.locations}
+
+        categories = Category.objects.bulk_create([
+            Category(name=f'{prefix} Category {i}') for i in range(self.category_count)
+        ])
+
+        self.product_ids = []
+        self.min_levels = {}
+        for start in range(0, self.product_count, self.batch_size):
+            batch = Product.objects.bulk_create([
+                Product(name=f'{prefix} Product {i}', sku=f'{prefix}-{i:07d}', category=rng.choice(categories),
+                        uom=rng.choice(UOMS), min_stock_level=rng.choice(MIN_LEVELS))
+                for i in range(start, min(start + self.batch_size, self.product_count))
+            ])
+            for product in batch:
+                self.product_ids.append(product.id)
+                self.min_levels[product.id] = product.min_stock_level
+        ProductSearchService.invalidate_on_commit()
+        # Zipf popularity: weight of the n-th product is 1 / n
+        self.product_cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(self.product_ids))))
+
+        self.counts.update(warehouses=len(self.warehouses), locations=len(self.locations),
+                           categories=len(categories), products=len(self.product_ids))
+        self.log(f"Catalog: {len(self.warehouses)} warehouses, {len(self.locations)} locations, "
+                 f"{len(self.product_ids)} products")
+
+    def _product(self):
+        return self.rng.choices(self.product_ids, cum_weights=self.product_cum_weights)[0]
+
+    def _quantity(self, scale=1.0):
+        return max(1, int(self.rng.lognormvariate(2.5, 0.8) * scale))
+
+    # Validated history
+
+    def _create_history(self):
+        rng = self.rng
+        start = timezone.now() - timedelta(days=self.days)
+        # Average gap between operations so the history spans `days`
+        expected_ops = max(1, self.movement_count // self.lines_per_operation)
+        mean_gap = self.days * 86400 / expected_ops
+        clock = start
+        pending = []
+        pending_moves = 0
+        seq = 0
+
+        while self.counts['movements'] + pending_moves < self.movement_count:
+            clock += timedelta(seconds=rng.expovariate(1 / mean_gap))
+            op_type = rng.choices(list(TYPE_WEIGHTS), weights=list(TYPE_WEIGHTS.values()))[0]
+            built = self._build_done_operation(op_type, seq, clock)
+            if built is None:
+                continue
+            seq += 1
+            pending.append(built)
+            pending_moves += len(built[2])
+            if pending_moves >= self.batch_size:
+                self._write_operations(pending)
+                pending, pending_moves = [], 0
+        if pending:
+            self._write_operations(pending)
+
+    def _build_done_operation(self, op_type, seq, when):
+        """
+        Builds an unsaved DONE operation with its lines and movements, updating balances.
+        Returns None when no line could move stock (e.g. a delivery from an empty location).
+        """
+        rng = self.rng
+        src = dst = None
+        if op_type in (Operation.Type.DELIVERY, Operation.Type.TRANSFER, Operation.Type.ADJUSTMENT):
+            src = rng.choice(self.locations)
+        if op_type == Operation.Type.RECEIPT:
+            dst = rng.choice(self.locations)
+        elif op_type == Operation.Type.TRANSFER:
+            dst = rng.choice([loc for loc in self.locations if loc.id != src.id] or [src])
+
+        lines, moves = [], []
+        seen = set()
+        for _ in range(rng.randint(1, 2 * self.lines_per_operation - 1)):
+            product_id = self._product()
+            if product_id in seen:
+                continue
+            seen.add(product_id)
+
+            if op_type == Operation.Type.RECEIPT:
+                qty = self._quantity(scale=4)
+                demanded = qty
+                moves.append(self._move(product_id, None, dst, qty, op_type, when))
+            elif op_type == Operation.Type.ADJUSTMENT:
+                available = self.balances.get((product_id, src.id), 0)
+                counted = max(0, available + rng.randint(-5, 5))
+                if counted == available:
+                    continue
+                qty = demanded = counted
+                diff = counted - available
+                if diff > 0:
+                    moves.append(self._move(product_id, None, src, diff, op_type, when))
+                else:
+                    moves.append(self._move(product_id, src, None, -diff, op_type, when))
+            else:
+                available = self.balances.get((product_id, src.id), 0)
+                if available <= 0:
+                    continue
+                demanded = self._quantity()
+                qty = min(demanded, available)
+                moves.append(self._move(product_id, src, None, qty, op_type, when))
+                if op_type == Operation.Type.TRANSFER:
+                    moves.append(self._move(product_id, None, dst, qty, op_type, when))
+            lines.append(OperationLine(product_id=product_id, quantity_demanded=Decimal(demanded),
+                                       quantity_done=Decimal(qty)))
+
+        if not moves:
+            return None
+        operation = Operation(
+            operation_type=op_type,
+            status=DocumentStatus.DONE,
+            reference_number=f'{self.prefix}-{op_type[:3]}-{seq:07d}',
+            source_location=src,
+            destination_location=dst,
+            validated_at=when,
+        )
+        return operation, lines, moves
+
+    def _move(self, product_id, from_loc, to_loc, qty, op_type, when):
+        if from_loc is not None:
+            self.balances[(product_id, from_loc.id)] -= qty
+            balance = self.balances[(product_id, from_loc.id)]
+        else:
+            self.balances[(product_id, to_loc.id)] += qty
+            balance = self.balances[(product_id, to_loc.id)]
+        return StockMovement(
+            product_id=product_id,
+            from_location=from_loc,
+            to_location=to_loc,
+            quantity=Decimal(qty),
+            transaction_type=op_type,
+            timestamp=when,
+            balance_after=Decimal(balance),
+        )
+
+    def _write_operations(self, built):
+        operations = Operation.objects.bulk_create([op for op, _, _ in built])
+        # created_at is auto_now_add, so backdate it after the insert
+        for operation in operations:
+            operation.created_at = operation.validated_at - timedelta(hours=self.rng.randint(1, 72))
+        Operation.objects.bulk_update(operations, ['created_at'], batch_size=1000)
+
+        lines, moves = [], []
+        for operation, op_lines, op_moves in built:
+            for line in op_lines:
+                line.operation_id = operation.id
+            for move in op_moves:
+                move.reference_doc_id = operation.id
+            lines += op_lines
+            moves += op_moves
+        OperationLine.objects.bulk_create(lines, batch_size=self.batch_size)
+        StockMovement.objects.bulk_create(moves, batch_size=self.batch_size)
+
+        self.counts['operations'] += len(operations)
+        self.counts['operation_lines'] += len(lines)
+        self.counts['movements'] += len(moves)
+        self.log(f"Movements: {self.counts['movements']}/{self.movement_count}")
+
+    # Open documents
+
+    def _create_open_operations(self):
+        rng = self.rng
+        now = timezone.now()
+        types = list(TYPE_WEIGHTS)
+        for start in range(0, self.open_operation_count, self.batch_size):
+            built = []
+            for seq in range(start, min(start + self.batch_size, self.open_operation_count)):
+                op_type = rng.choice(types)
+                operation = Operation(
+                    operation_type=op_type,
+                    status=rng.choice(OPEN_STATUSES),
+                    reference_number=f'{self.prefix}-{op_type[:3]}-OPEN-{seq:07d}',
+                    source_location=rng.choice(self.locations) if op_type != Operation.Type.RECEIPT else None,
+                    destination_location=rng.choice(self.locations) if op_type in (
+                        Operation.Type.RECEIPT, Operation.Type.TRANSFER) else None,
+                )
+                product_ids = {self._product() for _ in range(rng.randint(1, 2 * self.lines_per_operation - 1))}
+                lines = [OperationLine(product_id=pid, quantity_demanded=Decimal(self._quantity()))
+                         for pid in product_ids]
+                if ReservationService.holds_reservation(operation):
+                    for line in lines:
+                        line.quantity_reserved = line.quantity_demanded
+                        self.reserved[(line.product_id, operation.source_location.id)] += line.quantity_demanded
+                built.append((operation, lines))
+
+            operations = Operation.objects.bulk_create([op for op, _ in built])
+            for operation in operations:
+                operation.created_at = now - timedelta(minutes=rng.randint(0, 14 * 24 * 60))
+            Operation.objects.bulk_update(operations, ['created_at'], batch_size=1000)
+            lines = []
+            for operation, op_lines in built:
+                for line in op_lines:
+                    line.operation_id = operation.id
+                lines += op_lines
+            OperationLine.objects.bulk_create(lines, batch_size=self.batch_size)
+            self.counts['operations'] += len(operations)
+            self.counts['operation_lines'] += len(lines)
+
+    # Current state
+
+    def _create_stock(self):
+        """
+        Writes ProductStock, the stock totals, active low-stock alerts and open reservations.
+        """
+        balances = self.balances
+        ProductStock.objects.bulk_create([
+            ProductStock(product_id=pid, location_id=lid, quantity=Decimal(qty))
+            for (pid, lid), qty in balances.items()
+        ], batch_size=self.batch_size)
+
+        product_totals = defaultdict(int)
+        warehouse_totals = defaultdict(int)
+        for (pid, lid), qty in balances.items():
+            product_totals[pid] += qty
+            warehouse_totals[(pid, self.location_warehouse[lid])] += qty
+        ProductStockTotal.objects.bulk_create([
+            ProductStockTotal(product_id=pid, quantity=Decimal(qty)) for pid, qty in product_totals.items()
+        ], batch_size=self.batch_size)
+        WarehouseStockTotal.objects.bulk_create([
+            WarehouseStockTotal(product_id=pid, warehouse_id=wid, quantity=Decimal(qty))
+            for (pid, wid), qty in warehouse_totals.items()
+        ], batch_size=self.batch_size)
+
+        alerts = LowStockAlert.objects.bulk_create([
+            LowStockAlert(product_id=pid, location_id=lid, current_quantity=Decimal(qty),
+                          threshold=Decimal(self.min_levels[pid]))
+            for (pid, lid), qty in balances.items() if qty <= self.min_levels[pid]
+        ], batch_size=self.batch_size)
+
+        StockReservation.objects.bulk_create([
+            StockReservation(product_id=pid, location_id=lid, quantity=qty) for (pid, lid), qty in self.reserved.items()
+        ], batch_size=self.batch_size)
+
+        self.counts.update(stock_rows=len(balances), active_alerts=len(alerts), reservations=len(self.reserved))
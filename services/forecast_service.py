@@ -0,0 +1,266 @@
+import math
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
+from statistics import NormalDist
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Cast, TruncDay
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from inventory.models import (
+    MovementRollup, StockMovement, Product, ProductStockTotal, StockReservation, Operation,
+    OperationLine, DocumentStatus, ReorderSuggestion,
+)
+from services.movement_rollup_service import MovementRollupService, floor_to, DAY, PRODUCT, MAX_ID
+from services.stock_export_service import iter_chunks
+
+SMA, SES = ReorderSuggestion.Method.MOVING_AVERAGE, ReorderSuggestion.Method.EXPONENTIAL
+OPEN = (DocumentStatus.WAITING, DocumentStatus.READY)
+UPDATE_FIELDS = [
+    'daily_demand', 'demand_std', 'safety_stock', 'reorder_point', 'order_up_to', 'suggested_quantity',
+    'method', 'history_days', 'lead_time_days', 'service_level', 'computed_at', 'applied_at',
+]
+
+
+class ForecastService:
+    """
+    Suggests reorder points for the whole catalogue from DELIVERY history and stores them in
+    ReorderSuggestion for review.
+
+    The history is read once as daily totals (the daily rollups, plus the ledger past their
+    watermark) and laid out as a products x days NumPy matrix, a block of products at a time.
+    Demand, its spread, safety stock and reorder point are array operations over the block,
+    so the cost per product is a few floating point operations rather than a query.
+    """
+
+    PRODUCT_BATCH = 20000  # matrix rows per block: memory is PRODUCT_BATCH x history_days floats
+    WRITE_BATCH = 2000
+
+    @staticmethod
+    def daily_outflows(start, days: int) -> tuple:
+        """
+        DELIVERY quantities per product and day in the `days` days from `start` (a day start),
+        as three aligned arrays: product ids, day offsets and quantities. A product and day may
+        appear twice, once from the rollups and once from the ledger tail.
+        """
+        def read(mark):
+            chunks = []
+            if mark:
+                rows = MovementRollup.objects.filter(
+                    period=DAY, grain=PRODUCT, transaction_type=Operation.Type.DELIVERY,
+                    bucket__range=(start, start + timedelta(days=days - 1)),
+                ).annotate(units=Cast('quantity', FloatField())).values_list('product_id', 'bucket', 'units')
+                rows = ForecastService._fetch(rows, dtype=object).reshape(-1, 3)
+                # Only the distinct buckets, at most `days` of them, are converted in Python
+                buckets, day = np.unique(rows[:, 1], return_inverse=True)
+                offsets = np.array([ForecastService._day_offset(bucket, start) for bucket in buckets], dtype=np.int64)
+                chunks.append((rows[:, 0], offsets[day], rows[:, 2]))
+
+            tail = StockMovement.objects.filter(
+                transaction_type=Operation.Type.DELIVERY, timestamp__gte=start, timestamp__lt=start + timedelta(days=days),
+            )
+            if mark:
+                tail = tail.filter(id__gt=mark, id__lte=MAX_ID)
+            rows = tail.annotate(day=TruncDay('timestamp')).values('product_id', 'day').annotate(
+                units=Cast(Sum('quantity'), FloatField())
+            ).values_list('product_id', 'day', 'units').order_by()
+            rows = np.array([(product_id, (timezone.localtime(day).date() - start.date()).days, units)
+                             for product_id, day, units in rows], dtype=float).reshape(-1, 3)
+            chunks.append((rows[:, 0], rows[:, 1], rows[:, 2]))
+
+            return tuple(np.concatenate([chunk[i] for chunk in chunks]).astype(dtype)
+                         for i, dtype in enumerate((np.int64, np.int64, float)))
+
+        return MovementRollupService.consistent_read(read)
+
+    @staticmethod
+    def _fetch(queryset, dtype=float) -> np.ndarray:
+        # Straight from the cursor: per-row result converters cost more than the query
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return np.array(cursor.fetchall(), dtype=dtype)
+
+    @staticmethod
+    def _day_offset(bucket, start) -> int:
+        # Raw datetimes: text on SQLite, naive UTC on backends without time zone support
+        if isinstance(bucket, str):
+            bucket = parse_datetime(bucket)
+        if timezone.is_naive(bucket):
+            bucket = timezone.make_aware(bucket, dt_timezone.utc)
+        return (timezone.localtime(bucket).date() - start.date()).days
+
+    @staticmethod
+    def demand(history: np.ndarray, method=SMA, alpha: float = None) -> tuple:
+        """
+        (daily demand, standard deviation) for each row of a products x days matrix, oldest
+        day first. SMA: the mean and sample deviation of the days. SES: the exponentially
+        smoothed level, started from the mean, and the deviation of its one-day-ahead errors.
+        """
+        if method == SMA:
+            return history.mean(axis=1), history.std(axis=1, ddof=1)
+        alpha = alpha if alpha is not None else getattr(settings, 'FORECAST_SMOOTHING', 0.3)
+        level = history.mean(axis=1)
+        squared = np.zeros(len(history))
+        for day in range(history.shape[1]):
+            error = history[:, day] - level
+            squared += error * error
+            level += alpha * error
+        return level, np.sqrt(squared / history.shape[1])
+
+    @staticmethod
+    def reorder_levels(daily, spread, lead_time_days: int, review_days: int, service_level: float) -> tuple:
+        """
+        (safety stock, reorder point, order-up-to level) arrays. Safety stock covers demand
+        above the forecast during the lead time at the service level, assuming normal daily
+        demand: z * sigma * sqrt(lead time).
+        """
+        z = NormalDist().inv_cdf(service_level)
+        safety = z * spread * math.sqrt(lead_time_days)
+        reorder_point = daily * lead_time_days + safety
+        return safety, reorder_point, reorder_point + daily * review_days
+
+    @staticmethod
+    def positions(product_ids: np.ndarray) -> np.ndarray:
+        """
+        Stock position of each product in a sorted block of ids: on hand - reserved + still
+        expected on open receipts.
+        """
+        block = {'product__id__range': (int(product_ids[0]), int(product_ids[-1]))}
+        sources = [
+            (ProductStockTotal.objects.filter(**block).values_list('product_id', 'quantity'), 1),
+            (StockReservation.objects.filter(**block).values('product_id').annotate(
+                units=Sum('quantity')).values_list('product_id', 'units').order_by(), -1),
+            (OperationLine.objects.filter(
+                operation__operation_type=Operation.Type.RECEIPT, operation__status__in=OPEN, **block
+            ).values('product_id').annotate(
+                units=Sum(F('quantity_demanded') - F('quantity_done'))
+            ).values_list('product_id', 'units').order_by(), 1),
+        ]
+        position = np.zeros(len(product_ids))
+        for rows, sign in sources:
+            rows = np.array(list(rows), dtype=float).reshape(-1, 2)
+            np.add.at(position, np.searchsorted(product_ids, rows[:, 0]), sign * rows[:, 1])
+        return position
+
+    @staticmethod
+    def run(method=SMA, history_days: int = None, lead_time_days: int = None, review_days: int = None,
+            service_level: float = None, alpha: float = None, as_of=None, progress=None) -> dict:
+        """
+        Recomputes the suggestion of every product from the `history_days` full days before
+        `as_of` (default now). Missing arguments come from the FORECAST_* settings.
+        `progress(done, total)` is called after each block of products.
+        Returns {'products', 'to_reorder', 'history_days'}.
+        """
+        history_days = history_days or getattr(settings, 'FORECAST_HISTORY_DAYS', 90)
+        lead_time_days = lead_time_days if lead_time_days is not None else getattr(settings, 'FORECAST_LEAD_TIME_DAYS', 7)
+        review_days = review_days if review_days is not None else getattr(settings, 'FORECAST_REVIEW_DAYS', 7)
+        service_level = service_level or getattr(settings, 'FORECAST_SERVICE_LEVEL', 0.95)
+        if method not in ReorderSuggestion.Method.values:
+            raise ValueError(f"Unknown forecast method {method}")
+        if history_days < 2:
+            raise ValueError("At least 2 days of history are needed")
+        if lead_time_days < 0 or review_days < 0:
+            raise ValueError("Lead time and review period cannot be negative")
+        if not 0.5 <= service_level < 1:
+            raise ValueError(f"Service level must be at least 0.5 and below 1. Got {service_level}")
+        if alpha is not None and not 0 < alpha <= 1:
+            raise ValueError(f"Smoothing factor must be in (0, 1]. Got {alpha}")
+
+        end = floor_to(as_of or timezone.now(), DAY)
+        start = end - timedelta(days=history_days)
+        product_ids = np.array(Product.objects.order_by('id').values_list('id', flat=True), dtype=np.int64)
+        counted = np.isin(product_ids, np.array(Product.objects.filter(
+            uom__in=getattr(settings, 'FORECAST_COUNT_UOMS', ['pcs'])
+        ).values_list('id', flat=True), dtype=np.int64))
+        owners, offsets, units = ForecastService.daily_outflows(start, history_days)
+        rows = np.searchsorted(product_ids, owners)
+        # Rows of products deleted since are dropped
+        known = rows < len(product_ids)
+        known[known] = product_ids[rows[known]] == owners[known]
+        order = np.argsort(rows[known], kind='stable')
+        rows, offsets, units = rows[known][order], offsets[known][order], units[known][order]
+
+        settings_used = {
+            'method': method, 'history_days': history_days, 'lead_time_days': lead_time_days,
+            'service_level': Decimal(f'{service_level:.3f}'), 'computed_at': timezone.now(), 'applied_at': None,
+        }
+        to_reorder = 0
+        for first in range(0, len(product_ids), ForecastService.PRODUCT_BATCH):
+            last = min(first + ForecastService.PRODUCT_BATCH, len(product_ids))
+            low, high = np.searchsorted(rows, [first, last])
+            history = np.bincount(
+                (rows[low:high] - first) * history_days + offsets[low:high], weights=units[low:high],
+                minlength=(last - first) * history_days,
+            ).reshape(last - first, history_days)
+
+            daily, spread = ForecastService.demand(history, method, alpha)
+            safety, reorder_point, order_up_to = ForecastService.reorder_levels(
+                daily, spread, lead_time_days, review_days, service_level
+            )
+            position = ForecastService.positions(product_ids[first:last])
+            reorder_point, order_up_to = np.round(reorder_point, 2), np.round(order_up_to, 2)
+            shortfall = np.round(np.maximum(order_up_to - position, 0), 2)
+            # Count units are ordered whole; the rest to the two decimals stock is kept in
+            shortfall = np.where(counted[first:last], np.ceil(shortfall), shortfall)
+            suggested = np.where(position <= reorder_point, shortfall, 0)
+            to_reorder += int(np.count_nonzero(suggested))
+
+            ForecastService._save(product_ids[first:last], settings_used, daily, spread, safety,
+                                  reorder_point, order_up_to, suggested)
+            if progress:
+                progress(last, len(product_ids))
+        return {'products': len(product_ids), 'to_reorder': to_reorder, 'history_days': history_days}
+
+    @staticmethod
+    def _save(product_ids, fields, *columns) -> None:
+        """
+        Upserts the suggestions of a block. On SQLite and PostgreSQL this is one INSERT ..
+        ON CONFLICT run through executemany: bulk_create spends most of a run preparing
+        values one by one, several times longer than the forecast itself.
+        """
+        digits = (4, 4, 2, 2, 2, 2)
+        columns = [[f'{value:.{places}f}' for value in column.tolist()] for column, places in zip(columns, digits)]
+        rows = list(zip(product_ids.tolist(), *columns))
+        names = ['product_id', *UPDATE_FIELDS]
+
+        with transaction.atomic():
+            if connection.vendor not in ('postgresql', 'sqlite'):
+                ReorderSuggestion.objects.bulk_create(
+                    [ReorderSuggestion(**dict(zip(names, row)), **fields) for row in rows],
+                    batch_size=ForecastService.WRITE_BATCH,
+                    update_conflicts=True, unique_fields=['product'], update_fields=UPDATE_FIELDS,
+                )
+                return
+            shared = (fields['method'], fields['history_days'], fields['lead_time_days'], str(fields['service_level']),
+                      connection.ops.adapt_datetimefield_value(fields['computed_at']), None)
+            quote = connection.ops.quote_name
+            sql = (
+                f'INSERT INTO {quote(ReorderSuggestion._meta.db_table)} ({", ".join(map(quote, names))}) '
+                f'VALUES ({", ".join(["%s"] * len(names))}) ON CONFLICT ({quote("product_id")}) DO UPDATE SET '
+                + ', '.join(f'{quote(name)} = excluded.{quote(name)}' for name in names[1:])
+            )
+            with connection.cursor() as cursor:
+                for chunk in iter_chunks(rows, ForecastService.WRITE_BATCH):
+                    cursor.executemany(sql, [row + shared for row in chunk])
+
+    @staticmethod
+    def apply(suggestions) -> int:
+        """
+        Sets min_stock_level of each suggestion's product to its reorder point, rounded up.
+        Returns the number of products changed.
+        """
+        suggestions = list(suggestions.select_related('product'))
+        now = timezone.now()
+        products = []
+        for suggestion in suggestions:
+            suggestion.product.min_stock_level = math.ceil(suggestion.reorder_point)
+            suggestion.applied_at = now
+            products.append(suggestion.product)
+        with transaction.atomic():
+            Product.objects.bulk_update(products, ['min_stock_level'], batch_size=ForecastService.WRITE_BATCH)
+            ReorderSuggestion.objects.bulk_update(suggestions, ['applied_at'], batch_size=ForecastService.WRITE_BATCH)
+        return len(products)
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from inventory.models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05  # seconds between checks while waiting on the first attempt
+
+
+def idempotent(view):
+    """
+    Makes a DRF view method safe to retry with an Idempotency-Key header. The first request
+    with a key runs and its response is stored; repeats get that response back, marked with
+    Idempotent-Replayed, without running the view. Requests without the header run as usual.
+    """
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'error': f'{HEADER} is longer than {MAX_KEY_LENGTH} characters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        scope = IdempotencyService.scope(request, key)
+        fingerprint = IdempotencyService.fingerprint(request)
+        replay = IdempotencyService.begin(scope, fingerprint)
+        if replay is not None:
+            return replay
+        try:
+            response = view(self, request, *args, **kwargs)
+        except BaseException:
+            IdempotencyService.abandon(scope)
+            raise
+        IdempotencyService.finish(scope, fingerprint, response)
+        return response
+    return wrapper
+
+
+class IdempotencyService:
+    """
+    Stores responses of requests made with an Idempotency-Key in IdempotencyRecord, with a
+    copy in the cache so that most replays never reach the database.
+
+    The unique scope column is the lock: the first attempt inserts the row before running,
+    and a concurrent duplicate fails that insert and polls the row until the response is
+    there. The duplicate never reaches StockService, so it cannot contend for the stock rows
+    the first attempt holds. Server errors (5xx) are not stored, so those can be retried.
+    """
+
+    @staticmethod
+    def scope(request, key: str) -> str:
+        user_id = request.user.pk if request.user.is_authenticated else ''
+        raw = '\n'.join([str(user_id), request.method, request.path, key])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def fingerprint(request) -> str:
+        try:
+            body = request.body
+        except RawPostDataException:
+            # Form uploads already parsed by the CSRF check
+            body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True).encode()
+        return hashlib.sha256(body).hexdigest()
+
+    @staticmethod
+    def _cache_key(scope: str) -> str:
+        return f'idempotency:{scope}'
+
+    @staticmethod
+    def begin(scope: str, fingerprint: str):
+        """
+        Claims the scope for this request and returns None, or returns the Response to send
+        instead: the stored one, 422 for a reused key, or 409 if the first attempt is too slow.
+        """
+        cached = cache.get(IdempotencyService._cache_key(scope))
+        if cached is not None:
+            return IdempotencyService._replay(fingerprint, *cached)
+
+        deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT', 30)
+        ttl = getattr(settings, 'IDEMPOTENCY_TTL', 24 * 3600)
+        lock_timeout = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 300)
+        while True:
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    IdempotencyRecord.objects.create(scope=scope, fingerprint=fingerprint,
+                                                     expires_at=now + timedelta(seconds=ttl))
+                return None
+            except IntegrityError:
+                pass
+
+            record = IdempotencyRecord.objects.filter(scope=scope).first()
+            if record is None:
+                # The first attempt was abandoned after our insert failed; claim the key again
+                continue
+            stale = record.expires_at <= now or (
+                record.response_status is None and record.created_at <= now - timedelta(seconds=lock_timeout)
+            )
+            if stale:
+                IdempotencyRecord.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+                continue
+            if record.response_status is not None:
+                stored = (record.fingerprint, record.response_status, record.response_body)
+                IdempotencyService._cache(scope, stored, record.expires_at)
+                return IdempotencyService._replay(fingerprint, *stored)
+            if record.fingerprint != fingerprint:
+                return IdempotencyService._replay(fingerprint, record.fingerprint, None, None)
+            if time.monotonic() >= deadline:
+                response = Response({'error': 'A request with this Idempotency-Key is still being processed'},
+                                    status=status.HTTP_409_CONFLICT)
+                response['Retry-After'] = '1'
+                return response
+            time.sleep(POLL_INTERVAL)
+
+    @staticmethod
+    def finish(scope: str, fingerprint: str, response) -> None:
+        if response.status_code >= 500:
+            IdempotencyService.abandon(scope)
+            return
+        body = json.dumps(getattr(response, 'data', None), cls=JSONEncoder)
+        IdempotencyRecord.objects.filter(scope=scope).update(response_status=response.status_code, response_body=body)
+        cache.set(IdempotencyService._cache_key(scope), (fingerprint, response.status_code, body),
+                  getattr(settings, 'IDEMPOTENCY_TTL', 24 * 3600))
+
+    @staticmethod
+    def abandon(scope: str) -> None:
+        IdempotencyRecord.objects.filter(scope=scope, response_status__isnull=True).delete()
+
+    @staticmethod
+    def prune() -> int:
+        """
+        Deletes expired records. Returns the number deleted.
+        """
+        deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    @staticmethod
+    def _cache(scope, stored, expires_at) -> None:
+        timeout = (expires_at - timezone.now()).total_seconds()
+        if timeout > 0:
+            cache.set(IdempotencyService._cache_key(scope), stored, timeout)
+
+    @staticmethod
+    def _replay(fingerprint, stored_fingerprint, response_status, body):
+        if fingerprint != stored_fingerprint:
+            return Response({'error': 'This Idempotency-Key was already used with a different request'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        response = Response(json.loads(body), status=response_status)
+        response['Idempotent-Replayed'] = 'true'
+        return response
@@ -0,0 +1,211 @@
+import time
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+from django.db import connections, transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q, Sum
+from django.utils import timezone
+from inventory.models import Product, ProductStock, StockMovement, Operation, OperationLine, DocumentStatus
+from services.stock_service import StockService
+from services.worker_pool import process_pool
+
+ZERO = Decimal('0')
+# Notes on movements booked by LedgerVerificationService.correct()
+CORRECTION_NOTE = 'Ledger correction'
+
+
+def _check_range_in_worker(bounds):
+    try:
+        return LedgerVerificationService.check_range(*bounds)
+    finally:
+        connections.close_all()
+
+
+class LedgerVerificationService:
+    """
+    Checks that the StockMovement ledger explains ProductStock.
+
+    For every product the ledger is replayed in write (id) order per location:
+      - stock_mismatch: the ledger sum differs from ProductStock.quantity
+      - chain_break: a movement's balance_after differs from the balance implied by the
+        previous movement at that location (points at where unlogged changes entered)
+      - negative_balance: the replayed balance went below zero
+    Products are split into id ranges that can be checked in parallel worker processes.
+    """
+
+    RANGE_SIZE = 5000
+    CHUNK_SIZE = 5000
+
+    @staticmethod
+    def product_ranges(range_size: int = None):
+        """
+        Splits product ids into inclusive (low, high) ranges of at most `range_size` products.
+        """
+        range_size = range_size or LedgerVerificationService.RANGE_SIZE
+        ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        return [(ids[i], ids[min(i + range_size, len(ids)) - 1]) for i in range(0, len(ids), range_size)]
+
+    @staticmethod
+    def check_range(low: int, high: int) -> dict:
+        """
+        Verifies products with low <= id <= high. Returns
+        {'movements': n, 'discrepancies': [...]}.
+        """
+        stock = {
+            (p, l): q for p, l, q in ProductStock.objects.filter(product_id__gte=low, product_id__lte=high)
+            .values_list('product_id', 'location_id', 'quantity')
+        }
+        movements = StockMovement.objects.filter(product_id__gte=low, product_id__lte=high).annotate(
+            is_correction=ExpressionWrapper(Q(notes=CORRECTION_NOTE), output_field=BooleanField())
+        ).order_by('product_id', 'id').values_list(
+            'id', 'product_id', 'from_location_id', 'to_location_id', 'quantity', 'balance_after', 'is_correction'
+        ).iterator(chunk_size=LedgerVerificationService.CHUNK_SIZE)
+
+        discrepancies, scanned = [], 0
+        for product_id, rows in groupby(movements, key=itemgetter(1)):
+            ledger, chain, went_negative = {}, {}, set()
+            for movement_id, _, from_id, to_id, quantity, balance_after, is_correction in rows:
+                scanned += 1
+                for location_id, sign in ((from_id, -1), (to_id, 1)):
+                    if location_id is None:
+                        continue
+                    balance = ledger[location_id] = ledger.get(location_id, ZERO) + sign * quantity
+                    if balance < 0 and location_id not in went_negative:
+                        went_negative.add(location_id)
+                        discrepancies.append({
+                            'kind': 'negative_balance', 'product_id': product_id, 'location_id': location_id,
+                            'movement_id': movement_id, 'balance': balance,
+                        })
+                    if is_correction:
+                        # Books drift the chain has already absorbed at the break it was found at
+                        chain[location_id] = balance_after
+                        continue
+                    expected = chain.get(location_id, ZERO) + sign * quantity
+                    chain[location_id] = expected
+                    # balance_after is ambiguous on legacy two-sided rows; only check one-sided ones
+                    if balance_after is None or (from_id and to_id):
+                        continue
+                    if balance_after != expected:
+                        discrepancies.append({
+                            'kind': 'chain_break', 'product_id': product_id, 'location_id': location_id,
+                            'movement_id': movement_id, 'expected': expected, 'recorded': balance_after,
+                            'difference': balance_after - expected,
+                        })
+                        # Resync so one unlogged change is reported once, not on every later movement
+                        chain[location_id] = balance_after
+
+            for location_id, balance in ledger.items():
+                actual = stock.pop((product_id, location_id), ZERO)
+                if actual != balance:
+                    discrepancies.append(LedgerVerificationService._mismatch(product_id, location_id, balance, actual))
+
+        # Stock without any ledger entries
+        for (product_id, location_id), actual in sorted(stock.items()):
+            if actual:
+                discrepancies.append(LedgerVerificationService._mismatch(product_id, location_id, ZERO, actual))
+
+        return {'movements': scanned, 'discrepancies': discrepancies}
+
+    @staticmethod
+    def _mismatch(product_id, location_id, ledger, actual):
+        return {
+            'kind': 'stock_mismatch', 'product_id': product_id, 'location_id': location_id,
+            'ledger': ledger, 'stock': actual, 'difference': actual - ledger,
+        }
+
+    @staticmethod
+    def verify(workers: int = 1, range_size: int = None, progress=None) -> dict:
+        """
+        Checks every product and returns a JSON-serializable report. With workers > 1 the
+        ranges are spread over a process pool, each worker using its own connection.
+        `progress(done, total)` is called as ranges complete.
+        """
+        started = time.monotonic()
+        ranges = LedgerVerificationService.product_ranges(range_size)
+        report = {
+            'generated_at': timezone.now(),
+            'products': Product.objects.count(),
+            'ranges': len(ranges),
+            'workers': workers,
+            'movements': 0,
+            'summary': {'stock_mismatch': 0, 'chain_break': 0, 'negative_balance': 0},
+            'discrepancies': [],
+        }
+
+        if workers > 1 and len(ranges) > 1:
+            pool = process_pool(workers)
+            results = pool.map(_check_range_in_worker, ranges)
+        else:
+            pool = None
+            results = (LedgerVerificationService.check_range(*bounds) for bounds in ranges)
+
+        try:
+            for done, result in enumerate(results, start=1):
+                report['movements'] += result['movements']
+                report['discrepancies'].extend(result['discrepancies'])
+                if progress:
+                    progress(done, len(ranges))
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+        for row in report['discrepancies']:
+            report['summary'][row['kind']] += 1
+        report['duration_s'] = round(time.monotonic() - started, 3)
+        return report
+
+    @staticmethod
+    @transaction.atomic
+    def correct(mismatches, user=None):
+        """
+        Books the unexplained difference of each stock_mismatch as an ADJUSTMENT movement, so the
+        ledger agrees with ProductStock again. On-hand quantities are left untouched.
+        Differences are recomputed under lock, so pairs that were fixed since the scan are skipped.
+        Returns the Operation, or None when nothing needed correcting.
+        """
+        pairs = {(row['product_id'], row['location_id']) for row in mismatches if row['kind'] == 'stock_mismatch'}
+        if not pairs:
+            return None
+        locked = StockService.lock_stocks(pairs)
+        ledger = LedgerVerificationService._ledger_balances(pairs)
+
+        operation = Operation.objects.create(
+            operation_type=Operation.Type.ADJUSTMENT,
+            status=DocumentStatus.DONE,
+            created_by=user,
+            validated_at=timezone.now(),
+        )
+        movements, lines = [], []
+        for key in sorted(pairs):
+            stock = locked[key]
+            difference = stock.quantity - ledger.get(key, ZERO)
+            if not difference:
+                continue
+            side = 'to_location_id' if difference > 0 else 'from_location_id'
+            movements.append(StockMovement(
+                product_id=key[0], quantity=abs(difference), transaction_type=Operation.Type.ADJUSTMENT,
+                reference_doc=operation, user=user, balance_after=stock.quantity, notes=CORRECTION_NOTE, **{side: key[1]},
+            ))
+            lines.append(OperationLine(operation=operation, product_id=key[0],
+                                       quantity_demanded=abs(difference), quantity_done=abs(difference)))
+
+        if not movements:
+            operation.delete()
+            return None
+        StockMovement.objects.bulk_create(movements)
+        OperationLine.objects.bulk_create(lines)
+        return operation
+
+    @staticmethod
+    def _ledger_balances(pairs) -> dict:
+        product_ids = {p for p, _ in pairs}
+        balances = {}
+        for side, sign in (('to_location', 1), ('from_location', -1)):
+            rows = StockMovement.objects.filter(
+                Q(product_id__in=product_ids) & Q(**{f'{side}__isnull': False})
+            ).values('product_id', f'{side}_id').annotate(total=Sum('quantity')).order_by()
+            for row in rows:
+                key = (row['product_id'], row[f'{side}_id'])
+                if key in pairs:
+                    balances[key] = balances.get(key, ZERO) + sign * row['total']
+        return balances
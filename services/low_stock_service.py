@@ -0,0 +1,150 @@
+import weakref
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from inventory.models import Product, Location, ProductStock, LowStockAlert, AlertEvent
+from services.alert_feed_service import AlertFeedService
+from services.notification_service import NotificationService
+from services.stock_export_service import iter_chunks
+
+
+class _PendingEvaluation:
+    """
+    The pairs queued by one touch(), with its own on-commit callback. Rolling back a savepoint
+    discards the callbacks registered in it, and with them the last reference to their pairs,
+    so `queued` (weak) holds exactly the pairs of the current transaction still to be evaluated.
+    """
+    def __init__(self, check, resolve, queued):
+        self.check = set(check)
+        self.resolve = set(resolve)
+        self.queued = queued
+
+    def run(self):
+        # The first callback to run after commit evaluates the whole transaction in one batch;
+        # the others find themselves already taken
+        if self not in self.queued:
+            return
+        batch = list(self.queued)
+        self.queued.clear()
+        LowStockService.evaluate(set().union(*(p.check for p in batch)), set().union(*(p.resolve for p in batch)))
+
+
+class LowStockService:
+    """
+    Low-stock threshold evaluation, run after commit instead of under the stock row locks.
+
+    Stock writers only record which (product_id, location_id) pairs they touched. After the
+    transaction commits, every pair touched in it is evaluated in one batch: one read of the
+    committed quantities, one read of the active alerts, then bulk create/resolve. The partial
+    unique constraint on active alerts absorbs concurrent evaluators creating the same alert.
+
+    Decreases can raise an alert and increases can resolve one, as before: a pair that was
+    only increased never raises an alert.
+    """
+
+    CHUNK_SIZE = 1000
+
+    @staticmethod
+    def touch(check=(), resolve=()) -> None:
+        """
+        Queues pairs for evaluation after the current transaction commits.
+        `check` pairs may raise an alert, `resolve` pairs may resolve one.
+        """
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            LowStockService.evaluate(check, resolve)
+            return
+
+        queued = getattr(connection, 'low_stock_queued', None)
+        if queued is None:
+            queued = connection.low_stock_queued = weakref.WeakSet()
+        pending = _PendingEvaluation(check, resolve, queued)
+        queued.add(pending)
+        # A bound method rather than the object itself: robust on_commit logs failures by __qualname__
+        transaction.on_commit(pending.run, robust=True)
+
+    @staticmethod
+    @transaction.atomic
+    def evaluate(check=(), resolve=()) -> dict:
+        """
+        Creates alerts for `check` pairs at or below the product's minimum level and resolves
+        active alerts for `resolve` pairs above it. Returns {'created': n, 'resolved': n}.
+        """
+        check, resolve = set(check), set(resolve)
+        pairs = check | resolve
+        if not pairs:
+            return {'created': 0, 'resolved': 0}
+
+        product_ids = {p for p, _ in pairs}
+        location_ids = {l for _, l in pairs}
+        stocks = {
+            (p, l): (quantity, threshold) for p, l, quantity, threshold in ProductStock.objects.filter(
+                product_id__in=product_ids, location_id__in=location_ids
+            ).values_list('product_id', 'location_id', 'quantity', 'product__min_stock_level')
+            if (p, l) in pairs
+        }
+        active = {
+            (a.product_id, a.location_id): a for a in LowStockAlert.objects.filter(
+                product_id__in=product_ids, location_id__in=location_ids, is_resolved=False
+            )
+        }
+
+        now = timezone.now()
+        to_create, to_resolve = [], []
+        for key in sorted(pairs):
+            if key not in stocks:
+                continue
+            quantity, threshold = stocks[key]
+            alert = active.get(key)
+            if key in check and alert is None and quantity <= threshold:
+                to_create.append(LowStockAlert(product_id=key[0], location_id=key[1],
+                                               current_quantity=quantity, threshold=threshold))
+            elif key in resolve and alert is not None and quantity > threshold:
+                alert.is_resolved, alert.resolved_at, alert.current_quantity = True, now, quantity
+                to_resolve.append(alert)
+
+        if to_create:
+            LowStockAlert.objects.bulk_create(to_create, ignore_conflicts=True)
+            # ignore_conflicts returns no ids: read back the active alerts of the inserted keys
+            # and keep those carrying the creation time of our row, not a concurrent evaluator's
+            inserted = {(a.product_id, a.location_id): a.created_at for a in to_create}
+            by_location = {}
+            for product_id, location_id in inserted:
+                by_location.setdefault(location_id, []).append(product_id)
+            condition = Q()
+            for location_id, product_ids in by_location.items():
+                condition |= Q(location_id=location_id, product_id__in=product_ids)
+            created = [
+                alert for alert in LowStockAlert.objects.filter(condition, is_resolved=False)
+                if inserted.get((alert.product_id, alert.location_id)) == alert.created_at
+            ]
+            AlertFeedService.record(AlertEvent.Kind.CREATED, created, 1)
+            products = Product.objects.in_bulk({a.product_id for a in to_create})
+            locations = Location.objects.select_related('warehouse').in_bulk({a.location_id for a in to_create})
+            # An alert lost to a concurrent evaluator is still notified here; the outbox
+            # collapses pending notifications with the same key, so it is sent once
+            for alert in to_create:
+                NotificationService.notify_low_stock(
+                    products[alert.product_id], locations[alert.location_id], alert.current_quantity
+                )
+        if to_resolve:
+            LowStockAlert.objects.bulk_create(to_resolve, update_conflicts=True, unique_fields=['id'],
+                                              update_fields=['is_resolved', 'resolved_at', 'current_quantity'])
+            AlertFeedService.record(AlertEvent.Kind.RESOLVED, to_resolve, lambda alert: 0 if alert.is_read else -1)
+        return {'created': len(to_create), 'resolved': len(to_resolve)}
+
+    @staticmethod
+    def evaluate_all() -> dict:
+        """
+        Full sweep over every stock row, in chunks, checking both directions. Catches up on
+        evaluations lost to a failed after-commit callback or a crash between commit and
+        evaluation; unlike touch() it also raises alerts for low rows that were never decreased.
+        """
+        totals = {'created': 0, 'resolved': 0}
+        pairs = ProductStock.objects.order_by('id').values_list('product_id', 'location_id').iterator(
+            chunk_size=LowStockService.CHUNK_SIZE
+        )
+        for chunk in iter_chunks(pairs, LowStockService.CHUNK_SIZE):
+            for key, value in LowStockService.evaluate(chunk, chunk).items():
+                totals[key] += value
+        return totals
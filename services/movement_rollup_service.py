@@ -0,0 +1,328 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from inventory.models import MovementRollup, RollupWatermark, StockMovement, Product
+from services.snapshot_service import SnapshotService
+from services.stock_export_service import iter_chunks
+
+WATERMARK = 'movement_rollup'
+HOUR, DAY = MovementRollup.Period.HOUR, MovementRollup.Period.DAY
+PRODUCT, LOCATION = MovementRollup.Grain.PRODUCT, MovementRollup.Grain.LOCATION
+TRUNC = {HOUR: TruncHour, DAY: TruncDay}
+KEY_FIELDS = ('bucket', 'product_id', 'transaction_type', 'grain', 'from_location_id', 'to_location_id')
+MAX_ID = 2 ** 63 - 1
+INFLOW, OUTFLOW = Q(to_location__isnull=False), Q(from_location__isnull=False)
+
+
+def floor_to(moment, period):
+    """
+    Start of the hour or day (in TIME_ZONE) containing `moment`.
+    """
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if period == DAY else moment
+
+
+class MovementRollupService:
+    """
+    Maintains MovementRollup, hourly and daily totals of the stock ledger, and answers chart
+    and report queries from it.
+
+    build() aggregates only the movements after the watermark, one id range per transaction,
+    and moves the watermark in the same transaction. Reads combine the rollups with the
+    movements past the watermark, read straight from the ledger, so results are exact even
+    when the builder is behind; the builder only keeps that tail short.
+    """
+
+    CHUNK_SIZE = 20000  # movement ids per builder transaction
+    MERGE_BATCH = 1000  # groups per lookup of existing rollup rows
+    CANDIDATE_BATCH = 500
+
+    @staticmethod
+    def watermark() -> int:
+        return RollupWatermark.objects.filter(name=WATERMARK).values_list('last_movement_id', flat=True).first() or 0
+
+    @staticmethod
+    def _lock_watermark() -> RollupWatermark:
+        RollupWatermark.objects.bulk_create([RollupWatermark(name=WATERMARK)], ignore_conflicts=True)
+        return RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+
+    @staticmethod
+    def build(chunk_size: int = None, progress=None) -> dict:
+        """
+        Aggregates the movements logged since the last run. On an empty table this is the
+        backfill. `progress(done_id, last_id)` is called after each committed chunk.
+        Returns {'movements': aggregated, 'watermark': last movement id included}.
+        """
+        chunk_size = chunk_size or MovementRollupService.CHUNK_SIZE
+        with transaction.atomic():
+            # Every movement up to this id is committed; later ids may belong to open transactions
+            SnapshotService.hold_stock_writers()
+            high = StockMovement.objects.aggregate(last=Max('id'))['last'] or 0
+
+        processed = 0
+        while True:
+            with transaction.atomic():
+                mark = MovementRollupService._lock_watermark()
+                low = mark.last_movement_id
+                if low >= high:
+                    break
+                upper = min(low + chunk_size, high)
+                processed += MovementRollupService._aggregate(StockMovement.objects.filter(id__gt=low, id__lte=upper))
+                mark.last_movement_id = upper
+                mark.save(update_fields=['last_movement_id', 'updated_at'])
+            if progress:
+                progress(upper, high)
+        return {'movements': processed, 'watermark': low}
+
+    @staticmethod
+    def reaggregate(since=None, chunk_size: int = None, progress=None) -> dict:
+        """
+        Recomputes the rollups from the ledger, e.g. after movements were corrected by hand.
+
+        With `since`, the buckets from the start of that day on are deleted and rebuilt in one
+        transaction. Without it the table is emptied and the watermark reset, then build()
+        refills it; reads stay complete meanwhile, as everything past the watermark comes from
+        the ledger.
+        """
+        chunk_size = chunk_size or MovementRollupService.CHUNK_SIZE
+        if since is None:
+            with transaction.atomic():
+                mark = MovementRollupService._lock_watermark()
+                MovementRollup.objects.all().delete()
+                mark.last_movement_id = 0
+                mark.save(update_fields=['last_movement_id', 'updated_at'])
+            return MovementRollupService.build(chunk_size, progress)
+
+        start = floor_to(since, DAY)
+        with transaction.atomic():
+            mark = MovementRollupService._lock_watermark()
+            MovementRollup.objects.filter(bucket__gte=start).delete()
+            movements = StockMovement.objects.filter(timestamp__gte=start, id__lte=mark.last_movement_id)
+            low = (movements.aggregate(first=Min('id'))['first'] or mark.last_movement_id + 1) - 1
+            processed = 0
+            for upper in range(low + chunk_size, mark.last_movement_id + chunk_size, chunk_size):
+                upper = min(upper, mark.last_movement_id)
+                processed += MovementRollupService._aggregate(movements.filter(id__gt=low, id__lte=upper))
+                low = upper
+                if progress:
+                    progress(upper, mark.last_movement_id)
+        return {'movements': processed, 'watermark': mark.last_movement_id}
+
+    @staticmethod
+    def _aggregate(movements) -> int:
+        """
+        Adds `movements` to the rollups: daily rows at both grains, hourly rows over all
+        locations only (per location pair they would be about as many as the movements).
+        Runs under the watermark lock, which also serializes writers of the rollup rows.
+        Returns the number of movements added.
+        """
+        added = 0
+        for period, trunc in TRUNC.items():
+            bucketed = movements.annotate(bucket=trunc('timestamp'))
+            totals = dict(moved=Sum('quantity'), moved_in=Sum('quantity', filter=INFLOW),
+                          moved_out=Sum('quantity', filter=OUTFLOW), moves=Count('id'))
+            groups = [
+                dict(group, grain=PRODUCT, from_location_id=None, to_location_id=None)
+                for group in bucketed.values('bucket', 'product_id', 'transaction_type').annotate(**totals).order_by()
+            ]
+            if period == DAY:
+                groups += [
+                    dict(group, grain=LOCATION) for group in bucketed.values(
+                        'bucket', 'product_id', 'transaction_type', 'from_location_id', 'to_location_id'
+                    ).annotate(**totals).order_by()
+                ]
+            for chunk in iter_chunks(groups, MovementRollupService.MERGE_BATCH):
+                existing = {
+                    tuple(getattr(row, field) for field in KEY_FIELDS): row
+                    for row in MovementRollup.objects.filter(
+                        period=period,
+                        grain__in={group['grain'] for group in chunk},
+                        bucket__in={group['bucket'] for group in chunk},
+                        product_id__in={group['product_id'] for group in chunk},
+                    )
+                }
+                rows = []
+                for group in chunk:
+                    key = tuple(group[field] for field in KEY_FIELDS)
+                    row = existing.get(key) or MovementRollup(period=period, **dict(zip(KEY_FIELDS, key)))
+                    row.quantity += group['moved']
+                    row.quantity_in += group['moved_in'] or 0
+                    row.quantity_out += group['moved_out'] or 0
+                    row.movement_count += group['moves']
+                    rows.append(row)
+                MovementRollup.objects.bulk_create(
+                    rows, update_conflicts=True, unique_fields=['id'],
+                    update_fields=['quantity', 'quantity_in', 'quantity_out', 'movement_count'],
+                )
+            if period == DAY:
+                added = sum(group['moves'] for group in groups if group['grain'] == PRODUCT)
+        return added
+
+    # Reads
+
+    @staticmethod
+    def _scope(product_id=None, location_id=None, warehouse_id=None, transaction_type=None) -> Q:
+        """
+        Filter valid on both StockMovement and MovementRollup. A location or warehouse matches
+        movements on either side of it.
+        """
+        condition = Q()
+        if product_id:
+            condition &= Q(product_id=product_id)
+        if location_id:
+            condition &= Q(from_location_id=location_id) | Q(to_location_id=location_id)
+        if warehouse_id:
+            condition &= Q(from_location__warehouse_id=warehouse_id) | Q(to_location__warehouse_id=warehouse_id)
+        if transaction_type:
+            condition &= Q(transaction_type=transaction_type)
+        return condition
+
+    @staticmethod
+    def _sides(location_id=None, warehouse_id=None):
+        """
+        (inflow, outflow) conditions: the destination, or the source, is in scope.
+        """
+        if location_id:
+            return Q(to_location_id=location_id), Q(from_location_id=location_id)
+        if warehouse_id:
+            return Q(to_location__warehouse_id=warehouse_id), Q(from_location__warehouse_id=warehouse_id)
+        return INFLOW, OUTFLOW
+
+    @staticmethod
+    def _sources(mark, period, since, until, filters):
+        """
+        (rollups, tail): rollup rows of `period` in [since, until) up to the watermark `mark`, at
+        the grain the filters need, and the ledger movements after it. Without usable rollups
+        (no watermark yet, or hourly rows filtered by location) rollups is None and the tail is
+        the whole window.
+        """
+        scope = MovementRollupService._scope(**filters)
+        window = Q(bucket__gte=since) & (Q(bucket__lt=until) if until is not None else Q())
+        located = bool(filters.get('location_id') or filters.get('warehouse_id'))
+        if located and period == HOUR:
+            mark = 0
+        rollups = MovementRollup.objects.filter(
+            scope, window, period=period, grain=LOCATION if located else PRODUCT
+        ) if mark else None
+        tail = StockMovement.objects.filter(scope, timestamp__gte=since)
+        if mark:
+            # A closed id range makes SQLite read the (normally short) tail by primary key
+            # rather than walk a timestamp index from `since`
+            tail = tail.filter(id__gt=mark, id__lte=MAX_ID)
+        if until is not None:
+            tail = tail.filter(timestamp__lt=until)
+        return rollups, tail
+
+    @staticmethod
+    def consistent_read(read):
+        """
+        Calls read(watermark) until the watermark is unchanged across the call, so the rollups
+        it read hold exactly the movements up to that watermark: the ledger tail after it
+        neither overlaps them nor leaves a gap.
+        """
+        for _ in range(5):
+            mark = MovementRollupService.watermark()
+            result = read(mark)
+            if MovementRollupService.watermark() == mark:
+                break
+        return result
+
+    @staticmethod
+    def top_products(since, until=None, limit: int = 5, **filters) -> list:
+        """
+        Products with the largest moved quantity in [since, until), as
+        [{'product_id', 'product__name', 'moves', 'total_qty'}]. Bounds are rounded down to the day.
+        """
+        return MovementRollupService.consistent_read(
+            lambda mark: MovementRollupService._top_products(mark, since, until, limit, filters)
+        )
+
+    @staticmethod
+    def ledger_top_products(since, until=None, limit: int = 5, **filters) -> list:
+        """
+        top_products() computed from the raw ledger alone.
+        """
+        return MovementRollupService._top_products(0, since, until, limit, filters)
+
+    @staticmethod
+    def _top_products(mark, since, until, limit, filters):
+        since, until = floor_to(since, DAY), until and floor_to(until, DAY)
+        rollups, tail = MovementRollupService._sources(mark, DAY, since, until, filters)
+        totals = {
+            row['product_id']: [row['total_qty'], row['moves']]
+            for row in tail.values('product_id').annotate(total_qty=Sum('quantity'), moves=Count('id')).order_by()
+        }
+
+        if rollups is not None:
+            # A product outside the rollup top `limit` can only make the cut through its tail
+            # movements, so those plus the rollup leaders are the only candidates
+            grouped = rollups.values('product_id').annotate(
+                total_qty=Sum('quantity'), moves=Sum('movement_count')
+            ).order_by()
+            candidates = {row['product_id']: row for row in grouped.order_by('-total_qty', 'product_id')[:limit]}
+            for chunk in iter_chunks(list(totals), MovementRollupService.CANDIDATE_BATCH):
+                candidates.update((row['product_id'], row) for row in grouped.filter(product_id__in=chunk))
+            for product_id, row in candidates.items():
+                total = totals.setdefault(product_id, [Decimal('0'), 0])
+                total[0] += row['total_qty']
+                total[1] += row['moves']
+
+        ranked = sorted(totals.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        names = dict(Product.objects.filter(id__in=[product_id for product_id, _ in ranked]).values_list('id', 'name'))
+        return [
+            {'product_id': product_id, 'product__name': names.get(product_id), 'moves': moves, 'total_qty': quantity}
+            for product_id, (quantity, moves) in ranked
+        ]
+
+    @staticmethod
+    def trend(since, until=None, interval=DAY, **filters) -> list:
+        """
+        Moved quantities per `interval` bucket and transaction type in [since, until), as
+        [{'bucket', 'transaction_type', 'quantity_in', 'quantity_out', 'moves'}] ordered by
+        bucket. Inflow is movements into the location/warehouse in scope (any location without
+        one), outflow movements out of it. Bounds are rounded down to the interval; empty
+        buckets are omitted.
+        """
+        return MovementRollupService.consistent_read(
+            lambda mark: MovementRollupService._trend(mark, since, until, interval, filters)
+        )
+
+    @staticmethod
+    def ledger_trend(since, until=None, interval=DAY, **filters) -> list:
+        """
+        trend() computed from the raw ledger alone.
+        """
+        return MovementRollupService._trend(0, since, until, interval, filters)
+
+    @staticmethod
+    def _trend(mark, since, until, interval, filters):
+        since, until = floor_to(since, interval), until and floor_to(until, interval)
+        rollups, tail = MovementRollupService._sources(mark, interval, since, until, filters)
+        inflow, outflow = MovementRollupService._sides(filters.get('location_id'), filters.get('warehouse_id'))
+
+        rows = list(tail.annotate(bucket=TRUNC[interval]('timestamp')).values('bucket', 'transaction_type').annotate(
+            quantity_in=Sum('quantity', filter=inflow), quantity_out=Sum('quantity', filter=outflow), moves=Count('id')
+        ).order_by())
+        if rollups is not None:
+            if filters.get('location_id') or filters.get('warehouse_id'):
+                sums = dict(quantity_in=Sum('quantity', filter=inflow), quantity_out=Sum('quantity', filter=outflow))
+            else:
+                sums = dict(quantity_in=Sum('quantity_in'), quantity_out=Sum('quantity_out'))
+            rows += rollups.values('bucket', 'transaction_type').annotate(
+                moves=Sum('movement_count'), **sums
+            ).order_by()
+
+        buckets = defaultdict(lambda: [Decimal('0'), Decimal('0'), 0])
+        for row in rows:
+            total = buckets[(timezone.localtime(row['bucket']), row['transaction_type'])]
+            total[0] += row['quantity_in'] or 0
+            total[1] += row['quantity_out'] or 0
+            total[2] += row['moves']
+        return [
+            {'bucket': bucket, 'transaction_type': transaction_type,
+             'quantity_in': quantity_in, 'quantity_out': quantity_out, 'moves': moves}
+            for (bucket, transaction_type), (quantity_in, quantity_out, moves) in sorted(buckets.items())
+        ]
@@ -1,19 +1,29 @@
-from django.core.mail import send_mail
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
-from inventory.models import Product, Location
+from django.db import connection, transaction
+from django.utils import timezone
+from inventory.models import Product, Location, NotificationOutbox
 from decimal import Decimal
 
+# Single background worker that drains the outbox after commits in this process
+_dispatch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notification-outbox')
+
 
 class NotificationService:
     """
     Service for handling notifications (email, SMS, etc.)
+
+    Notifications are recorded in the NotificationOutbox inside the caller's transaction and
+    delivered after commit, so SMTP never runs while stock rows are locked.
     """
-    
+
     @staticmethod
-    def notify_low_stock(product: Product, location: Location, current_qty: Decimal) -> None:
+    def notify_low_stock(product: Product, location: Location, current_qty: Decimal):
         """
-        Sends an email notification when stock falls below minimum level.
-        
+        Queues an email notification when stock falls below minimum level.
+
         Args:
             product: The product with low stock
             location: The location where stock is low
@@ -21,10 +31,10 @@ class NotificationService:
         """
         if current_qty > product.min_stock_level:
             # Don't send email if stock is above minimum
-            return
-        
+            return None
+
         subject = f"⚠️ Low Stock Alert: {product.name} ({product.sku})"
-        
+
         message = f"""
 Low Stock Alert
 
@@ -39,34 +49,28 @@ Minimum Level: {product.min_stock_level} {product.uom}
 ---
 StockMaster Inventory Management System
 """
-        
-        recipient_list = [settings.MANAGER_EMAIL]
-        
-        try:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipient_list,
-                fail_silently=False,
-            )
-        except Exception as e:
-            # Log the error but don't crash the transaction
-            print(f"Failed to send low stock email: {e}")
+
+        return NotificationService.enqueue(
+            kind='LOW_STOCK',
+            dedupe_key=f"low-stock:{product.id}:{location.id}",
+            subject=subject,
+            body=message,
+            recipients=[settings.MANAGER_EMAIL],
+        )
 
     @staticmethod
-    def notify_transfer_validated(operation) -> None:
+    def notify_transfer_validated(operation):
         """
-        Sends an email notification when a transfer is validated.
+        Queues an email notification when a transfer is validated.
         """
         subject = f"🚚 Transfer Validated: {operation.reference_number}"
-        
-        lines_str = "\n".join([f"- {line.product.sku}: {line.quantity_done} {line.product.uom}" for line in operation.lines.all()])
-        
+
+        lines_str = "\n".join([f"- {line.product.sku}: {line.quantity_done} {line.product.uom}" for line in operation.lines.select_related('product')])
+
         source = operation.source_location.name if operation.source_location else "Unknown"
         dest = operation.destination_location.name if operation.destination_location else "Unknown"
         user = operation.created_by.username if operation.created_by else 'System'
-        
+
         message = f"""
 Transfer Validated
 
@@ -82,16 +86,124 @@ Items:
 ---
 StockMaster Inventory Management System
 """
-        
-        recipient_list = [settings.MANAGER_EMAIL]
-        
-        try:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipient_list,
-                fail_silently=False,
+
+        return NotificationService.enqueue(
+            kind='TRANSFER_VALIDATED',
+            dedupe_key=f"transfer:{operation.id}",
+            subject=subject,
+            body=message,
+            recipients=[settings.MANAGER_EMAIL],
+        )
+
+    @staticmethod
+    def enqueue(kind: str, dedupe_key: str, subject: str, body: str, recipients: list) -> NotificationOutbox:
+        """
+        Records a notification in the outbox as part of the current transaction.
+        A pending notification with the same dedupe_key is reused instead of queuing a duplicate.
+        """
+        pending = NotificationOutbox.objects.filter(
+            dedupe_key=dedupe_key, status=NotificationOutbox.Status.PENDING
+        ).first()
+        if pending:
+            return pending
+
+        entry = NotificationOutbox.objects.create(
+            kind=kind,
+            dedupe_key=dedupe_key,
+            subject=subject,
+            body=body,
+            recipients=recipients,
+        )
+        if getattr(settings, 'NOTIFICATION_OUTBOX_AUTO_DISPATCH', True):
+            transaction.on_commit(NotificationService._dispatch_in_background)
+        return entry
+
+    @staticmethod
+    def _dispatch_in_background() -> None:
+        def run():
+            try:
+                NotificationService.dispatch_pending()
+            except Exception as e:
+                print(f"Notification outbox dispatch failed: {e}")
+            finally:
+                connection.close()
+        _dispatch_executor.submit(run)
+
+    @staticmethod
+    def dispatch_pending(batch_size: int = None) -> int:
+        """
+        Delivers due outbox entries over a single reused mail connection.
+        Entries sharing a dedupe_key within a batch are sent once. Failures are retried with
+        exponential backoff until NOTIFICATION_OUTBOX_MAX_ATTEMPTS is reached.
+        Returns the number of emails sent.
+        """
+        batch_size = batch_size or getattr(settings, 'NOTIFICATION_OUTBOX_BATCH_SIZE', 100)
+        max_attempts = getattr(settings, 'NOTIFICATION_OUTBOX_MAX_ATTEMPTS', 5)
+        backoff_base = getattr(settings, 'NOTIFICATION_OUTBOX_BACKOFF_BASE', 30)
+        backoff_max = getattr(settings, 'NOTIFICATION_OUTBOX_BACKOFF_MAX', 3600)
+
+        with transaction.atomic():
+            queryset = NotificationOutbox.objects.filter(
+                status=NotificationOutbox.Status.PENDING,
+                next_attempt_at__lte=timezone.now()
+            ).order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                # Lets several dispatchers drain the outbox without picking the same rows
+                queryset = queryset.select_for_update(skip_locked=True)
+            entries = list(queryset[:batch_size])
+            if not entries:
+                return 0
+
+            # Latest entry per dedupe key carries the most recent content
+            groups = {}
+            for entry in entries:
+                groups.setdefault(entry.dedupe_key, []).append(entry)
+
+            sent = 0
+            mail_connection = get_connection(fail_silently=False)
+            try:
+                mail_connection.open()
+            except Exception as e:
+                for group in groups.values():
+                    NotificationService._record_failure(group, e, max_attempts, backoff_base, backoff_max)
+                groups = {}
+
+            try:
+                for group in groups.values():
+                    latest = group[-1]
+                    try:
+                        mail_connection.send_messages([EmailMessage(
+                            subject=latest.subject,
+                            body=latest.body,
+                            from_email=settings.DEFAULT_FROM_EMAIL,
+                            to=latest.recipients,
+                        )])
+                    except Exception as e:
+                        NotificationService._record_failure(group, e, max_attempts, backoff_base, backoff_max)
+                        continue
+
+                    sent += 1
+                    now = timezone.now()
+                    for entry in group:
+                        entry.attempts += 1
+                        entry.status = NotificationOutbox.Status.SENT
+                        entry.sent_at = now
+            finally:
+                mail_connection.close()
+
+            NotificationOutbox.objects.bulk_update(
+                entries, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
             )
-        except Exception as e:
-            print(f"Failed to send transfer email: {e}")
+        return sent
+
+    @staticmethod
+    def _record_failure(entries, error, max_attempts, backoff_base, backoff_max) -> None:
+        now = timezone.now()
+        for entry in entries:
+            entry.attempts += 1
+            entry.last_error = str(error)
+            if entry.attempts >= max_attempts:
+                entry.status = NotificationOutbox.Status.FAILED
+            else:
+                delay = min(backoff_max, backoff_base * 2 ** (entry.attempts - 1))
+                entry.next_attempt_at = now + timedelta(seconds=delay)
@@ -0,0 +1,233 @@
+import io
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import connection, connections, transaction
+from django.db.models import Prefetch
+from inventory.models import Operation, OperationLine, DocumentStatus
+from inventory.utils import generate_operation_pdf, generate_operations_pdf
+from services.stock_export_service import iter_chunks
+from services.worker_pool import process_pool
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'OPERATION_PDF_WORKERS', 2),
+                                           thread_name_prefix='operation-pdf')
+        return _executor
+
+
+def _documents_in_worker(operation_ids):
+    try:
+        return OperationPdfService.documents(operation_ids)
+    finally:
+        connections.close_all()
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only, unseekable file that collects what zipfile writes until it is drained.
+    """
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class OperationPdfService:
+    """
+    Rendered documents of validated operations, cached in the 'operation_pdfs' storage.
+
+    A DONE operation never changes, so its PDF is rendered once and kept under a name built
+    from the operation id and validated_at. The same pair is the ETag, which lets the view
+    answer If-None-Match without touching storage. Re-validating would change validated_at,
+    so stale files are never served.
+    """
+
+    EXPORT_CHUNK_SIZE = 20
+
+    @staticmethod
+    def storage():
+        return storages['operation_pdfs']
+
+    @staticmethod
+    def queryset():
+        """
+        Everything the document prints, in two queries: header + locations, then lines + products.
+        """
+        return Operation.objects.select_related(
+            'source_location__warehouse', 'destination_location__warehouse'
+        ).prefetch_related(
+            Prefetch('lines', queryset=OperationLine.objects.select_related('product').order_by('id'))
+        )
+
+    @staticmethod
+    def version(operation: Operation) -> str:
+        return f"{operation.pk}-{operation.validated_at.strftime('%Y%m%d%H%M%S%f')}"
+
+    @staticmethod
+    def etag(operation: Operation) -> str:
+        return f'"op-{OperationPdfService.version(operation)}"'
+
+    @staticmethod
+    def filename(operation: Operation) -> str:
+        return f'{OperationPdfService.version(operation)}.pdf'
+
+    @staticmethod
+    def get_pdf(operation: Operation) -> bytes:
+        """
+        Returns the cached PDF, rendering and storing it on a miss.
+        """
+        if operation.status != DocumentStatus.DONE or operation.validated_at is None:
+            raise ValueError(f"Operation {operation.reference_number} is not validated.")
+        storage = OperationPdfService.storage()
+        name = OperationPdfService.filename(operation)
+        try:
+            with storage.open(name) as fh:
+                return fh.read()
+        except FileNotFoundError:
+            pass
+        return OperationPdfService._render_and_store(operation, storage, name)
+
+    @staticmethod
+    def _render_and_store(operation, storage, name) -> bytes:
+        data = generate_operation_pdf(operation).getvalue()
+        saved = storage.save(name, ContentFile(data))
+        if saved != name:
+            # A concurrent render stored it first and the storage picked a free name for ours
+            storage.delete(saved)
+        return data
+
+    @staticmethod
+    def render(operation_ids) -> int:
+        """
+        Renders and stores the PDFs that are not cached yet. Returns the number rendered.
+        """
+        storage = OperationPdfService.storage()
+        rendered = 0
+        for operation in OperationPdfService.queryset().filter(
+            pk__in=list(operation_ids), status=DocumentStatus.DONE, validated_at__isnull=False
+        ).order_by('id'):
+            name = OperationPdfService.filename(operation)
+            if not storage.exists(name):
+                OperationPdfService._render_and_store(operation, storage, name)
+                rendered += 1
+        return rendered
+
+    @staticmethod
+    def prerender_on_commit(operation_id: int) -> None:
+        """
+        Queues the document for the background renderer once the validation commits,
+        so the first download is served from the cache.
+        """
+        if getattr(settings, 'OPERATION_PDF_PRERENDER', True):
+            transaction.on_commit(lambda: OperationPdfService._render_in_background([operation_id]))
+
+    @staticmethod
+    def _render_in_background(operation_ids) -> None:
+        def run():
+            try:
+                OperationPdfService.render(operation_ids)
+            except Exception as e:
+                # The download path renders on demand, so a failed pre-render only costs latency
+                print(f"Operation PDF pre-render failed: {e}")
+            finally:
+                connection.close()
+        _get_executor().submit(run)
+
+    @staticmethod
+    def export_ids(queryset) -> list:
+        """
+        Ids of the validated operations in `queryset`, in validation order.
+        """
+        return list(dict.fromkeys(
+            queryset.filter(status=DocumentStatus.DONE, validated_at__isnull=False)
+            .order_by('validated_at', 'id').values_list('id', flat=True)
+        ))
+
+    @staticmethod
+    def documents(operation_ids) -> list:
+        """
+        [(file name, PDF bytes)] for the given ids, from the cache where possible.
+        Missing documents are rendered and stored, so later downloads hit the cache.
+        """
+        operations = OperationPdfService.queryset().in_bulk(list(operation_ids))
+        return [
+            (f'{operations[pk].reference_number}.pdf', OperationPdfService.get_pdf(operations[pk]))
+            for pk in operation_ids if pk in operations
+        ]
+
+    @staticmethod
+    def iter_documents(operation_ids, workers: int = 1):
+        """
+        Yields (file name, PDF bytes) in order. With workers > 1, chunks of ids are rendered in
+        a process pool (ReportLab is pure Python, so threads would share one core); that is for
+        management commands, web requests render in their own process. At most two chunks per
+        worker are in flight, which bounds memory however many documents match.
+        """
+        chunks = iter_chunks(operation_ids, OperationPdfService.EXPORT_CHUNK_SIZE)
+        if workers <= 1:
+            for chunk in chunks:
+                yield from OperationPdfService.documents(chunk)
+            return
+
+        pool = process_pool(workers)
+        try:
+            in_flight = []
+            for chunk in chunks:
+                in_flight.append(pool.submit(_documents_in_worker, chunk))
+                if len(in_flight) >= 2 * workers:
+                    yield from in_flight.pop(0).result()
+            for future in in_flight:
+                yield from future.result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def stream_zip(operation_ids, workers: int = 1):
+        """
+        Yields a ZIP archive of one PDF per operation, chunk by chunk.
+        """
+        sink = _ChunkSink()
+        # PDF page streams are already deflated; storing them is as small and much faster
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for name, data in OperationPdfService.iter_documents(operation_ids, workers):
+                archive.writestr(name, data)
+                yield sink.drain()
+        yield sink.drain()
+
+    @staticmethod
+    def stream_merged(operation_ids, chunk_size: int = 64 * 1024):
+        """
+        Yields one multi-page PDF of every operation. ReportLab lays out a single document in
+        one process and in memory, so this is rendered serially and is meant for moderate
+        batches; the result is spooled to a temporary file and streamed from there.
+        """
+        with tempfile.TemporaryFile() as fh:
+            operations = (
+                operation for chunk in iter_chunks(operation_ids, OperationPdfService.EXPORT_CHUNK_SIZE)
+                for operation in OperationPdfService.queryset().filter(pk__in=chunk).order_by('validated_at', 'id')
+            )
+            generate_operations_pdf(operations, fh)
+            fh.seek(0)
+            while data := fh.read(chunk_size):
+                yield data
@@ -1,9 +1,11 @@
 from django.db import transaction
 from django.utils import timezone
-from typing import Optional
-from inventory.models import Operation, DocumentStatus
-from services.stock_service import StockService
+from inventory.models import Operation, OperationLine, DocumentStatus
+from services.stock_service import StockBatch, retry_on_conflict
 from services.notification_service import NotificationService
+from services.dashboard_service import DashboardService
+from services.operation_pdf_service import OperationPdfService
+from services.reservation_service import ReservationService
 
 class OperationService:
     """
@@ -41,7 +43,8 @@ class OperationService:
     @transaction.atomic
     def transition_status(operation: Operation, new_status: str, user=None) -> Operation:
         """
-        Transitions an operation to a new status if valid.
+        Transitions an operation to a new status if valid. Deliveries and transfers reserve
+        their demand on entering WAITING/READY and release it when canceled.
         """
         if not OperationService.validate_status_transition(operation.status, new_status):
             raise ValueError(f"Invalid status transition from {operation.status} to {new_status}")
@@ -49,9 +52,12 @@ class OperationService:
         operation.status = new_status
         operation.updated_at = timezone.now()
         operation.save()
+        ReservationService.sync(operation)
+        DashboardService.invalidate_on_commit()
         return operation
 
     @staticmethod
+    @retry_on_conflict
     @transaction.atomic
     def validate_operation(operation_id: int, user=None, allow_partial: bool = False) -> Operation:
         """
@@ -72,149 +78,110 @@ class OperationService:
         if operation.status == DocumentStatus.CANCELED:
              raise ValueError(f"Operation {operation.reference_number} is CANCELED and cannot be validated.")
 
-        lines = operation.lines.all()
-        if not lines.exists():
+        lines = list(operation.lines.select_related('product'))
+        if not lines:
             raise ValueError(f"Cannot validate operation {operation.reference_number}: No lines found.")
 
-        # Process based on type
+        # Check required locations before taking any stock locks
         if operation.operation_type == Operation.Type.RECEIPT:
             if not operation.destination_location:
                 raise ValueError(f"Receipt {operation.reference_number} missing destination location.")
-            
-            for line in lines:
-                StockService.increase_stock(
-                    product=line.product,
-                    location=operation.destination_location,
-                    quantity=line.quantity_demanded,
-                    operation=operation,
-                    user=user,
-                    notes=f"Receipt validation"
-                )
-                line.quantity_done = line.quantity_demanded
-                line.save()
-
+            locations = [operation.destination_location]
         elif operation.operation_type == Operation.Type.DELIVERY:
             if not operation.source_location:
                 raise ValueError(f"Delivery {operation.reference_number} missing source location.")
+            locations = [operation.source_location]
+        elif operation.operation_type == Operation.Type.TRANSFER:
+            if not operation.source_location or not operation.destination_location:
+                raise ValueError(f"Transfer {operation.reference_number} requires both source and destination.")
+            locations = [operation.source_location, operation.destination_location]
+        elif operation.operation_type == Operation.Type.ADJUSTMENT:
+            if not operation.source_location:
+                 raise ValueError(f"Adjustment {operation.reference_number} missing location.")
+            locations = [operation.source_location]
+        else:
+            locations = []
+
+        if not allow_partial:
+            # Fail fast on stock that is missing or promised to other open operations, before
+            # any stock row is locked. The locked check below stays authoritative for on-hand.
+            short = ReservationService.shortages(operation, lines)
+            if short:
+                line, available = short[0]
+                raise ValueError(
+                    f"Insufficient stock for {line.product.sku} at {operation.source_location.name}. "
+                    f"Available: {available}, Requested: {line.quantity_demanded}"
+                )
+
+        # Lock every affected stock row in one ordered query and apply the lines in memory
+        batch = StockBatch(
+            operation,
+            {(line.product_id, location.id) for line in lines for location in locations},
+            user=user
+        )
 
+        # Process based on type
+        if operation.operation_type == Operation.Type.RECEIPT:
+            for line in lines:
+                batch.increase(line.product, operation.destination_location, line.quantity_demanded, notes="Receipt validation")
+                line.quantity_done = line.quantity_demanded
+
+        elif operation.operation_type == Operation.Type.DELIVERY:
             for line in lines:
                 qty_to_process = line.quantity_demanded
-                
-                # Check availability if partial allowed
-                if allow_partial:
-                    # We need to check stock without locking first or handle the exception
-                    # Better to use the stock service's check or try/catch
-                    try:
-                         StockService.decrease_stock(
-                            product=line.product,
-                            location=operation.source_location,
-                            quantity=qty_to_process,
-                            operation=operation,
-                            user=user,
-                            notes="Delivery validation"
-                        )
-                         line.quantity_done = qty_to_process
-                    except ValueError:
-                        # Insufficient stock, check what we have
-                        stock = StockService._get_or_create_stock_locked(line.product, operation.source_location)
-                        available = stock.quantity
-                        if available > 0:
-                            StockService.decrease_stock(
-                                product=line.product,
-                                location=operation.source_location,
-                                quantity=available,
-                                operation=operation,
-                                user=user,
-                                notes=f"Partial Delivery (Requested: {qty_to_process})"
-                            )
-                            line.quantity_done = available
-                        else:
-                            line.quantity_done = 0
-                else:
-                    # Strict full fulfillment
-                    StockService.decrease_stock(
-                        product=line.product,
-                        location=operation.source_location,
-                        quantity=qty_to_process,
-                        operation=operation,
-                        user=user,
-                        notes="Delivery validation"
-                    )
+                available = batch.available(line.product, operation.source_location)
+
+                if available >= qty_to_process or not allow_partial:
+                    # Strict full fulfillment (raises on insufficient stock)
+                    batch.decrease(line.product, operation.source_location, qty_to_process, notes="Delivery validation")
                     line.quantity_done = qty_to_process
-                
-                line.save()
+                elif available > 0:
+                    batch.decrease(
+                        line.product, operation.source_location, available,
+                        notes=f"Partial Delivery (Requested: {qty_to_process})"
+                    )
+                    line.quantity_done = available
+                else:
+                    line.quantity_done = 0
 
         elif operation.operation_type == Operation.Type.TRANSFER:
-            if not operation.source_location or not operation.destination_location:
-                raise ValueError(f"Transfer {operation.reference_number} requires both source and destination.")
-
             for line in lines:
                 qty_to_process = line.quantity_demanded
-                
-                if allow_partial:
-                     # Similar partial logic for transfer
-                    try:
-                        StockService.move_stock(
-                            product=line.product,
-                            from_loc=operation.source_location,
-                            to_loc=operation.destination_location,
-                            quantity=qty_to_process,
-                            operation=operation,
-                            user=user,
-                            notes="Transfer validation"
-                        )
-                        line.quantity_done = qty_to_process
-                    except ValueError:
-                        stock = StockService._get_or_create_stock_locked(line.product, operation.source_location)
-                        available = stock.quantity
-                        if available > 0:
-                            StockService.move_stock(
-                                product=line.product,
-                                from_loc=operation.source_location,
-                                to_loc=operation.destination_location,
-                                quantity=available,
-                                operation=operation,
-                                user=user,
-                                notes=f"Partial Transfer (Requested: {qty_to_process})"
-                            )
-                            line.quantity_done = available
-                        else:
-                            line.quantity_done = 0
-                else:
-                    StockService.move_stock(
-                        product=line.product,
-                        from_loc=operation.source_location,
-                        to_loc=operation.destination_location,
-                        quantity=qty_to_process,
-                        operation=operation,
-                        user=user,
-                        notes="Transfer validation"
+                available = batch.available(line.product, operation.source_location)
+
+                if available >= qty_to_process or not allow_partial:
+                    batch.move(
+                        line.product, operation.source_location, operation.destination_location,
+                        qty_to_process, notes="Transfer validation"
                     )
                     line.quantity_done = qty_to_process
-                
-                line.save()
-            
-            NotificationService.notify_transfer_validated(operation)
+                elif available > 0:
+                    batch.move(
+                        line.product, operation.source_location, operation.destination_location,
+                        available, notes=f"Partial Transfer (Requested: {qty_to_process})"
+                    )
+                    line.quantity_done = available
+                else:
+                    line.quantity_done = 0
 
         elif operation.operation_type == Operation.Type.ADJUSTMENT:
-            if not operation.source_location:
-                 raise ValueError(f"Adjustment {operation.reference_number} missing location.")
-            
             for line in lines:
-                StockService.adjust_stock(
-                    product=line.product,
-                    location=operation.source_location,
-                    new_quantity=line.quantity_demanded,
-                    operation=operation,
-                    user=user,
-                    notes="Stock Adjustment"
-                )
+                batch.adjust(line.product, operation.source_location, line.quantity_demanded, notes="Stock Adjustment")
                 line.quantity_done = line.quantity_demanded
-                line.save()
+
+        batch.flush()
+        ReservationService.release(operation, lines)
+        OperationLine.objects.bulk_create(lines, update_conflicts=True, unique_fields=['id'], update_fields=['quantity_done'])
 
         operation.status = DocumentStatus.DONE
         operation.validated_at = timezone.now()
         operation.save()
+        DashboardService.invalidate_on_commit()
+        OperationPdfService.prerender_on_commit(operation.id)
+
+        if operation.operation_type == Operation.Type.TRANSFER:
+            # Queued in the outbox and sent after commit
+            NotificationService.notify_transfer_validated(operation)
         return operation
 
 
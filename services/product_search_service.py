@@ -0,0 +1,247 @@
+import threading
+import time
+from bisect import bisect_left
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from inventory.models import Product
+
+INDEX_VERSION_KEY = 'product_search:version'
+
+# SQLite: an external-content FTS5 table with the trigram tokenizer (substring matching for
+# terms of 3+ characters), kept in sync with inventory_product by triggers.
+# PostgreSQL: pg_trgm GIN indexes on the UPPER(...) expressions that icontains compares,
+# which turns the existing LIKE '%term%' filters into index scans.
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE inventory_product_search USING fts5(
+        sku, name, content='inventory_product', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER inventory_product_search_ai AFTER INSERT ON inventory_product BEGIN
+        INSERT INTO inventory_product_search(rowid, sku, name) VALUES (new.id, new.sku, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER inventory_product_search_ad AFTER DELETE ON inventory_product BEGIN
+        INSERT INTO inventory_product_search(inventory_product_search, rowid, sku, name)
+        VALUES ('delete', old.id, old.sku, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER inventory_product_search_au AFTER UPDATE OF sku, name ON inventory_product BEGIN
+        INSERT INTO inventory_product_search(inventory_product_search, rowid, sku, name)
+        VALUES ('delete', old.id, old.sku, old.name);
+        INSERT INTO inventory_product_search(rowid, sku, name) VALUES (new.id, new.sku, new.name);
+    END
+    """,
+    "INSERT INTO inventory_product_search(inventory_product_search) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS inventory_product_search_ai',
+    'DROP TRIGGER IF EXISTS inventory_product_search_ad',
+    'DROP TRIGGER IF EXISTS inventory_product_search_au',
+    'DROP TABLE IF EXISTS inventory_product_search',
+]
+POSTGRESQL_INSTALL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS product_sku_trgm_idx ON inventory_product USING gin (UPPER(sku::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS product_name_trgm_idx ON inventory_product USING gin (UPPER(name::text) gin_trgm_ops)',
+]
+POSTGRESQL_UNINSTALL = [
+    'DROP INDEX IF EXISTS product_sku_trgm_idx',
+    'DROP INDEX IF EXISTS product_name_trgm_idx',
+]
+
+_sku_index = None
+_sku_index_lock = threading.Lock()
+# Database name -> backend, so filters don't look the table up on every request
+_backends = {}
+
+
+class SkuPrefixIndex:
+    """
+    In-process sorted array of upper-cased SKUs; a prefix lookup is a binary search plus
+    a short forward scan, with no database round trip.
+    """
+
+    def __init__(self, rows, version=None):
+        rows = sorted((sku.upper(), pk) for sku, pk in rows)
+        self.keys = [sku for sku, _ in rows]
+        self.ids = [pk for _, pk in rows]
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, prefix: str, limit: int) -> list:
+        prefix = prefix.upper()
+        found = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(found) < limit and self.keys[i].startswith(prefix):
+            found.append(self.ids[i])
+            i += 1
+        return found
+
+
+class ProductSearchService:
+    """
+    Product lookups by SKU or name with one interface over the available search structures:
+      - 'fts5': SQLite FTS5 trigram table (migration 0012)
+      - 'trigram': PostgreSQL pg_trgm indexes behind the usual icontains filters
+      - 'scan': anything else, plain LIKE '%term%' scans
+    Terms shorter than three characters cannot use a trigram index and are scanned.
+
+    Typeahead goes through an in-process SKU prefix index first. It is rebuilt when a product
+    change bumps the cache version, or after PRODUCT_SKU_INDEX_TTL for writes that bypass
+    the ORM signals.
+    """
+
+    MIN_INDEXED_LENGTH = 3
+
+    @staticmethod
+    def install(using=connection) -> None:
+        """
+        Creates the search structures on the `using` connection; a no-op on other vendors.
+        SQLite table rebuilds (e.g. migrations altering Product) drop the triggers, so
+        rebuild_product_search uninstalls and re-installs after such migrations.
+        """
+        statements = {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRESQL_INSTALL}.get(using.vendor)
+        if not statements or (using.vendor == 'sqlite' and not ProductSearchService._sqlite_supports_fts(using)):
+            return
+        with using.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        _backends.clear()
+
+    @staticmethod
+    def uninstall(using=connection) -> None:
+        statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRESQL_UNINSTALL}.get(using.vendor, [])
+        with using.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        _backends.clear()
+
+    @staticmethod
+    def backend() -> str:
+        name = connection.settings_dict['NAME']
+        if name not in _backends:
+            _backends[name] = 'scan'
+            if connection.vendor == 'postgresql':
+                _backends[name] = 'trigram'
+            elif connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'inventory_product_search'")
+                    if cursor.fetchone():
+                        _backends[name] = 'fts5'
+        return _backends[name]
+
+    @staticmethod
+    def filter(queryset, terms: str):
+        """
+        Products whose SKU or name contains every whitespace-separated term (case-insensitive),
+        the same semantics as DRF's SearchFilter over ('name', 'sku').
+        """
+        words = terms.split()
+        if not words:
+            return queryset
+        indexed = [w for w in words if len(w) >= ProductSearchService.MIN_INDEXED_LENGTH]
+        if indexed and ProductSearchService.backend() == 'fts5':
+            # FTS5 matches the phrase in either column; short terms are checked row by row
+            match = ' AND '.join('"{}"'.format(w.replace('"', '""')) for w in indexed)
+            queryset = queryset.filter(id__in=RawSQL(
+                'SELECT rowid FROM inventory_product_search WHERE inventory_product_search MATCH %s', [match]
+            ))
+            words = [w for w in words if w not in indexed]
+        for word in words:
+            queryset = queryset.filter(Q(name__icontains=word) | Q(sku__icontains=word))
+        return queryset
+
+    @staticmethod
+    def search(terms: str, limit: int = 10, queryset=None) -> list:
+        """
+        Top `limit` matches: exact SKU first, then SKU prefix, then name prefix, then the rest.
+        """
+        terms = terms.strip()
+        if not terms:
+            return []
+        queryset = Product.objects.all() if queryset is None else queryset
+        return list(ProductSearchService.filter(queryset, terms).annotate(
+            match_rank=Case(
+                When(sku__iexact=terms, then=Value(0)),
+                When(sku__istartswith=terms, then=Value(1)),
+                When(name__istartswith=terms, then=Value(2)),
+                default=Value(3),
+                output_field=IntegerField(),
+            )
+        ).order_by('match_rank', 'sku')[:limit])
+
+    @staticmethod
+    def autocomplete(term: str, limit: int = 10) -> list:
+        """
+        Typeahead matches as [{'id', 'sku', 'name', 'uom'}]: SKU prefix hits from the in-process
+        index, topped up from search() when there are fewer than `limit`.
+        """
+        term = term.strip()
+        if not term:
+            return []
+        ids = ProductSearchService.sku_index().lookup(term, limit)
+        products = Product.objects.only('id', 'sku', 'name', 'uom')
+        found = products.in_bulk(ids)
+        # The index may be a little stale: deleted ids drop out here, new products come from search()
+        results = [found[pk] for pk in ids if pk in found]
+        if len(results) < limit:
+            results += ProductSearchService.search(
+                term, limit - len(results), queryset=products.exclude(id__in=[p.id for p in results])
+            )
+        return [{'id': p.id, 'sku': p.sku, 'name': p.name, 'uom': p.uom} for p in results]
+
+    @staticmethod
+    def sku_index() -> SkuPrefixIndex:
+        """
+        The process-wide SKU index, rebuilt when stale. While one thread rebuilds, others keep
+        using the previous index rather than waiting.
+        """
+        global _sku_index
+        version = cache.get(INDEX_VERSION_KEY)
+        ttl = getattr(settings, 'PRODUCT_SKU_INDEX_TTL', 300)
+        index = _sku_index
+        if index is not None and index.version == version and time.monotonic() - index.built_at < ttl:
+            return index
+        if not _sku_index_lock.acquire(blocking=index is None):
+            return index
+        try:
+            rows = Product.objects.values_list('sku', 'id').iterator(chunk_size=10000)
+            _sku_index = SkuPrefixIndex(rows, version)
+            return _sku_index
+        finally:
+            _sku_index_lock.release()
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Marks every process's SKU index as stale.
+        """
+        try:
+            cache.incr(INDEX_VERSION_KEY)
+        except ValueError:
+            cache.set(INDEX_VERSION_KEY, time.time_ns(), None)
+
+    @staticmethod
+    def invalidate_on_commit() -> None:
+        transaction.on_commit(ProductSearchService.invalidate)
+
+    @staticmethod
+    def _sqlite_supports_fts(using) -> bool:
+        # Needs FTS5 compiled in and SQLite 3.34+ for the trigram tokenizer
+        with using.cursor() as cursor:
+            try:
+                cursor.execute("CREATE VIRTUAL TABLE temp.product_search_probe USING fts5(x, tokenize='trigram')")
+            except Exception:
+                return False
+            cursor.execute('DROP TABLE temp.product_search_probe')
+        return True
@@ -0,0 +1,183 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from inventory.models import (
+    Operation, OperationLine, DocumentStatus, ProductStock, ProductStockTotal,
+    WarehouseStockTotal, StockReservation,
+)
+
+RESERVING_TYPES = (Operation.Type.DELIVERY, Operation.Type.TRANSFER)
+RESERVING_STATUSES = (DocumentStatus.WAITING, DocumentStatus.READY)
+
+
+class ReservationService:
+    """
+    Maintains StockReservation: the quantity that open deliveries and transfers have promised
+    out of their source location. An operation reserves its full demand on entering WAITING or
+    READY and releases it when it is validated, canceled, edited back or deleted. Each line
+    records what it holds, so releases are exact however often an operation is edited.
+
+    Available to promise (ATP) = on hand - reserved. It may go negative when more is promised
+    than is in stock, which is how a shortage shows up before anything is validated.
+    """
+
+    @staticmethod
+    def holds_reservation(operation: Operation) -> bool:
+        return (operation.operation_type in RESERVING_TYPES and operation.status in RESERVING_STATUSES
+                and operation.source_location_id is not None)
+
+    @staticmethod
+    def sync(operation: Operation, lines=None) -> None:
+        """
+        Brings the operation's reservations in line with its status and lines.
+        Must run inside the transaction that changed the operation.
+        """
+        lines = list(operation.lines.all()) if lines is None else lines
+        hold = ReservationService.holds_reservation(operation)
+        changed = []
+        deltas = defaultdict(Decimal)
+        for line in lines:
+            target = line.quantity_demanded if hold else Decimal('0')
+            if line.quantity_reserved != target:
+                deltas[(line.product_id, operation.source_location_id)] += target - line.quantity_reserved
+                line.quantity_reserved = target
+                changed.append(line)
+        if changed:
+            OperationLine.objects.bulk_create(changed, update_conflicts=True, unique_fields=['id'],
+                                              update_fields=['quantity_reserved'])
+            ReservationService.apply_deltas(deltas)
+
+    @staticmethod
+    def release(operation: Operation, lines=None) -> None:
+        """
+        Releases everything the operation holds, whatever its status. Call it before changing
+        the operation's lines or source location, so the release hits the original rows.
+        """
+        lines = list(operation.lines.all()) if lines is None else lines
+        held = [line for line in lines if line.quantity_reserved]
+        if not held:
+            return
+        deltas = defaultdict(Decimal)
+        for line in held:
+            if operation.source_location_id is not None:
+                deltas[(line.product_id, operation.source_location_id)] -= line.quantity_reserved
+            line.quantity_reserved = Decimal('0')
+        OperationLine.objects.filter(pk__in=[line.pk for line in held]).update(quantity_reserved=0)
+        ReservationService.apply_deltas(deltas)
+
+    @staticmethod
+    def apply_deltas(deltas) -> None:
+        """
+        Adds quantity deltas keyed by (product_id, location_id) to StockReservation, locking the
+        rows in canonical order (the same scheme as StockSummaryService.apply_deltas).
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        by_location = defaultdict(list)
+        for product_id, location_id in deltas:
+            by_location[location_id].append(product_id)
+        condition = Q()
+        for location_id, product_ids in by_location.items():
+            condition |= Q(location_id=location_id, product_id__in=product_ids)
+
+        StockReservation.objects.bulk_create(
+            [StockReservation(product_id=p, location_id=l, quantity=0) for p, l in sorted(deltas)],
+            ignore_conflicts=True
+        )
+        rows = list(StockReservation.objects.select_for_update().filter(condition).order_by('product_id', 'location_id'))
+        for row in rows:
+            row.quantity += deltas[(row.product_id, row.location_id)]
+        StockReservation.objects.bulk_create(rows, update_conflicts=True, unique_fields=['id'], update_fields=['quantity'])
+
+    @staticmethod
+    def available_to_promise(product_ids, location_id=None, warehouse_id=None) -> dict:
+        """
+        {product_id: {'on_hand', 'reserved', 'available'}} at a location, a warehouse or across
+        all locations. Two indexed reads of the materialized tables, no locks.
+        """
+        product_ids = list(product_ids)
+        reserved = StockReservation.objects.filter(product_id__in=product_ids)
+        if location_id is not None:
+            on_hand = ProductStock.objects.filter(product_id__in=product_ids, location_id=location_id)
+            reserved = reserved.filter(location_id=location_id)
+        elif warehouse_id is not None:
+            on_hand = WarehouseStockTotal.objects.filter(product_id__in=product_ids, warehouse_id=warehouse_id)
+            reserved = reserved.filter(location__warehouse_id=warehouse_id)
+        else:
+            on_hand = ProductStockTotal.objects.filter(product_id__in=product_ids)
+        on_hand = dict(on_hand.values_list('product_id', 'quantity'))
+        reserved = dict(reserved.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total').order_by())
+
+        zero = Decimal('0')
+        result = {}
+        for product_id in product_ids:
+            quantity, held = on_hand.get(product_id, zero), reserved.get(product_id, zero)
+            result[product_id] = {'on_hand': quantity, 'reserved': held, 'available': quantity - held}
+        return result
+
+    @staticmethod
+    def available(product_id: int, location_id=None, warehouse_id=None) -> Decimal:
+        return ReservationService.available_to_promise([product_id], location_id, warehouse_id)[product_id]['available']
+
+    @staticmethod
+    def shortages(operation: Operation, lines) -> list:
+        """
+        Lines of a delivery or transfer that the source location cannot cover, as
+        [(line, available)], where available is on hand minus what other operations hold.
+        Reads without locks, so validation can fail fast before it locks any stock row.
+        """
+        if operation.operation_type not in RESERVING_TYPES or operation.source_location_id is None:
+            return []
+        atp = ReservationService.available_to_promise(
+            {line.product_id for line in lines}, location_id=operation.source_location_id
+        )
+        demanded = defaultdict(Decimal)
+        own = defaultdict(Decimal)
+        for line in lines:
+            demanded[line.product_id] += line.quantity_demanded
+            own[line.product_id] += line.quantity_reserved
+        short = []
+        for line in lines:
+            available = atp[line.product_id]['available'] + own[line.product_id]
+            if available < demanded[line.product_id]:
+                short.append((line, available))
+        return short
+
+    @staticmethod
+    @transaction.atomic
+    def reconcile(fix: bool = True) -> list:
+        """
+        Recomputes reservations from the open operations and compares them with StockReservation.
+        Returns drift records; when fix is True, line holdings and the table are rewritten.
+        Covers operations that were put into WAITING/READY without going through the service.
+        """
+        zero = Decimal('0')
+        open_lines = OperationLine.objects.filter(
+            operation__operation_type__in=RESERVING_TYPES,
+            operation__status__in=RESERVING_STATUSES,
+            operation__source_location__isnull=False,
+        )
+        expected = {
+            (row['product_id'], row['operation__source_location_id']): row['total']
+            for row in open_lines.values('product_id', 'operation__source_location_id')
+            .annotate(total=Sum('quantity_demanded')).order_by()
+        }
+        current = {(p, l): q for p, l, q in StockReservation.objects.values_list('product_id', 'location_id', 'quantity')}
+        drift = []
+        for key in sorted(set(expected) | set(current)):
+            if expected.get(key, zero) != current.get(key, zero):
+                drift.append({'product_id': key[0], 'location_id': key[1],
+                              'expected': expected.get(key, zero), 'actual': current.get(key, zero)})
+
+        if fix:
+            OperationLine.objects.exclude(pk__in=open_lines.values('pk')).exclude(quantity_reserved=0).update(quantity_reserved=0)
+            open_lines.exclude(quantity_reserved=F('quantity_demanded')).update(quantity_reserved=F('quantity_demanded'))
+            if drift:
+                StockReservation.objects.bulk_create(
+                    [StockReservation(product_id=d['product_id'], location_id=d['location_id'], quantity=d['expected'])
+                     for d in drift],
+                    update_conflicts=True, unique_fields=['product', 'location'], update_fields=['quantity']
+                )
+        return drift
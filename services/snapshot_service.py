@@ -0,0 +1,172 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+from inventory.models import ProductStock, StockMovement, StockSnapshot, StockSnapshotLine, Location, Product
+from services.stock_export_service import iter_chunks
+
+
+class SnapshotService:
+    """
+    Periodic checkpoints of ProductStock, used to answer "stock as of <time>" queries.
+
+    A snapshot copies every non-zero ProductStock row and records the highest movement id
+    it already reflects. Stock as of T is then the latest snapshot taken at or before T,
+    plus the movements after that id with timestamp <= T. Without a snapshot the whole
+    ledger up to T is replayed.
+    """
+
+    CHUNK_SIZE = 5000
+
+    @staticmethod
+    def take(notes: str = '') -> StockSnapshot:
+        with transaction.atomic():
+            # The copied quantities and last_movement_id must describe the same moment
+            SnapshotService.hold_stock_writers()
+            snapshot = StockSnapshot.objects.create(
+                taken_at=timezone.now(),
+                last_movement_id=StockMovement.objects.aggregate(last=Max('id'))['last'] or 0,
+                notes=notes,
+            )
+            rows = ProductStock.objects.exclude(quantity=0).order_by('id').values_list(
+                'product_id', 'location_id', 'quantity'
+            ).iterator(chunk_size=SnapshotService.CHUNK_SIZE)
+            for chunk in iter_chunks(rows, SnapshotService.CHUNK_SIZE):
+                StockSnapshotLine.objects.bulk_create([
+                    StockSnapshotLine(snapshot=snapshot, product_id=p, location_id=l, quantity=q)
+                    for p, l, q in chunk
+                ])
+                snapshot.line_count += len(chunk)
+            snapshot.save(update_fields=['line_count'])
+        return snapshot
+
+    @staticmethod
+    def hold_stock_writers():
+        """
+        Inside a transaction: waits for in-flight stock writers and holds new ones off until
+        commit. Stock rows and their movements are written in one transaction, so this gives a
+        consistent view of both, and every movement id up to the current maximum is committed.
+        SQLite already serializes writers.
+
+        Both tables are locked: some writers only insert movements on rows they lock with
+        SELECT .. FOR UPDATE, which SHARE on ProductStock lets through (ledger corrections).
+        ProductStock comes first, as in the writers that update stock and then log the move.
+        """
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'LOCK TABLE {ProductStock._meta.db_table}, {StockMovement._meta.db_table} IN SHARE MODE'
+                )
+
+    @staticmethod
+    def take_if_due(min_interval: timedelta, notes: str = ''):
+        """
+        Takes a snapshot unless one was taken within `min_interval`. Meant for cron.
+        """
+        latest = StockSnapshot.objects.order_by('-taken_at').first()
+        if latest and timezone.now() - latest.taken_at < min_interval:
+            return None
+        return SnapshotService.take(notes)
+
+    @staticmethod
+    def prune(keep: int) -> int:
+        """
+        Deletes all but the `keep` most recent snapshots. Returns how many were removed.
+        """
+        stale = list(StockSnapshot.objects.order_by('-taken_at').values_list('id', flat=True)[keep:])
+        StockSnapshot.objects.filter(id__in=stale).delete()
+        return len(stale)
+
+    @staticmethod
+    def nearest(as_of):
+        return StockSnapshot.objects.filter(taken_at__lte=as_of).order_by('-taken_at').first()
+
+    @staticmethod
+    def stock_as_of(as_of=None, product_id=None, location_id=None, warehouse_id=None, snapshot=None):
+        """
+        Returns (quantities, snapshot, replayed) where quantities maps (product_id, location_id)
+        to the non-zero quantity as of `as_of` (default: now), snapshot is the checkpoint used
+        (or None) and replayed is the number of movements applied on top of it.
+        Pass `snapshot` to start from a specific checkpoint instead of the nearest one.
+        """
+        if snapshot is None and as_of is not None:
+            snapshot = SnapshotService.nearest(as_of)
+        elif snapshot is None:
+            snapshot = StockSnapshot.objects.order_by('-taken_at').first()
+
+        quantities = {}
+        if snapshot is not None:
+            lines = SnapshotService._scope(snapshot.lines.all(), 'location', product_id, location_id, warehouse_id)
+            for p, l, q in lines.values_list('product_id', 'location_id', 'quantity').iterator(
+                    chunk_size=SnapshotService.CHUNK_SIZE):
+                quantities[(p, l)] = q
+
+        movements = StockMovement.objects.all()
+        if snapshot is not None:
+            movements = movements.filter(id__gt=snapshot.last_movement_id)
+        if as_of is not None:
+            movements = movements.filter(timestamp__lte=as_of)
+
+        replayed = 0
+        for side, sign in (('to_location', 1), ('from_location', -1)):
+            scoped = SnapshotService._scope(
+                movements.filter(**{f'{side}__isnull': False}), side, product_id, location_id, warehouse_id
+            )
+            for row in scoped.values('product_id', f'{side}_id').annotate(total=Sum('quantity'), n=Count('id')).order_by():
+                key = (row['product_id'], row[f'{side}_id'])
+                quantities[key] = quantities.get(key, Decimal('0')) + sign * row['total']
+                replayed += row['n']
+
+        return {k: v for k, v in quantities.items() if v}, snapshot, replayed
+
+    @staticmethod
+    def _scope(queryset, location_field, product_id, location_id, warehouse_id):
+        if product_id:
+            queryset = queryset.filter(product_id=product_id)
+        if location_id:
+            queryset = queryset.filter(**{f'{location_field}_id': location_id})
+        if warehouse_id:
+            queryset = queryset.filter(**{f'{location_field}__warehouse_id': warehouse_id})
+        return queryset
+
+    @staticmethod
+    def report(as_of=None, **filters):
+        """
+        stock_as_of() resolved to display rows ordered like the stock export:
+        (sku, name, warehouse, location, quantity).
+        """
+        quantities, snapshot, replayed = SnapshotService.stock_as_of(as_of, **filters)
+        products = Product.objects.in_bulk({p for p, _ in quantities})
+        locations = Location.objects.select_related('warehouse').in_bulk({l for _, l in quantities})
+        rows = []
+        for (p, l), quantity in quantities.items():
+            product, location = products[p], locations[l]
+            rows.append((product.sku, product.name, location.warehouse.code, location.code, quantity))
+        rows.sort(key=lambda r: (r[2], r[3], r[0]))
+        return rows, snapshot, replayed
+
+    @staticmethod
+    def verify(snapshot=None):
+        """
+        Replays every movement after `snapshot` (default: the latest) and compares the result
+        with the live ProductStock table. Returns a list of mismatches; empty when consistent.
+        """
+        if snapshot is None:
+            snapshot = StockSnapshot.objects.order_by('-taken_at').first()
+        with transaction.atomic():
+            SnapshotService.hold_stock_writers()
+            replayed, _, _ = SnapshotService.stock_as_of(snapshot=snapshot)
+            live = {
+                (p, l): q for p, l, q in ProductStock.objects.exclude(quantity=0)
+                .values_list('product_id', 'location_id', 'quantity').iterator(chunk_size=SnapshotService.CHUNK_SIZE)
+            }
+
+        mismatches = []
+        for key in sorted(set(replayed) | set(live)):
+            expected, actual = live.get(key, Decimal('0')), replayed.get(key, Decimal('0'))
+            if expected != actual:
+                mismatches.append({
+                    'product_id': key[0], 'location_id': key[1], 'live': expected, 'replayed': actual,
+                })
+        return mismatches
@@ -0,0 +1,139 @@
+import csv
+import json
+from decimal import Decimal
+from itertools import islice
+from inventory.models import Product, ProductStock, StockMovement
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'columnar')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'columnar': 'application/x-ndjson',
+}
+FILE_EXTENSIONS = {
+    'csv': 'csv',
+    'jsonl': 'jsonl',
+    'columnar': 'columnar.jsonl',
+}
+
+
+class _Echo:
+    """
+    File-like object whose write() returns the line, so csv.writer can feed a generator.
+    """
+    def write(self, value):
+        return value
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_chunks(rows, size):
+    """
+    Groups an iterable into lists of at most `size` items without reading ahead.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def encode_csv(columns, rows):
+    """
+    Yields a CSV document line by line: a header, then one line per row tuple.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def encode_jsonl(columns, rows):
+    """
+    Yields one JSON object per line, keyed by column name.
+    """
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(_plain, row)))) + '\n'
+
+
+def encode_columnar(columns, rows, row_group_size: int = 10000):
+    """
+    Parquet-style layout without the dependency: one JSON object per row group, holding an
+    array of values per column. Column arrays compress well and load straight into dataframes.
+    """
+    for group in iter_chunks(rows, row_group_size):
+        data = {name: [_plain(value) for value in values] for name, values in zip(columns, zip(*group))}
+        yield json.dumps({'row_count': len(group), 'columns': data}) + '\n'
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'jsonl': encode_jsonl,
+    'columnar': encode_columnar,
+}
+
+
+class StockExportService:
+    """
+    Streaming exports of the product catalogue, stock by location and the stock ledger.
+    Rows are read with a server-side cursor (.iterator) and projected to plain tuples,
+    so memory stays flat regardless of table size.
+    """
+
+    CHUNK_SIZE = 2000
+
+    PRODUCT_COLUMNS = ('sku', 'name', 'category', 'uom', 'min_stock_level')
+    STOCK_COLUMNS = ('sku', 'name', 'warehouse', 'location', 'quantity')
+    LEDGER_COLUMNS = (
+        'id', 'timestamp', 'sku', 'transaction_type', 'quantity', 'balance_after',
+        'from_warehouse', 'from_location', 'to_warehouse', 'to_location', 'reference', 'user', 'notes',
+    )
+
+    @staticmethod
+    def product_rows():
+        return Product.objects.order_by('sku').values_list(
+            'sku', 'name', 'category__name', 'uom', 'min_stock_level'
+        ).iterator(chunk_size=StockExportService.CHUNK_SIZE)
+
+    @staticmethod
+    def stock_rows(warehouse_id=None, location_id=None, include_zero: bool = False):
+        queryset = ProductStock.objects.all()
+        if warehouse_id:
+            queryset = queryset.filter(location__warehouse_id=warehouse_id)
+        if location_id:
+            queryset = queryset.filter(location_id=location_id)
+        if not include_zero:
+            queryset = queryset.exclude(quantity=0)
+        return queryset.order_by('location__warehouse__code', 'location__code', 'product__sku').values_list(
+            'product__sku', 'product__name', 'location__warehouse__code', 'location__code', 'quantity'
+        ).iterator(chunk_size=StockExportService.CHUNK_SIZE)
+
+    @staticmethod
+    def ledger_rows(queryset=None):
+        """
+        Ledger rows in chronological order, projected to LEDGER_COLUMNS.
+        Pass a filtered StockMovement queryset (e.g. MovementFilter(...).qs) to restrict it.
+        """
+        queryset = StockMovement.objects.all() if queryset is None else queryset
+        return queryset.order_by('timestamp', 'id').values_list(
+            'id', 'timestamp', 'product__sku', 'transaction_type', 'quantity', 'balance_after',
+            'from_location__warehouse__code', 'from_location__code',
+            'to_location__warehouse__code', 'to_location__code',
+            'reference_doc__reference_number', 'user__username', 'notes',
+        ).iterator(chunk_size=StockExportService.CHUNK_SIZE)
+
+    @staticmethod
+    def encode(file_format: str, columns, rows):
+        """
+        Returns a generator of text chunks for the given format.
+        """
+        if file_format not in ENCODERS:
+            raise ValueError(f"Unsupported format: {file_format}. Use one of: {', '.join(EXPORT_FORMATS)}")
+        return ENCODERS[file_format](columns, rows)
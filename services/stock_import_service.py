@@ -0,0 +1,243 @@
+import codecs
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+from inventory.models import Category, Product, Location, Operation, OperationLine, DocumentStatus
+from services.stock_service import StockBatch
+from services.stock_export_service import iter_chunks
+from services.product_search_service import ProductSearchService
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+# ProductStock.quantity is max_digits=10, decimal_places=2
+MAX_QUANTITY = Decimal('1e8')
+# Product.min_stock_level is a PositiveIntegerField
+MAX_MIN_STOCK_LEVEL = 2147483647
+
+
+class ImportFileError(ValueError):
+    """
+    Raised when an import file cannot be read at all (bad format, missing columns).
+    Problems with individual rows are reported in the result instead.
+    """
+
+
+def read_rows(stream, file_format: str, required=()):
+    """
+    Parses a binary stream incrementally, yielding (row_number, dict) pairs.
+    Only one line is held in memory at a time. For CSV the header must contain `required`.
+    """
+    if file_format not in IMPORT_FORMATS:
+        raise ImportFileError(f"Unsupported format: {file_format}. Use one of: {', '.join(IMPORT_FORMATS)}")
+
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        header = {name.strip() for name in reader.fieldnames or []}
+        missing = [name for name in required if name not in header]
+        if missing:
+            raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+        for row in reader:
+            yield reader.line_num, {k.strip(): (v or '').strip() for k, v in row.items() if k}
+    else:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ImportFileError(f"Line {number}: invalid JSON ({e.msg})")
+            if not isinstance(row, dict):
+                raise ImportFileError(f"Line {number}: expected a JSON object")
+            yield number, {k: '' if v is None else str(v).strip() for k, v in row.items()}
+
+
+def format_from_name(name: str, default: str = 'csv') -> str:
+    name = (name or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+PRODUCT_COLUMNS = ('sku',)
+BALANCE_COLUMNS = ('sku', 'warehouse', 'location', 'quantity')
+
+
+class StockImportService:
+    """
+    Bulk imports of the product catalogue and opening stock balances.
+
+    Rows are parsed as a stream and validated/written one chunk at a time with bulk queries.
+    Invalid rows are skipped and reported with their line number; valid rows are applied.
+    """
+
+    CHUNK_SIZE = 1000
+    MAX_ERRORS = 1000
+
+    @staticmethod
+    def import_products(rows, chunk_size: int = None, dry_run: bool = False) -> dict:
+        """
+        Creates or updates products by SKU. Columns: sku, name, category, uom, min_stock_level.
+        Unknown categories are created. Each chunk commits on its own.
+        """
+        result = {'created': 0, 'updated': 0, 'errors': [], 'error_count': 0}
+        for chunk in iter_chunks(rows, chunk_size or StockImportService.CHUNK_SIZE):
+            with transaction.atomic():
+                StockImportService._import_product_chunk(chunk, result, dry_run)
+        result['errors'].sort(key=lambda e: e['line'])
+        return result
+
+    @staticmethod
+    def _import_product_chunk(chunk, result, dry_run):
+        # Validate; a later row for the same SKU wins
+        valid = {}
+        for number, row in chunk:
+            sku = row.get('sku', '')
+            if not sku:
+                StockImportService._error(result, number, 'sku is required')
+                continue
+            if len(sku) > 50:
+                StockImportService._error(result, number, 'sku is longer than 50 characters')
+                continue
+            if len(row.get('name', '')) > 200:
+                StockImportService._error(result, number, 'name is longer than 200 characters')
+                continue
+            min_level = row.get('min_stock_level')
+            if min_level in ('', None):
+                min_level = ''
+            else:
+                try:
+                    level = Decimal(str(min_level))
+                except (InvalidOperation, ValueError, OverflowError):
+                    level = None
+                # nan/inf, fractions and out-of-range levels are row errors, not truncated or a crash
+                if (level is None or not level.is_finite() or level != level.to_integral_value()
+                        or not 0 <= level <= MAX_MIN_STOCK_LEVEL):
+                    StockImportService._error(result, number, 'min_stock_level must be a non-negative integer')
+                    continue
+                min_level = int(level)
+            valid[sku] = (number, row, min_level)
+
+        existing = Product.objects.in_bulk(list(valid), field_name='sku')
+        for sku, (number, row, _) in list(valid.items()):
+            if sku not in existing and not row.get('name'):
+                StockImportService._error(result, number, 'name is required for new products')
+                del valid[sku]
+        if not valid:
+            return
+
+        category_names = {row['category'] for _, row, _ in valid.values() if row.get('category')}
+        categories = Category.objects.in_bulk(list(category_names), field_name='name')
+        missing = category_names - set(categories)
+        if missing and not dry_run:
+            Category.objects.bulk_create([Category(name=name) for name in sorted(missing)], ignore_conflicts=True)
+            categories = Category.objects.in_bulk(list(category_names), field_name='name')
+
+        to_create, to_update = [], []
+        for sku, (number, row, min_level) in valid.items():
+            product = existing.get(sku) or Product(sku=sku, uom='pcs')
+            if row.get('name'):
+                product.name = row['name']
+            if row.get('category'):
+                product.category = categories.get(row['category'])
+            if row.get('uom'):
+                product.uom = row['uom'][:20]
+            if min_level != '':
+                product.min_stock_level = min_level
+            (to_update if product.pk else to_create).append(product)
+
+        if not dry_run:
+            Product.objects.bulk_create(to_create)
+            Product.objects.bulk_create(to_update, update_conflicts=True, unique_fields=['id'],
+                                        update_fields=['name', 'category', 'uom', 'min_stock_level'])
+            # bulk_create sends no signals
+            ProductSearchService.invalidate_on_commit()
+        result['created'] += len(to_create)
+        result['updated'] += len(to_update)
+
+    @staticmethod
+    def import_opening_balances(rows, user=None, notes: str = '', chunk_size: int = None, dry_run: bool = False) -> dict:
+        """
+        Sets stock to the given quantities through a single validated ADJUSTMENT operation.
+        Columns: sku, warehouse (code), location (code), quantity.
+
+        Stock rows are locked and written per chunk through StockBatch, so the ledger gets one
+        ADJUSTMENT movement per changed pair and totals/alerts stay consistent. The whole import
+        is one transaction; with dry_run it is validated and rolled back.
+        """
+        result = {'operation': None, 'rows': 0, 'adjusted': 0, 'errors': [], 'error_count': 0}
+        locations = {
+            (loc.warehouse.code, loc.code): loc for loc in Location.objects.select_related('warehouse')
+        }
+
+        with transaction.atomic():
+            operation = Operation.objects.create(
+                operation_type=Operation.Type.ADJUSTMENT,
+                status=DocumentStatus.DONE,
+                created_by=user,
+                validated_at=timezone.now(),
+            )
+
+            for chunk in iter_chunks(rows, chunk_size or StockImportService.CHUNK_SIZE):
+                valid = StockImportService._validate_balance_chunk(chunk, locations, result)
+                if not valid:
+                    continue
+
+                batch = StockBatch(operation, {(p.id, loc.id) for p, loc, _ in valid}, user)
+                lines = []
+                for product, location, quantity in valid:
+                    before = len(batch.movements)
+                    batch.adjust(product, location, quantity, notes=notes or 'Opening balance')
+                    result['adjusted'] += len(batch.movements) - before
+                    lines.append(OperationLine(operation=operation, product=product,
+                                               quantity_demanded=quantity, quantity_done=quantity))
+                batch.flush()
+                OperationLine.objects.bulk_create(lines)
+                result['rows'] += len(valid)
+
+            if dry_run or not result['rows']:
+                # Leaving the block rolls it back, with its on-commit hooks, nested or not
+                transaction.set_rollback(True)
+            else:
+                result['operation'] = operation.reference_number
+        return result
+
+    @staticmethod
+    def _validate_balance_chunk(chunk, locations, result):
+        skus = {row.get('sku', '') for _, row in chunk}
+        products = Product.objects.in_bulk([s for s in skus if s], field_name='sku')
+
+        valid = []
+        for number, row in chunk:
+            product = products.get(row.get('sku', ''))
+            if product is None:
+                StockImportService._error(result, number, f"unknown sku '{row.get('sku', '')}'")
+                continue
+            location = locations.get((row.get('warehouse', ''), row.get('location', '')))
+            if location is None:
+                StockImportService._error(
+                    result, number, f"unknown location '{row.get('location', '')}' in warehouse '{row.get('warehouse', '')}'"
+                )
+                continue
+            try:
+                quantity = Decimal(row.get('quantity', ''))
+            except InvalidOperation:
+                StockImportService._error(result, number, f"invalid quantity '{row.get('quantity', '')}'")
+                continue
+            if not quantity.is_finite() or quantity < 0:
+                StockImportService._error(result, number, 'quantity must be a non-negative number')
+                continue
+            if quantity.as_tuple().exponent < -2 or quantity >= MAX_QUANTITY:
+                StockImportService._error(result, number, f"quantity '{row.get('quantity')}' does not fit the stock field")
+                continue
+            valid.append((product, location, quantity))
+        return valid
+
+    @staticmethod
+    def _error(result, number, message):
+        if len(result['errors']) < StockImportService.MAX_ERRORS:
+            result['errors'].append({'line': number, 'error': message})
+        result['error_count'] += 1
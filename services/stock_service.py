@@ -1,10 +1,57 @@
-from django.db import transaction
-from django.db.models import F
-from django.utils import timezone
+import functools
+import random
+import time
+from django.conf import settings
+from django.db import transaction, OperationalError
+from django.db.models import F, Q
 from decimal import Decimal
-from typing import Optional
-from inventory.models import Product, Location, ProductStock, StockMovement, Operation, LowStockAlert
-from services.notification_service import NotificationService
+from inventory.models import Product, Location, ProductStock, StockMovement, Operation
+from services.low_stock_service import LowStockService
+from services.stock_summary_service import StockSummaryService
+from services.dashboard_service import DashboardService
+
+RETRYABLE_SQLSTATES = {'40001', '40P01'}  # serialization_failure, deadlock_detected
+
+
+def _is_retryable(exc: OperationalError) -> bool:
+    """
+    True for lock conflicts that are safe to retry from the start of the transaction.
+    """
+    cause = exc.__cause__
+    sqlstate = getattr(cause, 'pgcode', None) or getattr(getattr(cause, 'diag', None), 'sqlstate', None)
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return True
+    message = str(exc).lower()
+    return any(text in message for text in ('deadlock', 'could not serialize', 'database is locked', 'database table is locked'))
+
+
+def retry_on_conflict(func):
+    """
+    Runs func in its own transaction and retries it on deadlocks and serialization failures,
+    with bounded exponential backoff and jitter.
+
+    Retrying is only possible at the outermost transaction; when called inside an existing
+    atomic block the conflict is propagated so that the caller's transaction can be retried.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if transaction.get_connection().in_atomic_block:
+            return func(*args, **kwargs)
+
+        max_attempts = getattr(settings, 'STOCK_LOCK_MAX_ATTEMPTS', 5)
+        base_delay = getattr(settings, 'STOCK_LOCK_BACKOFF_BASE', 0.05)
+        max_delay = getattr(settings, 'STOCK_LOCK_BACKOFF_MAX', 1.0)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == max_attempts or not _is_retryable(exc):
+                    raise
+                delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+    return wrapper
+
 
 class StockService:
     """
@@ -16,58 +63,10 @@ class StockService:
         """
         Retrieves or creates a ProductStock entry with a row-level lock.
         Ensures that subsequent updates in the same transaction are safe from race conditions.
+        Goes through lock_stocks, which creates a missing row with bulk_create: save() would
+        send post_save and recompute the product's totals unlocked, mid-transaction.
         """
-        # Use select_for_update() effectively by getting the object inside the lock
-        # If it doesn't exist, create it. If it does, lock it.
-        stock, created = ProductStock.objects.select_for_update().get_or_create(
-            product=product,
-            location=location,
-            defaults={'quantity': 0}
-        )
-        return stock
-
-    @staticmethod
-    def _check_and_create_low_stock_alert(product: Product, location: Location, current_qty: Decimal) -> None:
-        """
-        Checks if stock is below threshold and creates an active alert if one doesn't exist.
-        Also sends email notification to manager.
-        """
-        if current_qty <= product.min_stock_level:
-            # Check if there is already an active alert
-            active_alert_exists = LowStockAlert.objects.filter(
-                product=product,
-                location=location,
-                is_resolved=False
-            ).exists()
-
-            if not active_alert_exists:
-                LowStockAlert.objects.create(
-                    product=product,
-                    location=location,
-                    current_quantity=current_qty,
-                    threshold=product.min_stock_level
-                )
-                
-                # Send email notification
-                NotificationService.notify_low_stock(product, location, current_qty)
-
-    @staticmethod
-    def _resolve_low_stock_alert(product: Product, location: Location, current_qty: Decimal) -> None:
-        """
-        Resolves any active low stock alerts if stock is now above threshold.
-        """
-        if current_qty > product.min_stock_level:
-            active_alerts = LowStockAlert.objects.filter(
-                product=product,
-                location=location,
-                is_resolved=False
-            )
-            if active_alerts.exists():
-                active_alerts.update(
-                    is_resolved=True,
-                    resolved_at=timezone.now(),
-                    current_quantity=current_qty # Update with resolving quantity
-                )
+        return StockService.lock_stocks({(product.id, location.id)})[(product.id, location.id)]
 
     @staticmethod
     @transaction.atomic
@@ -80,12 +79,13 @@ class StockService:
 
         # Lock and update
         stock = StockService._get_or_create_stock_locked(product, location)
-        stock.quantity = F('quantity') + quantity
-        stock.save()
+        ProductStock.objects.filter(pk=stock.pk).update(quantity=F('quantity') + quantity)
         stock.refresh_from_db()
+        StockSummaryService.apply_deltas({(product.id, location.warehouse_id): quantity})
+        DashboardService.invalidate_on_commit()
 
-        # Check for alert resolution
-        StockService._resolve_low_stock_alert(product, location, stock.quantity)
+        # Alert resolution is evaluated after commit
+        LowStockService.touch(resolve=[(product.id, location.id)])
 
         # Create Ledger Entry
         StockMovement.objects.create(
@@ -115,12 +115,13 @@ class StockService:
         if stock.quantity < quantity:
             raise ValueError(f"Insufficient stock for {product.sku} at {location.name}. Available: {stock.quantity}, Requested: {quantity}")
 
-        stock.quantity = F('quantity') - quantity
-        stock.save()
+        ProductStock.objects.filter(pk=stock.pk).update(quantity=F('quantity') - quantity)
         stock.refresh_from_db()
+        StockSummaryService.apply_deltas({(product.id, location.warehouse_id): -quantity})
+        DashboardService.invalidate_on_commit()
 
-        # Check for low stock
-        StockService._check_and_create_low_stock_alert(product, location, stock.quantity)
+        # Low stock is evaluated after commit
+        LowStockService.touch(check=[(product.id, location.id)])
 
         # Create Ledger Entry
         StockMovement.objects.create(
@@ -136,11 +137,14 @@ class StockService:
         return stock
 
     @staticmethod
+    @retry_on_conflict
     @transaction.atomic
     def move_stock(product: Product, from_loc: Location, to_loc: Location, quantity: Decimal, operation: Operation, user=None, notes: str = "") -> None:
         """
         Moves stock from one location to another.
+        Both rows are locked up front in canonical order before either side is touched.
         """
+        StockService.lock_stocks({(product.id, from_loc.id), (product.id, to_loc.id)})
         StockService.decrease_stock(product, from_loc, quantity, operation, user, notes=f"Transfer Out: {notes}")
         StockService.increase_stock(product, to_loc, quantity, operation, user, notes=f"Transfer In: {notes}")
 
@@ -161,15 +165,16 @@ class StockService:
         if diff == 0:
             return stock
 
-        stock.quantity = new_quantity
-        stock.save()
+        ProductStock.objects.filter(pk=stock.pk).update(quantity=new_quantity)
         stock.refresh_from_db()
+        StockSummaryService.apply_deltas({(product.id, location.warehouse_id): diff})
+        DashboardService.invalidate_on_commit()
 
-        # Check alerts
+        # Alerts are evaluated after commit
         if diff > 0:
-             StockService._resolve_low_stock_alert(product, location, stock.quantity)
+            LowStockService.touch(resolve=[(product.id, location.id)])
         else:
-             StockService._check_and_create_low_stock_alert(product, location, stock.quantity)
+            LowStockService.touch(check=[(product.id, location.id)])
 
         # Log the adjustment
         movement_data = {
@@ -188,3 +193,148 @@ class StockService:
             StockMovement.objects.create(from_location=location, **movement_data)
         
         return stock
+
+    @staticmethod
+    def lock_stocks(pairs) -> dict:
+        """
+        Locks every ProductStock row for the given (product_id, location_id) pairs in canonical
+        (product_id, location_id) order with a single query, so that concurrent operations touching
+        overlapping rows always acquire their locks in the same order and cannot deadlock.
+        Missing rows are created with zero quantity first so that every pair ends up locked.
+        Returns a dict keyed by (product_id, location_id).
+        """
+        pairs = set(pairs)
+        if not pairs:
+            return {}
+
+        # Group by location so the WHERE clause stays flat regardless of line count
+        by_location = {}
+        for product_id, location_id in pairs:
+            by_location.setdefault(location_id, []).append(product_id)
+        condition = Q()
+        for location_id, product_ids in by_location.items():
+            condition |= Q(location_id=location_id, product_id__in=product_ids)
+        rows = ProductStock.objects.filter(condition)
+
+        # Create missing rows before locking, so the single locked read below covers every pair
+        existing = set(rows.values_list('product_id', 'location_id'))
+        missing = sorted(pairs - existing)
+        if missing:
+            ProductStock.objects.bulk_create(
+                [ProductStock(product_id=p, location_id=l, quantity=0) for p, l in missing],
+                ignore_conflicts=True
+            )
+
+        locked = rows.select_for_update().order_by('product_id', 'location_id')
+        return {(s.product_id, s.location_id): s for s in locked}
+
+
+class StockBatch:
+    """
+    In-memory accumulator for set-based stock changes within a single operation.
+
+    Mirrors the StockService increase/decrease/move/adjust rules against rows locked up front
+    by StockService.lock_stocks, then writes stock and ledger in bulk on flush(). Alerts for
+    the touched pairs are evaluated after commit by LowStockService.
+    """
+
+    def __init__(self, operation: Operation, pairs, user=None):
+        self.operation = operation
+        self.user = user
+        self.stocks = StockService.lock_stocks(pairs)
+        self._original = {key: stock.quantity for key, stock in self.stocks.items()}
+        self._warehouses = {}
+        self.movements = []
+        self._dirty = set()
+        self._check = set()
+        self._resolve = set()
+
+    def _stock(self, product: Product, location: Location) -> ProductStock:
+        self._warehouses[location.id] = location.warehouse_id
+        return self.stocks[(product.id, location.id)]
+
+    def available(self, product: Product, location: Location) -> Decimal:
+        return self._stock(product, location).quantity
+
+    def _log(self, product, quantity, transaction_type, balance_after, notes, from_location=None, to_location=None):
+        self.movements.append(StockMovement(
+            product=product,
+            from_location=from_location,
+            to_location=to_location,
+            quantity=quantity,
+            transaction_type=transaction_type,
+            reference_doc=self.operation,
+            user=self.user,
+            balance_after=balance_after,
+            notes=notes
+        ))
+
+    def increase(self, product: Product, location: Location, quantity: Decimal, notes: str = "") -> None:
+        if quantity <= 0:
+            raise ValueError(f"Increase quantity must be positive. Got {quantity}")
+
+        stock = self._stock(product, location)
+        stock.quantity += quantity
+        self._dirty.add(stock.pk)
+        self._resolve.add((product, location))
+        self._log(product, quantity, self.operation.operation_type, stock.quantity, notes, to_location=location)
+
+    def decrease(self, product: Product, location: Location, quantity: Decimal, notes: str = "") -> None:
+        if quantity <= 0:
+            raise ValueError(f"Decrease quantity must be positive. Got {quantity}")
+
+        stock = self._stock(product, location)
+        if stock.quantity < quantity:
+            raise ValueError(f"Insufficient stock for {product.sku} at {location.name}. Available: {stock.quantity}, Requested: {quantity}")
+
+        stock.quantity -= quantity
+        self._dirty.add(stock.pk)
+        self._check.add((product, location))
+        self._log(product, quantity, self.operation.operation_type, stock.quantity, notes, from_location=location)
+
+    def move(self, product: Product, from_loc: Location, to_loc: Location, quantity: Decimal, notes: str = "") -> None:
+        self.decrease(product, from_loc, quantity, notes=f"Transfer Out: {notes}")
+        self.increase(product, to_loc, quantity, notes=f"Transfer In: {notes}")
+
+    def adjust(self, product: Product, location: Location, new_quantity: Decimal, notes: str = "") -> None:
+        if new_quantity < 0:
+            raise ValueError("New quantity cannot be negative")
+
+        stock = self._stock(product, location)
+        diff = new_quantity - stock.quantity
+        if diff == 0:
+            return
+
+        stock.quantity = new_quantity
+        self._dirty.add(stock.pk)
+        if diff > 0:
+            self._resolve.add((product, location))
+            self._log(product, diff, Operation.Type.ADJUSTMENT, stock.quantity, notes, to_location=location)
+        else:
+            self._check.add((product, location))
+            self._log(product, -diff, Operation.Type.ADJUSTMENT, stock.quantity, notes, from_location=location)
+
+    def flush(self) -> None:
+        """
+        Writes all accumulated changes: one upsert for stock, one bulk_create for the ledger and
+        the stock summary deltas, and queues the touched pairs for after-commit alert evaluation.
+        """
+        dirty = [s for s in self.stocks.values() if s.pk in self._dirty]
+        if dirty:
+            # Primary-key upsert rather than bulk_update, whose per-row CASE expressions dominated
+            # large batches: one INSERT .. ON CONFLICT (id) DO UPDATE. Every row exists and is
+            # locked (lock_stocks), so each one takes the update branch and none is inserted.
+            ProductStock.objects.bulk_create(dirty, update_conflicts=True, unique_fields=['id'], update_fields=['quantity'])
+            deltas = {}
+            for stock in dirty:
+                key = (stock.product_id, self._warehouses[stock.location_id])
+                deltas[key] = deltas.get(key, 0) + stock.quantity - self._original[(stock.product_id, stock.location_id)]
+            StockSummaryService.apply_deltas(deltas)
+            DashboardService.invalidate_on_commit()
+        if self.movements:
+            StockMovement.objects.bulk_create(self.movements)
+        if self._check or self._resolve:
+            LowStockService.touch(
+                check={(p.id, l.id) for p, l in self._check},
+                resolve={(p.id, l.id) for p, l in self._resolve},
+            )
@@ -0,0 +1,136 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Q, Sum
+from inventory.models import ProductStock, ProductStockTotal, WarehouseStockTotal
+
+
+class StockSummaryService:
+    """
+    Maintains the materialized ProductStockTotal / WarehouseStockTotal tables that back
+    every "total stock" read path, so those never aggregate ProductStock per request.
+    """
+
+    @staticmethod
+    def apply_deltas(deltas) -> None:
+        """
+        Adds quantity deltas keyed by (product_id, warehouse_id) to the summary tables.
+        Must run inside the transaction that changed ProductStock. Rows are locked in
+        canonical order, after the stock rows, so this cannot introduce new deadlocks.
+        """
+        warehouse_deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not warehouse_deltas:
+            return
+
+        product_deltas = defaultdict(Decimal)
+        for (product_id, _), delta in warehouse_deltas.items():
+            product_deltas[product_id] += delta
+
+        # Product totals
+        ProductStockTotal.objects.bulk_create(
+            [ProductStockTotal(product_id=pid, quantity=0) for pid in sorted(product_deltas)],
+            ignore_conflicts=True
+        )
+        totals = list(ProductStockTotal.objects.select_for_update().filter(
+            product_id__in=product_deltas
+        ).order_by('product_id'))
+        for total in totals:
+            total.quantity += product_deltas[total.product_id]
+        ProductStockTotal.objects.bulk_create(totals, update_conflicts=True, unique_fields=['product'], update_fields=['quantity'])
+
+        # Warehouse totals
+        by_warehouse = defaultdict(list)
+        for product_id, warehouse_id in warehouse_deltas:
+            by_warehouse[warehouse_id].append(product_id)
+        condition = Q()
+        for warehouse_id, product_ids in by_warehouse.items():
+            condition |= Q(warehouse_id=warehouse_id, product_id__in=product_ids)
+
+        WarehouseStockTotal.objects.bulk_create(
+            [WarehouseStockTotal(product_id=p, warehouse_id=w, quantity=0) for p, w in sorted(warehouse_deltas)],
+            ignore_conflicts=True
+        )
+        rows = list(WarehouseStockTotal.objects.select_for_update().filter(condition).order_by('product_id', 'warehouse_id'))
+        for row in rows:
+            row.quantity += warehouse_deltas[(row.product_id, row.warehouse_id)]
+        WarehouseStockTotal.objects.bulk_create(rows, update_conflicts=True, unique_fields=['id'], update_fields=['quantity'])
+
+    @staticmethod
+    def _expected(product_ids=None):
+        """
+        Computes summary values from ProductStock, optionally for a subset of products.
+        """
+        stocks = ProductStock.objects.all()
+        if product_ids is not None:
+            stocks = stocks.filter(product_id__in=product_ids)
+
+        warehouse_totals = {}
+        product_totals = defaultdict(Decimal)
+        for row in stocks.values('product_id', 'location__warehouse_id').annotate(total=Sum('quantity')).order_by():
+            warehouse_totals[(row['product_id'], row['location__warehouse_id'])] = row['total']
+            product_totals[row['product_id']] += row['total']
+        return product_totals, warehouse_totals
+
+    @staticmethod
+    @transaction.atomic
+    def refresh_products(product_ids) -> None:
+        """
+        Recomputes the summary rows of the given products from ProductStock.
+        Used for writes that bypass StockService (admin edits, fixtures).
+        """
+        product_ids = sorted(set(product_ids))
+        product_totals, warehouse_totals = StockSummaryService._expected(product_ids)
+
+        ProductStockTotal.objects.filter(product_id__in=product_ids).delete()
+        WarehouseStockTotal.objects.filter(product_id__in=product_ids).delete()
+        ProductStockTotal.objects.bulk_create([
+            ProductStockTotal(product_id=pid, quantity=qty) for pid, qty in product_totals.items()
+        ])
+        WarehouseStockTotal.objects.bulk_create([
+            WarehouseStockTotal(product_id=pid, warehouse_id=wid, quantity=qty)
+            for (pid, wid), qty in warehouse_totals.items()
+        ])
+
+    @staticmethod
+    @transaction.atomic
+    def reconcile(fix: bool = True, batch_size: int = 1000) -> list:
+        """
+        Compares the summary tables against ProductStock.
+        Returns a list of drift records; when fix is True the drifting rows are rewritten.
+        """
+        product_totals, warehouse_totals = StockSummaryService._expected()
+        zero = Decimal('0')
+        drift = []
+
+        current_products = dict(ProductStockTotal.objects.values_list('product_id', 'quantity'))
+        for product_id in sorted(set(product_totals) | set(current_products)):
+            expected = product_totals.get(product_id, zero)
+            actual = current_products.get(product_id, zero)
+            if expected != actual:
+                drift.append({'scope': 'product', 'product_id': product_id, 'warehouse_id': None,
+                              'expected': expected, 'actual': actual})
+
+        current_warehouses = {
+            (p, w): q for p, w, q in WarehouseStockTotal.objects.values_list('product_id', 'warehouse_id', 'quantity')
+        }
+        for key in sorted(set(warehouse_totals) | set(current_warehouses)):
+            expected = warehouse_totals.get(key, zero)
+            actual = current_warehouses.get(key, zero)
+            if expected != actual:
+                drift.append({'scope': 'warehouse', 'product_id': key[0], 'warehouse_id': key[1],
+                              'expected': expected, 'actual': actual})
+
+        if fix and drift:
+            product_rows = [ProductStockTotal(product_id=d['product_id'], quantity=d['expected'])
+                            for d in drift if d['scope'] == 'product']
+            warehouse_rows = [WarehouseStockTotal(product_id=d['product_id'], warehouse_id=d['warehouse_id'], quantity=d['expected'])
+                              for d in drift if d['scope'] == 'warehouse']
+            ProductStockTotal.objects.bulk_create(
+                product_rows, batch_size=batch_size,
+                update_conflicts=True, unique_fields=['product'], update_fields=['quantity']
+            )
+            WarehouseStockTotal.objects.bulk_create(
+                warehouse_rows, batch_size=batch_size,
+                update_conflicts=True, unique_fields=['product', 'warehouse'], update_fields=['quantity']
+            )
+        return drift
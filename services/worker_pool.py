@@ -0,0 +1,21 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import connections
+
+
+def init_worker(settings_module):
+    # Forked workers inherit a configured Django; spawned ones (macOS/Windows) need setting up
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    A pool of `workers` processes running Django, for management commands. Each task should
+    close its connections when done (connections.close_all()).
+    """
+    # Children must not share the parent's database sockets
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(settings.SETTINGS_MODULE,))
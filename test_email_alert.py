@@ -69,6 +69,10 @@ def test_low_stock_email():
         user=None,
         notes="Testing low stock email alert"
     )
+
+    # Emails are queued in the outbox; deliver them now so they show up below
+    from services.notification_service import NotificationService
+    NotificationService.dispatch_pending()
     
     print("-" * 60)
     print("\n✅ Check the terminal output above for the email!")
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from inventory.models import Warehouse, Location, Product, ProductStock, LowStockAlert, AlertEvent
+from services.low_stock_service import LowStockService
+
+User = get_user_model()
+
+
+def _parse(chunk):
+    chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+    fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if not line.startswith(':'))
+    if 'data' in fields:
+        fields['data'] = json.loads(fields['data'])
+    return fields
+
+
+@override_settings(NOTIFICATION_OUTBOX_AUTO_DISPATCH=False, ALERT_FEED_POLL_INTERVAL=0.05, ALERT_FEED_HEARTBEAT=5)
+class AlertFeedTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='floor', password='password', role='MANAGER')
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.location = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        self.products = [Product.objects.create(name=f'P{i}', sku=f'P{i}', uom='pcs', min_stock_level=10)
+                         for i in range(2)]
+        for product in self.products:
+            ProductStock.objects.create(product=product, location=self.location, quantity=3)
+
+    def _pair(self, i):
+        return (self.products[i].id, self.location.id)
+
+    def test_alert_changes_are_recorded(self):
+        LowStockService.evaluate(check=[self._pair(0), self._pair(1)])
+        self.assertEqual(list(AlertEvent.objects.values_list('kind', 'unread_delta')),
+                         [('CREATED', 1), ('CREATED', 1)])
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        alert = LowStockAlert.objects.get(product=self.products[0])
+        client.post(f'/api/inventory/alerts/{alert.id}/mark_read/')
+        client.post(f'/api/inventory/alerts/{alert.id}/mark_read/')
+        self.assertEqual(AlertEvent.objects.filter(kind='READ').count(), 1)
+
+        ProductStock.objects.update(quantity=50)
+        LowStockService.evaluate(resolve=[self._pair(0), self._pair(1)])
+        # The read alert no longer counted as unread, the other one did
+        self.assertEqual(sorted(AlertEvent.objects.filter(kind='RESOLVED').values_list('unread_delta', flat=True)),
+                         [-1, 0])
+        self.assertEqual(sum(AlertEvent.objects.values_list('unread_delta', flat=True)), 0)
+
+    def test_wsgi_falls_back_to_polling(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/api/inventory/alerts/stream/').status_code, 204)
+
+    async def test_stream_snapshot_then_live_events(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/inventory/alerts/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content.__aiter__()
+        try:
+            self.assertTrue((await stream.__anext__()).startswith(b'retry:'))
+            snapshot = _parse(await stream.__anext__())
+            self.assertEqual((snapshot['event'], snapshot['data']), ('snapshot', {'unread_count': 0}))
+
+            await sync_to_async(LowStockService.evaluate)(check=[self._pair(0)])
+            event = _parse(await asyncio.wait_for(stream.__anext__(), timeout=5))
+            self.assertEqual(event['event'], 'alert')
+            self.assertEqual(event['data']['kind'], 'CREATED')
+            self.assertEqual(event['data']['unread_delta'], 1)
+            self.assertEqual(event['data']['alert']['product_sku'], 'P0')
+        finally:
+            await stream.aclose()
+
+    async def test_resume_after_last_event_id(self):
+        await sync_to_async(LowStockService.evaluate)(check=[self._pair(0)])
+        first = await AlertEvent.objects.alatest('id')
+        await sync_to_async(LowStockService.evaluate)(check=[self._pair(1)])
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/inventory/alerts/stream/', headers={'Last-Event-ID': str(first.id)})
+        stream = response.streaming_content.__aiter__()
+        try:
+            await stream.__anext__()  # retry
+            event = _parse(await stream.__anext__())
+            self.assertEqual(int(event['id']), first.id + 1)
+            self.assertEqual(event['data']['alert']['product_sku'], 'P1')
+        finally:
+            await stream.aclose()
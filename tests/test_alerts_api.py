@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
@@ -8,6 +8,7 @@ from inventory.models import Operation
 
 User = get_user_model()
 
+@override_settings(NOTIFICATION_OUTBOX_AUTO_DISPATCH=False)
 class LowStockAlertsAPITest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -35,14 +36,15 @@ class LowStockAlertsAPITest(TestCase):
         )
 
     def test_alert_creation_and_api(self):
-        # Decrease stock to trigger alert (20 -> 5)
-        StockService.decrease_stock(
-            product=self.product,
-            location=self.location,
-            quantity=15,
-            operation=self.operation,
-            user=self.user
-        )
+        # Decrease stock to trigger alert (20 -> 5); alerts are evaluated after commit
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.decrease_stock(
+                product=self.product,
+                location=self.location,
+                quantity=15,
+                operation=self.operation,
+                user=self.user
+            )
         
         # Check if alert exists in DB
         self.assertTrue(LowStockAlert.objects.filter(product=self.product, is_resolved=False).exists())
@@ -50,8 +52,8 @@ class LowStockAlertsAPITest(TestCase):
         # Check API list
         response = self.client.get('/api/inventory/alerts/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        alert_id = response.data[0]['id']
+        self.assertEqual(len(response.data['results']), 1)
+        alert_id = response.data['results'][0]['id']
         
         # Check unread count
         response = self.client.get('/api/inventory/alerts/unread_count/')
@@ -68,6 +70,18 @@ class LowStockAlertsAPITest(TestCase):
         
         # Check list again (should still be there as it's not resolved, just read)
         response = self.client.get('/api/inventory/alerts/')
-        self.assertEqual(len(response.data), 1)
-        self.assertTrue(response.data[0]['is_read'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertTrue(response.data['results'][0]['is_read'])
+
 
+    def test_list_is_paged_for_the_dropdown(self):
+        products = [Product.objects.create(name=f'P{i}', sku=f'P-{i}', min_stock_level=5) for i in range(12)]
+        LowStockAlert.objects.bulk_create([
+            LowStockAlert(product=product, location=self.location, current_quantity=1, threshold=5, is_resolved=i == 0)
+            for i, product in enumerate(products)
+        ])
+        response = self.client.get('/api/inventory/alerts/', {'is_resolved': 'false', 'page_size': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertFalse(any(alert['is_resolved'] for alert in response.data['results']))
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 1)
@@ -0,0 +1,78 @@
+import json
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from inventory.models import Warehouse, Location, Category, Product, ProductStock, Operation, DocumentStatus, StockMovement
+from services.dashboard_service import DashboardService
+
+User = get_user_model()
+
+
+class AsyncReadViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='password', role='MANAGER')
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        location = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        category = Category.objects.create(name='Tools')
+        self.products = [
+            Product.objects.create(name=f'Wrench {i}', sku=f'WR-{i}', category=category, min_stock_level=10)
+            for i in range(3)
+        ]
+        Product.objects.create(name='Hammer', sku='HM-1', min_stock_level=1)
+        ProductStock.objects.create(product=self.products[0], location=location, quantity=Decimal('5'))
+        ProductStock.objects.create(product=self.products[1], location=location, quantity=Decimal('50'))
+        StockMovement.objects.create(product=self.products[1], to_location=location, quantity=Decimal('50'),
+                                     transaction_type=Operation.Type.RECEIPT)
+        Operation.objects.create(operation_type=Operation.Type.RECEIPT, status=DocumentStatus.READY)
+
+    def _sync(self, path):
+        return json.loads(self.api.get(path).content)
+
+    async def test_dashboard_payloads_match_sync_views(self):
+        for sync_path, async_path in (('/api/dashboard/kpi/', '/api/dashboard/async/kpi/'),
+                                      ('/api/dashboard/charts/', '/api/dashboard/async/charts/')):
+            response = await self.async_client.get(async_path)
+            self.assertEqual(response.status_code, 200)
+            cache.clear()
+            self.assertEqual(json.loads(response.content), await sync_to_async(self._sync)(sync_path))
+
+    async def test_async_kpis_share_the_sync_cache(self):
+        await self.async_client.get('/api/dashboard/async/kpi/')
+        await sync_to_async(self._sync)('/api/dashboard/kpi/')
+        stats = await sync_to_async(DashboardService.cache_stats)()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    async def test_reorder_report_matches_sync_view(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/inventory/async/reorder-report/')
+        self.assertEqual(response.status_code, 200)
+        expected = await sync_to_async(self._sync)('/api/inventory/reorder-report/')
+        self.assertEqual(sorted(p['sku'] for p in json.loads(response.content)), ['HM-1', 'WR-0', 'WR-2'])
+        self.assertEqual(json.loads(response.content), expected)
+
+    async def test_product_list_and_detail(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/inventory/async/products/', {'q': 'wr-', 'page_size': 2})
+        data = json.loads(response.content)
+        self.assertEqual((data['count'], data['num_pages']), (3, 2))
+        self.assertEqual([p['sku'] for p in data['results']], ['WR-0', 'WR-1'])
+        self.assertEqual(data['results'][0]['category_name'], 'Tools')
+
+        response = await self.async_client.get(f'/api/inventory/async/products/{self.products[1].pk}/')
+        self.assertEqual(json.loads(response.content)['total_stock'], 50.0)
+        response = await self.async_client.get('/api/inventory/async/products/999999/')
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get('/api/inventory/async/products/', {'page': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_requires_login(self):
+        for path in ('/api/inventory/async/products/', '/api/inventory/async/reorder-report/'):
+            response = await self.async_client.get(path)
+            self.assertEqual(response.status_code, 403)
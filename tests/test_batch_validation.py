@@ -0,0 +1,119 @@
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from inventory.models import Warehouse, Location, Product, Operation, DocumentStatus, ProductStock, StockMovement, LowStockAlert
+from services.stock_service import StockService
+from services.operation_service import OperationService
+from decimal import Decimal
+
+User = get_user_model()
+
+@override_settings(NOTIFICATION_OUTBOX_AUTO_DISPATCH=False, OPERATION_PDF_PRERENDER=False)
+class BatchValidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.warehouse = Warehouse.objects.create(name='Test WH', code='WH-TEST')
+        self.loc_a = Location.objects.create(warehouse=self.warehouse, name='A', code='A')
+        self.loc_b = Location.objects.create(warehouse=self.warehouse, name='B', code='B')
+        self.p1 = Product.objects.create(name='P1', sku='P1', uom='pcs', min_stock_level=5)
+        self.p2 = Product.objects.create(name='P2', sku='P2', uom='pcs', min_stock_level=5)
+
+    def _stock(self, product, location):
+        return ProductStock.objects.get(product=product, location=location).quantity
+
+    def _seed(self, product, location, qty):
+        op = Operation.objects.create(operation_type=Operation.Type.RECEIPT)
+        StockService.increase_stock(product, location, Decimal(qty), op)
+
+    def _make_op(self, op_type, lines, **kwargs):
+        op = Operation.objects.create(operation_type=op_type, status=DocumentStatus.DRAFT, **kwargs)
+        for product, qty in lines:
+            op.lines.create(product=product, quantity_demanded=qty)
+        return op
+
+    def test_receipt_with_repeated_product_chains_balance_after(self):
+        op = self._make_op(Operation.Type.RECEIPT, [(self.p1, 10), (self.p1, 5), (self.p2, 7)], destination_location=self.loc_a)
+        OperationService.validate_operation(op.id, self.user)
+
+        self.assertEqual(self._stock(self.p1, self.loc_a), 15)
+        self.assertEqual(self._stock(self.p2, self.loc_a), 7)
+        balances = list(StockMovement.objects.filter(product=self.p1).order_by('id').values_list('balance_after', flat=True))
+        self.assertEqual(balances, [10, 15])
+        self.assertTrue(all(line.quantity_done == line.quantity_demanded for line in op.lines.all()))
+
+    def test_transfer_moves_all_lines(self):
+        self._seed(self.p1, self.loc_a, 20)
+        self._seed(self.p2, self.loc_a, 20)
+        op = self._make_op(Operation.Type.TRANSFER, [(self.p1, 8), (self.p2, 3)], source_location=self.loc_a, destination_location=self.loc_b)
+        OperationService.validate_operation(op.id, self.user)
+
+        self.assertEqual(self._stock(self.p1, self.loc_a), 12)
+        self.assertEqual(self._stock(self.p1, self.loc_b), 8)
+        self.assertEqual(self._stock(self.p2, self.loc_b), 3)
+        self.assertEqual(StockMovement.objects.filter(reference_doc=op).count(), 4)
+
+    def test_strict_insufficient_rolls_back_every_line(self):
+        self._seed(self.p1, self.loc_a, 20)
+        op = self._make_op(Operation.Type.DELIVERY, [(self.p1, 5), (self.p2, 5)], source_location=self.loc_a)
+
+        with self.assertRaises(ValueError):
+            OperationService.validate_operation(op.id, self.user)
+
+        self.assertEqual(self._stock(self.p1, self.loc_a), 20)
+        self.assertFalse(StockMovement.objects.filter(reference_doc=op).exists())
+        op.refresh_from_db()
+        self.assertEqual(op.status, DocumentStatus.DRAFT)
+
+    def test_partial_delivery_shares_balance_across_lines(self):
+        self._seed(self.p1, self.loc_a, 12)
+        op = self._make_op(Operation.Type.DELIVERY, [(self.p1, 10), (self.p1, 10), (self.p2, 4)], source_location=self.loc_a)
+        with self.captureOnCommitCallbacks(execute=True):
+            OperationService.validate_operation(op.id, self.user, allow_partial=True)
+
+        done = list(op.lines.order_by('id').values_list('quantity_done', flat=True))
+        self.assertEqual(done, [10, 2, 0])
+        self.assertEqual(self._stock(self.p1, self.loc_a), 0)
+        self.assertTrue(LowStockAlert.objects.filter(product=self.p1, location=self.loc_a, is_resolved=False).exists())
+
+    def test_adjustment_sets_absolute_quantities(self):
+        self._seed(self.p1, self.loc_a, 20)
+        op = self._make_op(Operation.Type.ADJUSTMENT, [(self.p1, 3), (self.p2, 9)], source_location=self.loc_a)
+        OperationService.validate_operation(op.id, self.user)
+
+        self.assertEqual(self._stock(self.p1, self.loc_a), 3)
+        self.assertEqual(self._stock(self.p2, self.loc_a), 9)
+        move = StockMovement.objects.get(reference_doc=op, product=self.p1)
+        self.assertEqual((move.quantity, move.from_location, move.balance_after), (17, self.loc_a, 3))
+
+    def test_stock_is_written_with_one_upsert(self):
+        self._seed(self.p1, self.loc_a, 10)
+        self._seed(self.p2, self.loc_a, 10)
+        self._seed(self.p2, self.loc_b, 4)
+        rows = set(ProductStock.objects.values_list('id', flat=True))
+        op = self._make_op(Operation.Type.TRANSFER, [(self.p1, 3), (self.p2, 6)],
+                           source_location=self.loc_a, destination_location=self.loc_b)
+        with CaptureQueriesContext(connection) as ctx:
+            OperationService.validate_operation(op.id, self.user)
+
+        table = ProductStock._meta.db_table
+        writes = [q['sql'] for q in ctx.captured_queries
+                  if q['sql'].startswith((f'INSERT INTO "{table}"', f'UPDATE "{table}"'))]
+        # All four rows in one statement (lock_stocks created the missing p1 row at B beforehand)
+        self.assertEqual(len(writes), 1)
+        self.assertIn('ON CONFLICT("id") DO UPDATE', writes[0])
+        self.assertEqual(len(set(ProductStock.objects.values_list('id', flat=True)) - rows), 1)
+        self.assertEqual([self._stock(p, l) for p, l in ((self.p1, self.loc_a), (self.p2, self.loc_a),
+                                                          (self.p1, self.loc_b), (self.p2, self.loc_b))], [7, 4, 3, 10])
+
+    def test_query_count_does_not_grow_with_lines(self):
+        def queries_for(count):
+            products = Product.objects.bulk_create([
+                Product(name=f'Bulk {count}-{i}', sku=f'BULK-{count}-{i}', uom='pcs') for i in range(count)
+            ])
+            op = self._make_op(Operation.Type.RECEIPT, [(p, 1) for p in products], destination_location=self.loc_a)
+            with CaptureQueriesContext(connection) as ctx:
+                OperationService.validate_operation(op.id, self.user)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries_for(5), queries_for(50))
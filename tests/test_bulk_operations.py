@@ -0,0 +1,97 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from inventory.models import Warehouse, Location, Product, Partner, Operation, OperationLine, ReferenceSequence, StockReservation
+from services.bulk_operation_service import BulkOperationService
+
+User = get_user_model()
+
+
+class BulkOperationTest(TestCase):
+    def setUp(self):
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.shelf = Location.objects.create(warehouse=warehouse, name='Shelf', code='SHELF')
+        self.dock = Location.objects.create(warehouse=warehouse, name='Dock', code='DOCK')
+        self.customer = Partner.objects.create(name='ACME', partner_type=Partner.Type.CUSTOMER)
+        self.products = [Product.objects.create(name=f'P{i}', sku=f'SKU-{i}', uom='pcs') for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='erp', password='password', role='MANAGER'))
+
+    def _delivery(self, i=0, **overrides):
+        item = {
+            'operation_type': 'DELIVERY', 'source_location': self.shelf.id, 'partner': self.customer.id,
+            'lines': [{'sku': 'SKU-0', 'quantity_demanded': '2'}, {'product': self.products[1 + i % 2].id, 'quantity_demanded': 1.5}],
+        }
+        item.update(overrides)
+        return item
+
+    def test_single_save_reference(self):
+        first = Operation.objects.create(operation_type=Operation.Type.RECEIPT, destination_location=self.dock)
+        with self.assertNumQueries(2):  # sequence + insert
+            second = Operation.objects.create(operation_type=Operation.Type.RECEIPT, destination_location=self.dock)
+        self.assertEqual(int(second.reference_number[4:]), int(first.reference_number[4:]) + 1)
+        self.assertTrue(first.reference_number.startswith('REC-'))
+        # A sequence row missing (e.g. deleted) is recreated on first use
+        ReferenceSequence.objects.filter(name='ADJ').delete()
+        self.assertEqual(Operation.allocate_references('ADJUSTMENT', 2), ['ADJ-000001', 'ADJ-000002'])
+
+    def test_partial_success(self):
+        response = self.client.post('/api/inventory/operations/bulk/', {'operations': [
+            self._delivery(),
+            self._delivery(source_location=None),
+            self._delivery(status='WAITING'),
+            self._delivery(lines=[{'sku': 'NOPE', 'quantity_demanded': '1'}, {'product': self.products[0].id, 'quantity_demanded': '-1'}]),
+            {'operation_type': 'RECEIPT', 'destination_location': self.dock.id, 'lines': [{'sku': 'SKU-2', 'quantity_demanded': '10'}]},
+            'not an order',
+        ]}, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['created'], response.data['failed']), (3, 3))
+        results = response.data['results']
+        self.assertEqual([r['index'] for r in results], list(range(6)))
+        self.assertEqual(results[1]['errors'], {'source_location': ['This field is required for this operation type.']})
+        self.assertEqual(set(results[3]['errors']), {'lines[0].sku', 'lines[1].quantity_demanded'})
+        self.assertIn('non_field_errors', results[5]['errors'])
+
+        created = Operation.objects.in_bulk([results[i]['id'] for i in (0, 2, 4)])
+        self.assertEqual({o.reference_number for o in created.values()}, {results[i]['reference_number'] for i in (0, 2, 4)})
+        self.assertEqual(OperationLine.objects.filter(operation__in=created).count(), 5)
+        self.assertEqual(created[results[0]['id']].created_by.username, 'erp')
+        # The WAITING delivery reserved its demand
+        self.assertEqual(StockReservation.objects.get(product=self.products[0]).quantity, Decimal('2'))
+
+    def test_invalid_pks(self):
+        huge = '99999999999999999999999'
+        response = self.client.post('/api/inventory/operations/bulk/', {'operations': [
+            self._delivery(source_location='²'),
+            self._delivery(source_location=huge, partner=2 ** 70),
+            self._delivery(lines=[{'product': huge, 'quantity_demanded': '1'}, {'product': '-1', 'quantity_demanded': '1'}]),
+            self._delivery(source_location=str(self.shelf.id)),
+        ]}, format='json')
+        self.assertEqual(response.status_code, 207)
+        results = response.data['results']
+        self.assertEqual(results[0]['errors'], {'source_location': ['Invalid pk "²" - object does not exist.']})
+        self.assertEqual(set(results[1]['errors']), {'source_location', 'partner'})
+        self.assertEqual(results[2]['errors'], {
+            'lines[0].product': [f'Invalid pk "{huge}" - object does not exist.'],
+            'lines[1].product': ['Invalid pk "-1" - object does not exist.'],
+        })
+        self.assertIn('reference_number', results[3])
+
+    def test_query_count_does_not_grow_with_batch(self):
+        counts = []
+        for size in (5, 50):
+            with CaptureQueriesContext(connection) as ctx:
+                result = BulkOperationService.create([self._delivery(i, status='READY') for i in range(size)])
+            self.assertEqual(result['created'], size)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        references = Operation.objects.values_list('reference_number', flat=True)
+        self.assertEqual(len(set(references)), 55)
+
+    def test_rejects_bad_body(self):
+        self.assertEqual(self.client.post('/api/inventory/operations/bulk/', {'operations': []}, format='json').status_code, 400)
+        response = self.client.post('/api/inventory/operations/bulk/', [self._delivery()], format='json')
+        self.assertEqual(response.status_code, 201)
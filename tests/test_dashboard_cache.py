@@ -0,0 +1,57 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from inventory.models import Product, Warehouse, Location, Operation, DocumentStatus
+from services.stock_service import StockService
+from services.operation_service import OperationService
+
+User = get_user_model()
+
+class DashboardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='password', role='MANAGER')
+        self.client.force_authenticate(user=self.user)
+        warehouse = Warehouse.objects.create(name="WH", code="WH")
+        self.location = Location.objects.create(name="Loc", warehouse=warehouse, code="LOC")
+        self.product = Product.objects.create(name="P", sku="P", min_stock_level=10)
+
+    def test_repeated_polls_are_served_from_cache(self):
+        self.client.get('/api/dashboard/kpi/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/dashboard/kpi/')
+            self.client.get('/api/dashboard/kpi/')
+
+        stats = self.client.get('/api/dashboard/cache-stats/').data
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+    def test_stock_movement_invalidates_after_commit(self):
+        self.assertEqual(self.client.get('/api/dashboard/kpi/').data['out_of_stock_items'], 1)
+        self.assertEqual(self.client.get('/api/dashboard/charts/').data['top_movers'], [])
+
+        op = Operation.objects.create(operation_type=Operation.Type.RECEIPT)
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.increase_stock(self.product, self.location, Decimal('50'), op)
+
+        self.assertEqual(self.client.get('/api/dashboard/kpi/').data['out_of_stock_items'], 0)
+        self.assertEqual(len(self.client.get('/api/dashboard/charts/').data['top_movers']), 1)
+
+    def test_status_change_invalidates(self):
+        op = Operation.objects.create(operation_type=Operation.Type.DELIVERY, status=DocumentStatus.DRAFT)
+        self.assertEqual(self.client.get('/api/dashboard/kpi/').data['pending_deliveries'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OperationService.transition_status(op, DocumentStatus.CANCELED)
+
+        self.assertEqual(self.client.get('/api/dashboard/kpi/').data['pending_deliveries'], 0)
+
+    def test_uncommitted_changes_do_not_invalidate(self):
+        self.client.get('/api/dashboard/kpi/')
+        op = Operation.objects.create(operation_type=Operation.Type.RECEIPT)
+        with self.captureOnCommitCallbacks(execute=False):
+            StockService.increase_stock(self.product, self.location, Decimal('50'), op)
+
+        self.assertEqual(self.client.get('/api/dashboard/kpi/').data['out_of_stock_items'], 1)
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -9,6 +10,7 @@ User = get_user_model()
 
 class DashboardChartsTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(username='testuser', password='password', role='MANAGER')
         self.client.force_authenticate(user=self.user)
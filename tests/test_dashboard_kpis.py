@@ -0,0 +1,72 @@
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from inventory.models import Product, Warehouse, Location, ProductStock, StockMovement, Operation, DocumentStatus
+from services.dashboard_service import DashboardService
+
+class DashboardKPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.warehouse = Warehouse.objects.create(name="WH", code="WH")
+        self.location = Location.objects.create(name="Loc", warehouse=self.warehouse, code="LOC")
+
+        # Out of stock, low (at threshold), healthy
+        self.empty = Product.objects.create(name="Empty", sku="E", min_stock_level=10)
+        low = Product.objects.create(name="Low", sku="L", min_stock_level=10)
+        ok = Product.objects.create(name="Ok", sku="O", min_stock_level=10)
+        ProductStock.objects.create(product=low, location=self.location, quantity=10)
+        ProductStock.objects.create(product=ok, location=self.location, quantity=50)
+
+        Operation.objects.create(operation_type=Operation.Type.RECEIPT, status=DocumentStatus.DRAFT)
+        Operation.objects.create(operation_type=Operation.Type.RECEIPT, status=DocumentStatus.READY)
+        Operation.objects.create(operation_type=Operation.Type.DELIVERY, status=DocumentStatus.WAITING)
+        Operation.objects.create(operation_type=Operation.Type.DELIVERY, status=DocumentStatus.DONE)
+        Operation.objects.create(operation_type=Operation.Type.TRANSFER, status=DocumentStatus.CANCELED)
+
+    def test_kpi_values(self):
+        response = self.client.get('/api/dashboard/kpi/')
+        self.assertEqual(response.data, {
+            'total_products': 3,
+            'low_stock_items': 1,
+            'out_of_stock_items': 1,
+            'pending_receipts': 2,
+            'pending_deliveries': 1,
+            'pending_transfers': 0,
+        })
+
+    def test_low_stock_includes_the_minimum_level(self):
+        # 0 < total <= min_stock_level; the API used total < min_stock_level before
+        for sku, quantity in (('BELOW', 9), ('AT', 10), ('ABOVE', 11)):
+            product = Product.objects.create(name=sku, sku=sku, min_stock_level=10)
+            ProductStock.objects.create(product=product, location=self.location, quantity=quantity)
+        self.assertEqual(DashboardService.get_kpis()['low_stock_items'], 3)
+        self.assertEqual(self.client.get('/api/dashboard/kpi/').data['low_stock_items'], 3)
+
+    def _add_catalogue(self, count):
+        products = Product.objects.bulk_create([
+            Product(name=f"Bulk {i}", sku=f"BULK-{count}-{i}", min_stock_level=5) for i in range(count)
+        ])
+        for product in products:
+            ProductStock.objects.create(product=product, location=self.location, quantity=product.id % 7)
+            StockMovement.objects.create(product=product, to_location=self.location, quantity=1,
+                                         transaction_type=Operation.Type.RECEIPT)
+
+    def test_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            DashboardService.get_kpis()
+
+        self._add_catalogue(40)
+        with CaptureQueriesContext(connection) as large:
+            DashboardService.get_kpis()
+
+        self.assertEqual(len(small), 2)
+        self.assertEqual(len(large), len(small))
+
+    def test_recent_activity_does_not_lazy_load_products(self):
+        self._add_catalogue(20)
+        with self.assertNumQueries(1):
+            activity = DashboardService.get_recent_activity()
+        self.assertEqual(len(activity), 10)
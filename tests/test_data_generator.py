@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from inventory.models import Product, ProductStock, Operation, StockMovement, LowStockAlert, DocumentStatus
+from services.data_generator import DataGenerator
+from services.reservation_service import ReservationService
+from services.stock_summary_service import StockSummaryService
+
+class DataGeneratorTest(TestCase):
+    def setUp(self):
+        self.counts = DataGenerator(prefix='T', warehouses=2, locations=6, categories=3, products=50,
+                                    movements=600, open_operations=40, lines_per_operation=3, batch_size=100).run()
+
+    def test_counts(self):
+        self.assertEqual(Product.objects.count(), 50)
+        self.assertGreaterEqual(StockMovement.objects.count(), 600)
+        self.assertEqual(self.counts['movements'], StockMovement.objects.count())
+
+    def test_every_status_and_type(self):
+        self.assertEqual(set(Operation.objects.values_list('status', flat=True)), set(DocumentStatus.values))
+        self.assertEqual(set(StockMovement.objects.values_list('transaction_type', flat=True)),
+                         set(Operation.Type.values))
+
+    def test_stock_matches_ledger(self):
+        incoming = {
+            (r['product_id'], r['to_location_id']): r['total']
+            for r in StockMovement.objects.filter(to_location__isnull=False)
+            .values('product_id', 'to_location_id').annotate(total=Sum('quantity'))
+        }
+        outgoing = {
+            (r['product_id'], r['from_location_id']): r['total']
+            for r in StockMovement.objects.filter(from_location__isnull=False)
+            .values('product_id', 'from_location_id').annotate(total=Sum('quantity'))
+        }
+        for stock in ProductStock.objects.all():
+            key = (stock.product_id, stock.location_id)
+            self.assertGreaterEqual(stock.quantity, 0)
+            self.assertEqual(stock.quantity, incoming.get(key, Decimal('0')) - outgoing.get(key, Decimal('0')))
+
+    def test_totals_and_alerts_in_sync(self):
+        self.assertEqual(StockSummaryService.reconcile(fix=False), [])
+        self.assertEqual(ReservationService.reconcile(fix=False), [])
+        for alert in LowStockAlert.objects.select_related('product'):
+            self.assertLessEqual(alert.current_quantity, alert.product.min_stock_level)
+
+    def test_prefix_collision(self):
+        with self.assertRaises(ValueError):
+            DataGenerator(prefix='T', products=1, movements=0, open_operations=0).run()
+
+class BenchmarkSuiteCommandTest(TestCase):
+    def test_emits_json_report(self):
+        DataGenerator(prefix='B', warehouses=1, locations=2, products=20, movements=200,
+                      open_operations=5, batch_size=100).run()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.json')
+            # Keep the PDFs rendered by the operation_pdf_view benchmark out of the project tree
+            pdf_storage = {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': tmp}}
+            with override_settings(STORAGES={**settings.STORAGES, 'operation_pdfs': pdf_storage}):
+                call_command('benchmark_suite', repeat=1, lines=[5], deep_page=2, output=path, stdout=StringIO())
+            with open(path) as fh:
+                report = json.load(fh)
+
+        for name in ('validate_operation_5_lines', 'dashboard_kpis_cold', 'dashboard_charts_cold', 'reorder_report',
+                     'ledger_first_page', 'ledger_deep_page', 'product_search', 'operation_pdf'):
+            self.assertIn(name, report['results'])
+            self.assertGreater(report['results'][name]['median_ms'], 0)
+        self.assertEqual(report['dataset']['products'], 20)
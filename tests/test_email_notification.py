@@ -1,7 +1,8 @@
 from django.test import TestCase
-from unittest.mock import patch
+from django.core import mail
 from inventory.models import Product, Warehouse, Location, Category, Operation, OperationLine
 from services.operation_service import OperationService
+from services.notification_service import NotificationService
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -21,8 +22,7 @@ class EmailNotificationTest(TestCase):
         OperationLine.objects.create(operation=op_receipt, product=self.product, quantity_demanded=100)
         OperationService.validate_operation(op_receipt.id, self.user)
 
-    @patch('services.notification_service.send_mail')
-    def test_transfer_email(self, mock_send_mail):
+    def test_transfer_email(self):
         # Create Transfer
         op = Operation.objects.create(
             operation_type=Operation.Type.TRANSFER,
@@ -35,10 +35,11 @@ class EmailNotificationTest(TestCase):
         # Validate
         OperationService.validate_operation(op.id, self.user)
         
-        # Check if send_mail was called
-        self.assertTrue(mock_send_mail.called)
-        args, kwargs = mock_send_mail.call_args
-        self.assertIn("Transfer Validated", kwargs['subject'])
-        self.assertIn("Loc 1", kwargs['message'])
-        self.assertIn("Loc 2", kwargs['message'])
-        self.assertIn("TEST", kwargs['message'])
+        # Drain the outbox and check the email
+        NotificationService.dispatch_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        email = mail.outbox[0]
+        self.assertIn("Transfer Validated", email.subject)
+        self.assertIn("Loc 1", email.body)
+        self.assertIn("Loc 2", email.body)
+        self.assertIn("TEST", email.body)
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from inventory.models import Warehouse, Location, Product, Operation, DocumentStatus, ProductStock, StockMovement, LowStockAlert
 from services.stock_service import StockService
@@ -7,6 +7,7 @@ from decimal import Decimal
 
 User = get_user_model()
 
+@override_settings(NOTIFICATION_OUTBOX_AUTO_DISPATCH=False)
 class EnhancedServiceTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='testuser', password='password')
@@ -24,7 +25,8 @@ class EnhancedServiceTests(TestCase):
 
         # 2. Decrease stock to 5 (below min 10)
         op_del = Operation.objects.create(operation_type=Operation.Type.DELIVERY)
-        StockService.decrease_stock(self.product, self.loc_storage, Decimal('15'), op_del)
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.decrease_stock(self.product, self.loc_storage, Decimal('15'), op_del)
 
         # Check alert created
         alert = LowStockAlert.objects.get(product=self.product, location=self.loc_storage, is_resolved=False)
@@ -34,14 +36,16 @@ class EnhancedServiceTests(TestCase):
     def test_low_stock_alert_resolution(self):
         # Setup: Create alert
         op = Operation.objects.create(operation_type=Operation.Type.RECEIPT)
-        StockService.increase_stock(self.product, self.loc_storage, Decimal('5'), op)
-        # Manually trigger alert check if needed, but increase_stock doesn't create alerts, only resolves.
-        # So let's use adjust to set low stock first.
-        StockService.adjust_stock(self.product, self.loc_storage, Decimal('5'), op)
+        StockService.increase_stock(self.product, self.loc_storage, Decimal('20'), op)
+        # increase_stock doesn't create alerts, only resolves. So adjust down to low stock first:
+        # adjusting to the quantity already there would change nothing and check nothing.
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.adjust_stock(self.product, self.loc_storage, Decimal('5'), op)
         self.assertTrue(LowStockAlert.objects.filter(product=self.product, is_resolved=False).exists())
 
         # 1. Increase stock to 15 (above min 10)
-        StockService.increase_stock(self.product, self.loc_storage, Decimal('10'), op)
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.increase_stock(self.product, self.loc_storage, Decimal('10'), op)
 
         # Check alert resolved
         self.assertFalse(LowStockAlert.objects.filter(product=self.product, is_resolved=False).exists())
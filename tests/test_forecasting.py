@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from rest_framework.test import APIClient
+from inventory.models import (
+    Warehouse, Location, Product, ProductStockTotal, StockReservation, StockMovement, Operation, OperationLine,
+    DocumentStatus, ReorderSuggestion,
+)
+from services.forecast_service import ForecastService, SMA, SES
+from services.movement_rollup_service import MovementRollupService
+
+User = get_user_model()
+NOW = datetime(2025, 3, 10, 15, 30, tzinfo=dt_timezone.utc)
+TODAY = datetime(2025, 3, 10, tzinfo=dt_timezone.utc)
+
+
+class ForecastServiceTest(TestCase):
+    def setUp(self):
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.shelf = Location.objects.create(warehouse=warehouse, name='Shelf', code='SHELF')
+        self.bolt = Product.objects.create(name='Bolt', sku='BOLT', uom='pcs')
+        self.nut = Product.objects.create(name='Nut', sku='NUT', uom='pcs')
+        self.idle = Product.objects.create(name='Idle', sku='IDLE', uom='pcs')
+        for day in range(1, 31):
+            self._deliver(self.bolt, 10, TODAY - timedelta(days=day, hours=-9))
+            self._deliver(self.nut, 20 if day % 2 else 0, TODAY - timedelta(days=day, hours=-12))
+        # Today is not part of the history
+        self._deliver(self.bolt, 500, TODAY + timedelta(hours=1))
+        ProductStockTotal.objects.create(product=self.bolt, quantity=50)
+
+    def _deliver(self, product, quantity, when):
+        if quantity:
+            StockMovement.objects.create(product=product, quantity=Decimal(quantity), timestamp=when,
+                                         from_location=self.shelf, transaction_type=Operation.Type.DELIVERY)
+
+    def _run(self, **kwargs):
+        options = dict(history_days=30, lead_time_days=7, review_days=7, service_level=0.95, as_of=NOW)
+        return ForecastService.run(**dict(options, **kwargs))
+
+    def test_demand(self):
+        history = np.array([[10.0, 10, 10, 10], [0, 20, 0, 20]])
+        daily, spread = ForecastService.demand(history, SMA)
+        np.testing.assert_allclose(daily, [10, 10])
+        np.testing.assert_allclose(spread, [0, np.std([0, 20, 0, 20], ddof=1)])
+
+        # Vectorized smoothing matches the recurrence run product by product
+        daily, spread = ForecastService.demand(history, SES, alpha=0.5)
+        for row, expected_level in zip(history, daily):
+            level = row.mean()
+            for value in row:
+                level += 0.5 * (value - level)
+            self.assertAlmostEqual(level, expected_level)
+        self.assertEqual(daily[0], 10)
+
+    def test_run(self):
+        result = self._run()
+        self.assertEqual(result, {'products': 3, 'to_reorder': 2, 'history_days': 30})
+
+        bolt = ReorderSuggestion.objects.get(product=self.bolt)
+        self.assertEqual((bolt.daily_demand, bolt.demand_std, bolt.safety_stock), (Decimal('10'), Decimal('0'), Decimal('0')))
+        self.assertEqual((bolt.reorder_point, bolt.order_up_to), (Decimal('70.00'), Decimal('140.00')))
+        self.assertEqual(bolt.suggested_quantity, Decimal('90'))
+
+        nut = ReorderSuggestion.objects.get(product=self.nut)
+        # 1.645 * sample deviation of alternating 0/20 days * sqrt(7)
+        self.assertEqual(nut.safety_stock, Decimal('44.26'))
+        self.assertEqual(nut.reorder_point, Decimal('114.26'))
+        # Pieces are ordered whole; weights to the stock's two decimals
+        self.assertEqual(nut.suggested_quantity, Decimal('185'))
+        Product.objects.filter(pk=self.nut.pk).update(uom='kg')
+        self._run()
+        self.assertEqual(ReorderSuggestion.objects.get(product=self.nut).suggested_quantity, Decimal('184.26'))
+        self.assertEqual(ReorderSuggestion.objects.get(product=self.idle).suggested_quantity, Decimal('0'))
+
+        # Open receipts raise the stock position, reservations lower it
+        receipt = Operation.objects.create(operation_type=Operation.Type.RECEIPT, status=DocumentStatus.READY,
+                                           destination_location=self.shelf)
+        OperationLine.objects.create(operation=receipt, product=self.bolt, quantity_demanded=40, quantity_done=10)
+        self._run()
+        self.assertEqual(ReorderSuggestion.objects.get(product=self.bolt).suggested_quantity, Decimal('0'))
+        StockReservation.objects.create(product=self.bolt, location=self.shelf, quantity=15)
+        self._run(method=SES)
+        bolt = ReorderSuggestion.objects.get(product=self.bolt)
+        self.assertEqual((bolt.method, bolt.suggested_quantity), (SES, Decimal('75')))
+        self.assertEqual(ReorderSuggestion.objects.count(), 3)
+
+    def test_history_from_rollups(self):
+        ledger = ForecastService.daily_outflows(TODAY - timedelta(days=30), 30)
+        MovementRollupService.build()
+        rollups = ForecastService.daily_outflows(TODAY - timedelta(days=30), 30)
+        self.assertEqual(sorted(zip(*(column.tolist() for column in rollups))),
+                         sorted(zip(*(column.tolist() for column in ledger))))
+        # One rollup query however long the history
+        with self.assertNumQueries(4):
+            ForecastService.daily_outflows(TODAY - timedelta(days=90), 90)
+        self._deliver(self.nut, 7, TODAY - timedelta(days=3, hours=-1))
+        self.assertEqual(ForecastService.daily_outflows(TODAY - timedelta(days=30), 30)[2].sum(), ledger[2].sum() + 7)
+
+        self._run()
+        nut = ReorderSuggestion.objects.get(product=self.nut)
+        self.assertEqual(nut.daily_demand, Decimal('10.2333'))
+
+    def test_validation(self):
+        for kwargs in ({'service_level': 1.2}, {'history_days': 1}, {'method': 'ARIMA'}, {'alpha': 0}):
+            with self.assertRaises(ValueError):
+                self._run(**kwargs)
+
+    def test_apply_and_report(self):
+        self._run()
+        self.assertEqual(ForecastService.apply(ReorderSuggestion.objects.filter(product=self.bolt)), 1)
+        self.bolt.refresh_from_db()
+        self.assertEqual(self.bolt.min_stock_level, 70)
+        self.assertIsNotNone(ReorderSuggestion.objects.get(product=self.bolt).applied_at)
+
+        unforecast = Product.objects.create(name='New', sku='NEW', uom='pcs', min_stock_level=5)
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='viewer', password='password'))
+        rows = {row['sku']: row for row in client.get('/api/inventory/reorder-report/').data}
+        # Stock-less products with no minimum level are listed too, as before
+        self.assertEqual(set(rows), {'BOLT', 'NUT', 'IDLE', unforecast.sku})
+        self.assertEqual((rows['BOLT']['suggested_quantity'], rows['BOLT']['suggested_reorder_point']), ('90.00', '70.00'))
+        self.assertIsNone(rows['NEW']['suggested_quantity'])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('forecast_reorder_points', method='ses', days=30, stdout=out)
+        self.assertIn('3 product(s) forecast from 30 day(s) of deliveries', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('forecast_reorder_points', service_level=0.2, stdout=out)
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from inventory.models import Warehouse, Location, Product, LowStockAlert, StockMovement
+
+class ActiveAlertConstraintTest(TestCase):
+    def setUp(self):
+        warehouse = Warehouse.objects.create(name='WH', code='WH')
+        self.location = Location.objects.create(warehouse=warehouse, name='Loc', code='LOC')
+        self.product = Product.objects.create(name='P', sku='P', min_stock_level=10)
+
+    def _alert(self, **kwargs):
+        return LowStockAlert.objects.create(product=self.product, location=self.location,
+                                            current_quantity=Decimal('1'), threshold=Decimal('10'), **kwargs)
+
+    def test_many_resolved_alerts_per_pair(self):
+        self._alert(is_resolved=True)
+        self._alert(is_resolved=True)
+        self._alert()
+        self.assertEqual(LowStockAlert.objects.count(), 3)
+
+    def test_single_active_alert_per_pair(self):
+        self._alert()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._alert()
+
+class BenchmarkIndexesCommandTest(TransactionTestCase):
+    def test_reports_plans_and_rolls_back(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            call_command('benchmark_indexes', products=20, movements=200, operations=20, alerts=20,
+                         repeat=1, json_path=path, stdout=StringIO())
+            with open(path) as fh:
+                report = json.load(fh)
+
+        self.assertIn('ledger_by_product', report['queries'])
+        result = report['queries']['ledger_by_product']
+        self.assertIn('movement_product_ts_idx', result['after']['plan'])
+        self.assertNotIn('movement_product_ts_idx', result['before']['plan'])
+
+        # Seed data and the dropped indexes are rolled back
+        self.assertFalse(StockMovement.objects.exists())
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, StockMovement._meta.db_table)
+        self.assertIn('movement_product_ts_idx', indexes)
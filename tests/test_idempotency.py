@@ -0,0 +1,134 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from inventory.models import Warehouse, Location, Product, Operation, OperationLine, IdempotencyRecord, DocumentStatus
+from services.idempotency_service import IdempotencyService
+from services.operation_service import OperationService
+
+User = get_user_model()
+
+
+@override_settings(OPERATION_PDF_PRERENDER=False)
+class IdempotencyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.dock = Location.objects.create(warehouse=warehouse, name='Dock', code='DOCK')
+        self.product = Product.objects.create(name='Bolt', sku='BOLT', uom='pcs')
+        self.user = User.objects.create_user(username='scanner', password='password', role='MANAGER')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.order = {
+            'operation_type': 'RECEIPT', 'destination_location': self.dock.id,
+            'lines': [{'product': self.product.id, 'quantity_demanded': '5'}],
+        }
+
+    def _post(self, url, data=None, key='key-1', client=None):
+        return (client or self.client).post(url, data or {}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def _receipt(self):
+        operation = Operation.objects.create(operation_type=Operation.Type.RECEIPT, destination_location=self.dock)
+        OperationLine.objects.create(operation=operation, product=self.product, quantity_demanded=5)
+        return operation
+
+    def test_create_replay(self):
+        first = self._post('/api/inventory/operations/', self.order)
+        self.assertEqual(first.status_code, 201)
+        # A retry is served from the cache, without a query
+        with self.assertNumQueries(0):
+            second = self._post('/api/inventory/operations/', self.order)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(Operation.objects.count(), 1)
+
+        # And from the database once the cache is gone (another process)
+        cache.clear()
+        self.assertEqual(self._post('/api/inventory/operations/', self.order).json(), first.json())
+
+        # Without a key, or with another one, the request runs again
+        self.assertEqual(self._post('/api/inventory/operations/', self.order, key='key-2').status_code, 201)
+        self.assertEqual(self.client.post('/api/inventory/operations/', self.order, format='json').status_code, 201)
+        self.assertEqual(Operation.objects.count(), 3)
+
+    def test_key_reused_with_other_body(self):
+        self._post('/api/inventory/operations/', self.order)
+        response = self._post('/api/inventory/operations/', dict(self.order, operation_type='DELIVERY'))
+        self.assertEqual(response.status_code, 422)
+
+    def test_keys_are_per_user(self):
+        self._post('/api/inventory/operations/', self.order)
+        other = APIClient()
+        other.force_authenticate(user=User.objects.create_user(username='other', password='password', role='MANAGER'))
+        self.assertNotIn('Idempotent-Replayed', self._post('/api/inventory/operations/', self.order, client=other))
+        self.assertEqual(Operation.objects.count(), 2)
+
+    def test_validate_replay_skips_stock_service(self):
+        operation = self._receipt()
+        url = f'/api/inventory/operations/{operation.id}/validate/'
+        first = self._post(url)
+        self.assertEqual(first.data['status'], DocumentStatus.DONE)
+        with patch.object(OperationService, 'validate_operation') as validate:
+            second = self._post(url)
+        validate.assert_not_called()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        # A plain retry would have failed
+        self.assertEqual(self.client.post(url).status_code, 400)
+
+    def test_bulk_replay(self):
+        first = self._post('/api/inventory/operations/bulk/', [self.order, self.order])
+        second = self._post('/api/inventory/operations/bulk/', [self.order, self.order])
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(Operation.objects.count(), 2)
+
+    def test_duplicate_waits_for_first_attempt(self):
+        operation = self._receipt()
+        url = f'/api/inventory/operations/{operation.id}/validate/'
+        # Simulates the first attempt, still running in another worker
+        request = APIRequestFactory().post(url, {}, format='json')
+        request.user = self.user
+        scope = IdempotencyService.scope(request, 'key-1')
+        IdempotencyRecord.objects.create(scope=scope, fingerprint=IdempotencyService.fingerprint(request),
+                                         expires_at=timezone.now() + timedelta(hours=1))
+
+        def first_attempt_finishes(seconds):
+            IdempotencyRecord.objects.filter(scope=scope).update(response_status=200, response_body='{"id": 1}')
+
+        with patch('services.idempotency_service.time.sleep', side_effect=first_attempt_finishes) as sleep, \
+                patch.object(OperationService, 'validate_operation') as validate:
+            response = self._post(url)
+        sleep.assert_called_once()
+        validate.assert_not_called()
+        self.assertEqual(response.json(), {'id': 1})
+
+        IdempotencyRecord.objects.filter(scope=scope).update(response_status=None)
+        cache.clear()
+        with override_settings(IDEMPOTENCY_WAIT=0):
+            self.assertEqual(self._post(url).status_code, 409)
+        # An attempt that never finished is taken over after the lock timeout
+        IdempotencyRecord.objects.filter(scope=scope).update(created_at=timezone.now() - timedelta(hours=1))
+        with override_settings(IDEMPOTENCY_LOCK_TIMEOUT=60):
+            response = self._post(url)
+        self.assertEqual(response.data['status'], DocumentStatus.DONE)
+
+    def test_server_errors_are_not_stored(self):
+        operation = self._receipt()
+        url = f'/api/inventory/operations/{operation.id}/validate/'
+        with patch.object(OperationService, 'validate_operation', side_effect=RuntimeError('database went away')):
+            self.assertEqual(self._post(url).status_code, 500)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(self._post(url).status_code, 200)
+
+    def test_prune(self):
+        self._post('/api/inventory/operations/', self.order)
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('prune_idempotency_keys', stdout=out)
+        self.assertIn('1 expired', out.getvalue())
@@ -0,0 +1,98 @@
+from urllib.parse import parse_qs, urlparse
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from inventory.models import Product, Operation, StockMovement, DocumentStatus
+from inventory.pagination import KeysetPaginator
+
+User = get_user_model()
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='password', role='MANAGER')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='P', sku='P')
+
+        # Several movements share a timestamp so the id tie-breaker matters
+        now = timezone.now()
+        self.moves = [
+            StockMovement.objects.create(product=self.product, quantity=i, transaction_type=Operation.Type.RECEIPT,
+                                         timestamp=now - timezone.timedelta(minutes=i // 3))
+            for i in range(10)
+        ]
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_api_walks_whole_ledger_in_order(self):
+        expected = list(StockMovement.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk('/api/inventory/movements/?page_size=3'), expected)
+
+    def test_previous_cursor_returns_the_same_page(self):
+        first = self.client.get('/api/inventory/movements/?page_size=4').data
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([r['id'] for r in back['results']], [r['id'] for r in first['results']])
+
+    def test_concurrent_inserts_do_not_shift_pages(self):
+        first = self.client.get('/api/inventory/movements/?page_size=5').data
+        # New rows land at the head of the ledger while the client is paging
+        for i in range(3):
+            StockMovement.objects.create(product=self.product, quantity=100 + i, transaction_type=Operation.Type.RECEIPT)
+        rest = self._walk(first['next'])
+
+        seen = [r['id'] for r in first['results']] + rest
+        self.assertEqual(sorted(seen), sorted(m.id for m in self.moves))
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/inventory/movements/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_operations_are_paginated_by_created_at(self):
+        for _ in range(3):
+            Operation.objects.create(operation_type=Operation.Type.RECEIPT)
+        response = self.client.get('/api/inventory/operations/?page_size=2')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(self._walk('/api/inventory/operations/?page_size=2')), 3)
+
+    def test_operations_ordering(self):
+        statuses = [DocumentStatus.READY, DocumentStatus.DONE, DocumentStatus.DRAFT, DocumentStatus.DONE, DocumentStatus.WAITING]
+        for status in statuses:
+            Operation.objects.create(operation_type=Operation.Type.RECEIPT, status=status)
+        for ordering, expected in (
+            ('status', ('status', 'id')),
+            ('-status', ('-status', '-id')),
+            ('created_at', ('created_at', 'id')),
+            ('-updated_at', ('-updated_at', '-id')),
+            ('partner_name', ('-created_at', '-id')),  # not allowed, default order
+        ):
+            ids = list(Operation.objects.order_by(*expected).values_list('id', flat=True))
+            self.assertEqual(self._walk(f'/api/inventory/operations/?page_size=2&ordering={ordering}'), ids, ordering)
+
+        # Previous-page cursors work in ascending order too
+        first = self.client.get('/api/inventory/operations/?page_size=2&ordering=status').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([r['id'] for r in back['results']], [r['id'] for r in first['results']])
+        # A cursor only continues the ordering it was issued for
+        cursor = parse_qs(urlparse(first['next']).query)['cursor'][0]
+        response = self.client.get('/api/inventory/operations/', {'ordering': '-status', 'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_deep_page_is_a_single_query(self):
+        paginator = KeysetPaginator(StockMovement.objects.all(), 'timestamp', 2)
+        page = paginator.page()
+        for _ in range(3):
+            page = paginator.page(page.next_cursor)
+        with self.assertNumQueries(1):
+            paginator.page(page.next_cursor)
@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from django.test import TestCase
+from rest_framework.test import APIClient
+from inventory.models import Warehouse, Location, Product, Operation, StockMovement
+
+User = get_user_model()
+
+class LedgerExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='auditor', password='password', role='MANAGER')
+        self.client.force_authenticate(user=self.user)
+
+        self.wh1 = Warehouse.objects.create(name='WH1', code='WH1')
+        self.wh2 = Warehouse.objects.create(name='WH2', code='WH2')
+        self.loc1 = Location.objects.create(warehouse=self.wh1, name='L1', code='L1')
+        self.loc2 = Location.objects.create(warehouse=self.wh2, name='L2', code='L2')
+        self.p1 = Product.objects.create(name='P1', sku='P1')
+        self.p2 = Product.objects.create(name='P2', sku='P2')
+
+        now = timezone.now()
+        self.old = StockMovement.objects.create(product=self.p1, to_location=self.loc1, quantity=Decimal('10'),
+                                                transaction_type=Operation.Type.RECEIPT, timestamp=now - timedelta(days=10))
+        self.move = StockMovement.objects.create(product=self.p1, from_location=self.loc1, to_location=self.loc2,
+                                                 quantity=Decimal('4'), transaction_type=Operation.Type.TRANSFER,
+                                                 timestamp=now - timedelta(days=1), user=self.user)
+        self.other = StockMovement.objects.create(product=self.p2, to_location=self.loc2, quantity=Decimal('1.5'),
+                                                  transaction_type=Operation.Type.RECEIPT, timestamp=now)
+
+    def _get(self, query):
+        response = self.client.get(f'/api/inventory/movements/export/?{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_in_chronological_order(self):
+        rows = list(csv.DictReader(io.StringIO(self._get('file_format=csv'))))
+        self.assertEqual([int(r['id']) for r in rows], [self.old.id, self.move.id, self.other.id])
+        self.assertEqual(rows[1]['from_warehouse'], 'WH1')
+        self.assertEqual(rows[1]['to_location'], 'L2')
+        self.assertEqual(rows[1]['user'], 'auditor')
+        self.assertEqual(rows[2]['quantity'], '1.50')
+
+    def test_filters_match_ledger_view(self):
+        lines = self._get('file_format=jsonl&product=%d' % self.p1.id).splitlines()
+        self.assertEqual([json.loads(l)['id'] for l in lines], [self.old.id, self.move.id])
+
+        # Warehouse matches either side of the move
+        lines = self._get('file_format=jsonl&warehouse=%d' % self.wh2.id).splitlines()
+        self.assertEqual([json.loads(l)['id'] for l in lines], [self.move.id, self.other.id])
+
+        start = (timezone.localdate() - timedelta(days=2)).isoformat()
+        end = (timezone.localdate() - timedelta(days=1)).isoformat()
+        lines = self._get(f'file_format=jsonl&start_date={start}&end_date={end}').splitlines()
+        self.assertEqual([json.loads(l)['id'] for l in lines], [self.move.id])
+
+    def test_columnar_row_groups(self):
+        groups = [json.loads(line) for line in self._get('file_format=columnar').splitlines()]
+        self.assertEqual(sum(g['row_count'] for g in groups), 3)
+        self.assertEqual(groups[0]['columns']['sku'], ['P1', 'P1', 'P2'])
+
+    def test_invalid_filters(self):
+        response = self.client.get('/api/inventory/movements/export/?start_date=yesterday')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/inventory/movements/export/?file_format=xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_ledger', format='jsonl', warehouse=self.wh1.id, stdout=out)
+        self.assertEqual([json.loads(l)['id'] for l in out.getvalue().splitlines()], [self.old.id, self.move.id])
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from inventory.models import Warehouse, Location, Product, Operation, ProductStock, StockMovement
+from services.ledger_verification_service import LedgerVerificationService
+from services.stock_service import StockService
+
+class LedgerVerificationTest(TestCase):
+    def setUp(self):
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.loc_a = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        self.loc_b = Location.objects.create(warehouse=warehouse, name='B', code='B')
+        self.products = [Product.objects.create(name=f'P{i}', sku=f'P{i}', uom='pcs') for i in range(4)]
+        operation = Operation.objects.create(operation_type=Operation.Type.ADJUSTMENT)
+        for product in self.products:
+            StockService.increase_stock(product, self.loc_a, Decimal('10'), operation)
+            StockService.move_stock(product, self.loc_a, self.loc_b, Decimal('4'), operation)
+        StockService.adjust_stock(self.products[0], self.loc_a, Decimal('2'), operation)
+        self.operation = operation
+
+    def test_consistent_ledger(self):
+        report = LedgerVerificationService.verify(range_size=3)
+        self.assertEqual(report['ranges'], 2)
+        self.assertEqual(report['movements'], StockMovement.objects.count())
+        self.assertEqual(report['discrepancies'], [])
+
+    def test_unlogged_edit_is_located_and_corrected(self):
+        product = self.products[1]
+        # An edit that bypasses the ledger, followed by a normal movement
+        ProductStock.objects.filter(product=product, location=self.loc_a).update(quantity=Decimal('9'))
+        StockService.decrease_stock(product, self.loc_a, Decimal('1'), self.operation)
+        movement = StockMovement.objects.latest('id')
+
+        report = LedgerVerificationService.verify(range_size=1)
+        self.assertEqual(report['summary'], {'stock_mismatch': 1, 'chain_break': 1, 'negative_balance': 0})
+        mismatch = next(r for r in report['discrepancies'] if r['kind'] == 'stock_mismatch')
+        self.assertEqual((mismatch['ledger'], mismatch['stock'], mismatch['difference']),
+                         (Decimal('5'), Decimal('8'), Decimal('3')))
+        chain_break = next(r for r in report['discrepancies'] if r['kind'] == 'chain_break')
+        self.assertEqual(chain_break['movement_id'], movement.id)
+
+        operation = LedgerVerificationService.correct(report['discrepancies'])
+        self.assertEqual(operation.status, 'DONE')
+        self.assertEqual(ProductStock.objects.get(product=product, location=self.loc_a).quantity, Decimal('8'))
+
+        report = LedgerVerificationService.verify()
+        self.assertEqual(report['summary'], {'stock_mismatch': 0, 'chain_break': 1, 'negative_balance': 0})
+        # Nothing left to book
+        self.assertIsNone(LedgerVerificationService.correct(report['discrepancies']))
+
+    def test_stock_without_ledger(self):
+        ProductStock.objects.create(product=self.products[2], location=Location.objects.create(
+            warehouse=self.loc_a.warehouse, name='C', code='C'), quantity=Decimal('5'))
+        report = LedgerVerificationService.verify()
+        self.assertEqual([(r['kind'], r['ledger'], r['stock']) for r in report['discrepancies']],
+                         [('stock_mismatch', Decimal('0'), Decimal('5'))])
+
+    def test_command_report(self):
+        ProductStock.objects.filter(product=self.products[3], location=self.loc_b).update(quantity=Decimal('1'))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            with self.assertRaises(CommandError):
+                call_command('verify_ledger', workers=1, output=path, stdout=StringIO(), stderr=StringIO())
+            with open(path) as fh:
+                report = json.load(fh)
+        self.assertEqual(report['summary']['stock_mismatch'], 1)
+        self.assertEqual(report['discrepancies'][0]['difference'], '-3.00')
+
+        out = StringIO()
+        call_command('verify_ledger', workers=1, fix=True, stdout=out, stderr=StringIO())
+        self.assertIn('booked in ADJ-', out.getvalue())
+        self.assertEqual(LedgerVerificationService.verify()['summary']['stock_mismatch'], 0)
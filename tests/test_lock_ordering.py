@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from inventory.models import Warehouse, Location, Product, Operation, DocumentStatus, ProductStock
+from services.stock_service import StockService, retry_on_conflict
+from services.operation_service import OperationService
+
+
+class LockOrderingTests(TestCase):
+    def setUp(self):
+        warehouse = Warehouse.objects.create(name='WH', code='WH')
+        self.loc_a = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        self.loc_b = Location.objects.create(warehouse=warehouse, name='B', code='B')
+        self.p1 = Product.objects.create(name='P1', sku='P1', uom='pcs')
+        self.p2 = Product.objects.create(name='P2', sku='P2', uom='pcs')
+
+    def test_lock_stocks_uses_canonical_order_and_creates_missing_rows(self):
+        pairs = {(self.p2.id, self.loc_b.id), (self.p1.id, self.loc_b.id), (self.p2.id, self.loc_a.id)}
+        stocks = StockService.lock_stocks(pairs)
+
+        self.assertEqual(list(stocks.keys()), sorted(pairs))
+        self.assertEqual(ProductStock.objects.count(), 3)
+
+
+@override_settings(STOCK_LOCK_BACKOFF_BASE=0)
+class RetryOnConflictTests(TransactionTestCase):
+    # Retries only happen at the outermost transaction, which TestCase would hide
+
+    def test_retries_lock_errors_until_success(self):
+        calls = []
+
+        @retry_on_conflict
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('deadlock detected')
+            return 'ok'
+
+        self.assertEqual(flaky(), 'ok')
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+
+        @retry_on_conflict
+        def broken():
+            calls.append(1)
+            raise OperationalError('no such table')
+
+        with self.assertRaises(OperationalError):
+            broken()
+        self.assertEqual(len(calls), 1)
+
+
+@override_settings(STOCK_LOCK_MAX_ATTEMPTS=50, STOCK_LOCK_BACKOFF_BASE=0.01, STOCK_LOCK_BACKOFF_MAX=0.1,
+                   OPERATION_PDF_PRERENDER=False)
+class ConcurrentTransferStressTest(TransactionTestCase):
+    """
+    Fires transfers in opposite directions over the same SKUs from a thread pool.
+    """
+    WORKERS = 8
+    TRANSFERS = 40
+
+    def setUp(self):
+        warehouse = Warehouse.objects.create(name='WH', code='WH')
+        self.loc_a = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        self.loc_b = Location.objects.create(warehouse=warehouse, name='B', code='B')
+        self.products = [Product.objects.create(name=f'P{i}', sku=f'P{i}', uom='pcs') for i in range(3)]
+        for product in self.products:
+            ProductStock.objects.create(product=product, location=self.loc_a, quantity=1000)
+            ProductStock.objects.create(product=product, location=self.loc_b, quantity=1000)
+
+        self.operation_ids = []
+        for i in range(self.TRANSFERS):
+            forward = i % 2 == 0
+            op = Operation.objects.create(
+                operation_type=Operation.Type.TRANSFER,
+                source_location=self.loc_a if forward else self.loc_b,
+                destination_location=self.loc_b if forward else self.loc_a,
+                status=DocumentStatus.READY
+            )
+            # Opposite line order as well as opposite direction
+            for product in (self.products if forward else reversed(self.products)):
+                op.lines.create(product=product, quantity_demanded=Decimal(i + 1))
+            self.operation_ids.append(op.id)
+
+    def _validate(self, operation_id):
+        try:
+            OperationService.validate_operation(operation_id)
+        finally:
+            connection.close()
+
+    @patch('services.operation_service.NotificationService.notify_transfer_validated')
+    def test_conflicting_transfers_all_commit_with_correct_balances(self, _notify):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(self._validate, self.operation_ids))
+
+        self.assertEqual(len(results), self.TRANSFERS)
+        self.assertEqual(Operation.objects.filter(status=DocumentStatus.DONE).count(), self.TRANSFERS)
+
+        # Even transfers (A -> B) move 1, 3, 5, ...; odd transfers (B -> A) move 2, 4, 6, ...
+        net_to_b = sum((i + 1) if i % 2 == 0 else -(i + 1) for i in range(self.TRANSFERS))
+        for product in self.products:
+            self.assertEqual(ProductStock.objects.get(product=product, location=self.loc_a).quantity, 1000 - net_to_b)
+            self.assertEqual(ProductStock.objects.get(product=product, location=self.loc_b).quantity, 1000 + net_to_b)
@@ -0,0 +1,90 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from inventory.models import Warehouse, Location, Product, Operation, ProductStock, LowStockAlert, NotificationOutbox
+from services.low_stock_service import LowStockService
+from services.stock_service import StockService
+
+
+def _alert_queries(ctx):
+    return [q['sql'] for q in ctx.captured_queries if 'inventory_lowstockalert' in q['sql']]
+
+
+@override_settings(NOTIFICATION_OUTBOX_AUTO_DISPATCH=False)
+class LowStockEvaluationTest(TestCase):
+    def setUp(self):
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.loc_a = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        self.loc_b = Location.objects.create(warehouse=warehouse, name='B', code='B')
+        self.products = [Product.objects.create(name=f'P{i}', sku=f'P{i}', uom='pcs', min_stock_level=10)
+                         for i in range(3)]
+        for product in self.products:
+            for location in (self.loc_a, self.loc_b):
+                ProductStock.objects.create(product=product, location=location, quantity=20)
+        self.operation = Operation.objects.create(operation_type=Operation.Type.DELIVERY)
+
+    def test_write_path_does_not_touch_alerts(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as ctx:
+                StockService.decrease_stock(self.products[0], self.loc_a, Decimal('15'), self.operation)
+        self.assertEqual(_alert_queries(ctx), [])
+        self.assertFalse(LowStockAlert.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertTrue(LowStockAlert.objects.filter(product=self.products[0], location=self.loc_a).exists())
+
+    def test_transaction_is_evaluated_in_one_batch(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for product in self.products:
+                    for location in (self.loc_a, self.loc_b):
+                        StockService.decrease_stock(product, location, Decimal('15'), self.operation)
+
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        # Read active alerts, bulk insert, read back the new ids for the alert feed;
+        # however many pairs were touched
+        self.assertEqual(len(_alert_queries(ctx)), 3)
+        self.assertEqual(LowStockAlert.objects.filter(is_resolved=False).count(), 6)
+        self.assertEqual(NotificationOutbox.objects.count(), 6)
+
+    def test_rolled_back_pairs_are_dropped(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    StockService.decrease_stock(self.products[0], self.loc_a, Decimal('15'), self.operation)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            ProductStock.objects.filter(product=self.products[0], location=self.loc_a).update(quantity=1)
+            StockService.decrease_stock(self.products[1], self.loc_a, Decimal('15'), self.operation)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(list(LowStockAlert.objects.values_list('product_id', flat=True)), [self.products[1].id])
+
+    def test_evaluation_is_idempotent_and_resolves(self):
+        pair = (self.products[0].id, self.loc_a.id)
+        ProductStock.objects.filter(product=self.products[0], location=self.loc_a).update(quantity=3)
+        self.assertEqual(LowStockService.evaluate(check=[pair]), {'created': 1, 'resolved': 0})
+        self.assertEqual(LowStockService.evaluate(check=[pair]), {'created': 0, 'resolved': 0})
+        # Increases never raise alerts on their own
+        ProductStock.objects.filter(product=self.products[1], location=self.loc_a).update(quantity=3)
+        self.assertEqual(LowStockService.evaluate(resolve=[(self.products[1].id, self.loc_a.id)])['created'], 0)
+
+        ProductStock.objects.filter(product=self.products[0], location=self.loc_a).update(quantity=30)
+        self.assertEqual(LowStockService.evaluate(resolve=[pair]), {'created': 0, 'resolved': 1})
+        alert = LowStockAlert.objects.get()
+        self.assertTrue(alert.is_resolved)
+        self.assertEqual(alert.current_quantity, Decimal('30'))
+
+    def test_sweep_command(self):
+        ProductStock.objects.filter(location=self.loc_b).update(quantity=2)
+        out = StringIO()
+        call_command('evaluate_low_stock', stdout=out)
+        self.assertIn('3 alert(s) created', out.getvalue())
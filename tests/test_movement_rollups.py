@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from inventory.models import Warehouse, Location, Product, StockMovement, Operation, MovementRollup
+from services.movement_rollup_service import MovementRollupService, HOUR
+
+User = get_user_model()
+NOW = datetime(2025, 3, 10, 15, 30, tzinfo=dt_timezone.utc)
+
+
+class MovementRollupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.main = Warehouse.objects.create(name='Main', code='WH1')
+        other = Warehouse.objects.create(name='Overflow', code='WH2')
+        self.shelf = Location.objects.create(warehouse=self.main, name='Shelf', code='SHELF')
+        self.dock = Location.objects.create(warehouse=self.main, name='Dock', code='DOCK')
+        self.yard = Location.objects.create(warehouse=other, name='Yard', code='YARD')
+        self.bolt = Product.objects.create(name='Bolt', sku='BOLT', uom='pcs')
+        self.nut = Product.objects.create(name='Nut', sku='NUT', uom='pcs')
+        self._history()
+
+    def _move(self, product, quantity, when, source=None, destination=None, kind=Operation.Type.RECEIPT):
+        return StockMovement.objects.create(product=product, quantity=Decimal(quantity), timestamp=when,
+                                            from_location=source, to_location=destination, transaction_type=kind)
+
+    def _history(self):
+        for day in range(40):
+            when = NOW - timedelta(days=day, hours=day % 5)
+            self._move(self.bolt, day + 1, when, destination=self.dock)
+            self._move(self.bolt, 2, when + timedelta(minutes=5), self.dock, self.shelf, Operation.Type.TRANSFER)
+            self._move(self.nut, 3, when, self.shelf, kind=Operation.Type.DELIVERY)
+            if day % 7 == 0:
+                self._move(self.nut, 50, when, self.shelf, self.yard, Operation.Type.TRANSFER)
+
+    def _assert_matches_ledger(self, since=NOW - timedelta(days=30)):
+        for filters in ({}, {'product_id': self.nut.id}, {'location_id': self.dock.id},
+                        {'warehouse_id': self.main.id}, {'transaction_type': Operation.Type.TRANSFER}):
+            self.assertEqual(MovementRollupService.top_products(since, **filters),
+                             MovementRollupService.ledger_top_products(since, **filters))
+            self.assertEqual(MovementRollupService.trend(since, **filters),
+                             MovementRollupService.ledger_trend(since, **filters))
+            self.assertEqual(MovementRollupService.trend(NOW - timedelta(days=3), interval=HOUR, **filters),
+                             MovementRollupService.ledger_trend(NOW - timedelta(days=3), interval=HOUR, **filters))
+
+    def test_incremental_build(self):
+        result = MovementRollupService.build(chunk_size=25)
+        self.assertEqual(result, {'movements': 126, 'watermark': StockMovement.objects.latest('id').id})
+        self.assertEqual(sum(MovementRollup.objects.filter(period='DAY', grain='PRODUCT').values_list(
+            'movement_count', flat=True)), 126)
+        self._assert_matches_ledger()
+
+        # Only the new movements are aggregated, into the existing buckets
+        self._move(self.bolt, 7, NOW - timedelta(days=2, hours=2, minutes=-20), destination=self.dock)
+        rows = MovementRollup.objects.count()
+        self.assertEqual(MovementRollupService.build()['movements'], 1)
+        self.assertEqual(MovementRollup.objects.count(), rows)
+        self.assertEqual(MovementRollupService.build()['movements'], 0)
+        self._assert_matches_ledger()
+
+    def test_reads_include_movements_past_the_watermark(self):
+        MovementRollupService.build()
+        self._move(self.nut, 500, NOW - timedelta(days=1), self.shelf, kind=Operation.Type.DELIVERY)
+        self._assert_matches_ledger()
+        top = MovementRollupService.top_products(NOW - timedelta(days=30))
+        self.assertEqual(top[0]['product__name'], 'Nut')
+
+    def test_trend_sides(self):
+        MovementRollupService.build()
+        day = [row for row in MovementRollupService.trend(NOW - timedelta(hours=1), warehouse_id=self.main.id)
+               if row['transaction_type'] == Operation.Type.TRANSFER]
+        # Dock -> Shelf stays inside the warehouse; Shelf -> Yard leaves it
+        self.assertEqual(day, [{'bucket': datetime(2025, 3, 10, tzinfo=dt_timezone.utc), 'transaction_type': 'TRANSFER',
+                                'quantity_in': Decimal('2'), 'quantity_out': Decimal('52'), 'moves': 2}])
+
+    def test_reaggregate(self):
+        MovementRollupService.build()
+        # A ledger row corrected by hand is picked up by re-aggregating its days
+        StockMovement.objects.filter(timestamp__gte=NOW - timedelta(days=5)).update(quantity=Decimal('9'))
+        self.assertNotEqual(MovementRollupService.top_products(NOW - timedelta(days=10)),
+                            MovementRollupService.ledger_top_products(NOW - timedelta(days=10)))
+        result = MovementRollupService.reaggregate(NOW - timedelta(days=5))
+        self.assertEqual(result['movements'], StockMovement.objects.filter(timestamp__gte=datetime(
+            2025, 3, 5, tzinfo=dt_timezone.utc)).count())
+        self._assert_matches_ledger()
+
+        StockMovement.objects.filter(product=self.nut).delete()
+        MovementRollupService.reaggregate(chunk_size=30)
+        self.assertFalse(MovementRollup.objects.filter(product=self.nut).exists())
+        self._assert_matches_ledger()
+
+    def test_commands(self):
+        out = StringIO()
+        call_command('build_movement_rollups', stdout=out)
+        self.assertIn('126 movement(s) aggregated', out.getvalue())
+        call_command('reaggregate_movement_rollups', since='2025-03-09', stdout=out)
+        self.assertIn('from 2025-03-09', out.getvalue())
+        self._assert_matches_ledger()
+
+    def test_dashboard_endpoints(self):
+        MovementRollupService.build()
+        self._move(self.nut, 1000, timezone.now(), self.shelf, kind=Operation.Type.DELIVERY)
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='viewer', password='password'))
+
+        movers = client.get('/api/dashboard/charts/').data['top_movers']
+        self.assertEqual(movers, [{'product__name': 'Nut', 'moves': 1, 'total_qty': Decimal('1000')}])
+
+        response = client.get('/api/dashboard/movement-trend/', {'days': 3, 'location': self.shelf.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['transaction_type'], row['quantity_out']) for row in response.data['results']],
+                         [('DELIVERY', Decimal('1000'))])
+        self.assertEqual(client.get('/api/dashboard/movement-trend/', {'interval': 'week'}).status_code, 400)
+        self.assertEqual(client.get('/api/dashboard/movement-trend/', {'days': 90, 'interval': 'hour'}).status_code, 400)
+        self.assertEqual(client.get('/api/dashboard/movement-trend/', {'product': 'x'}).status_code, 400)
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from inventory.models import Product, Warehouse, Location, Operation, ProductStock, NotificationOutbox
+from services.notification_service import NotificationService
+from services.stock_service import StockService
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NotificationOutboxTest(TestCase):
+    def setUp(self):
+        self.warehouse = Warehouse.objects.create(name="Main", code="MAIN")
+        self.location = Location.objects.create(warehouse=self.warehouse, name="Rack A", code="A1")
+        self.product = Product.objects.create(name="Widget", sku="W-1", uom="pcs", min_stock_level=10)
+        ProductStock.objects.create(product=self.product, location=self.location, quantity=20)
+
+    def test_stock_change_queues_instead_of_sending(self):
+        op = Operation.objects.create(operation_type=Operation.Type.DELIVERY)
+        with self.captureOnCommitCallbacks() as evaluation:
+            StockService.decrease_stock(self.product, self.location, Decimal('15'), op)
+        # Nothing is queued under the stock lock; the low-stock evaluation runs after commit
+        self.assertFalse(NotificationOutbox.objects.exists())
+        with self.captureOnCommitCallbacks() as callbacks:
+            for callback in evaluation:
+                callback()
+
+        self.assertEqual(len(mail.outbox), 0)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.status, NotificationOutbox.Status.PENDING)
+        self.assertEqual(entry.kind, 'LOW_STOCK')
+        # Dispatch is only scheduled for after commit
+        self.assertIn(NotificationService._dispatch_in_background, callbacks)
+
+    def test_dispatch_sends_and_marks_sent(self):
+        NotificationService.notify_low_stock(self.product, self.location, Decimal('5'))
+
+        self.assertEqual(NotificationService.dispatch_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('W-1', mail.outbox[0].subject)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.status, NotificationOutbox.Status.SENT)
+        self.assertIsNotNone(entry.sent_at)
+        self.assertEqual(NotificationService.dispatch_pending(), 0)
+
+    def test_pending_duplicates_are_collapsed(self):
+        NotificationService.notify_low_stock(self.product, self.location, Decimal('5'))
+        NotificationService.notify_low_stock(self.product, self.location, Decimal('3'))
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+        # Rows that slipped in concurrently are still sent once per key
+        NotificationOutbox.objects.create(kind='LOW_STOCK', dedupe_key=f"low-stock:{self.product.id}:{self.location.id}",
+                                          subject='dup', body='dup', recipients=['a@example.com'])
+        NotificationService.dispatch_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(NotificationOutbox.objects.exclude(status=NotificationOutbox.Status.SENT).exists())
+
+    @override_settings(NOTIFICATION_OUTBOX_MAX_ATTEMPTS=2, NOTIFICATION_OUTBOX_BACKOFF_BASE=60)
+    def test_failures_back_off_then_give_up(self):
+        NotificationService.notify_low_stock(self.product, self.location, Decimal('5'))
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('smtp down')):
+            self.assertEqual(NotificationService.dispatch_pending(), 0)
+            entry = NotificationOutbox.objects.get()
+            self.assertEqual((entry.status, entry.attempts), (NotificationOutbox.Status.PENDING, 1))
+            self.assertGreater(entry.next_attempt_at, timezone.now() + timedelta(seconds=30))
+            self.assertIn('smtp down', entry.last_error)
+
+            # Not due yet
+            self.assertEqual(NotificationService.dispatch_pending(), 0)
+            entry.refresh_from_db()
+            self.assertEqual(entry.attempts, 1)
+
+            NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+            NotificationService.dispatch_pending()
+            entry.refresh_from_db()
+            self.assertEqual((entry.status, entry.attempts), (NotificationOutbox.Status.FAILED, 2))
+
+    def test_command_drains_outbox_in_batches(self):
+        for i in range(5):
+            NotificationService.enqueue('TEST', f'test:{i}', f'Subject {i}', 'Body', ['a@example.com'])
+
+        out = StringIO()
+        call_command('dispatch_notifications', '--batch-size', '2', stdout=out)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn('Dispatched 5', out.getvalue())
@@ -30,6 +30,10 @@ class NotificationServiceTest(TestCase):
             Decimal('5')  # Below min_stock_level of 10
         )
         
+        # Nothing is sent until the outbox is drained
+        self.assertEqual(len(mail.outbox), 0)
+        NotificationService.dispatch_pending()
+
         # Check that one email was sent
         self.assertEqual(len(mail.outbox), 1)
         
@@ -48,6 +52,7 @@ class NotificationServiceTest(TestCase):
             self.location,
             Decimal('15')  # Above min_stock_level of 10
         )
+        NotificationService.dispatch_pending()
         
         # Check that NO email was sent
         self.assertEqual(len(mail.outbox), 0)
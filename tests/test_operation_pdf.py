@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from inventory.models import Warehouse, Location, Product, Operation, OperationLine, DocumentStatus
+from inventory.utils import generate_operation_pdf
+from services.operation_pdf_service import OperationPdfService
+from services.operation_service import OperationService
+
+User = get_user_model()
+
+
+class PdfStorageMixin:
+    def setUp(self):
+        self.pdf_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pdf_root, ignore_errors=True)
+        storages = override_settings(STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            'operation_pdfs': {'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                               'OPTIONS': {'location': self.pdf_root}},
+        })
+        storages.enable()
+        self.addCleanup(storages.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='clerk', password='password'))
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.location = Location.objects.create(warehouse=warehouse, name='Dock', code='DOCK')
+
+    def _receipt(self, lines):
+        operation = Operation.objects.create(operation_type=Operation.Type.RECEIPT, destination_location=self.location)
+        for i in range(lines):
+            product = Product.objects.create(name=f'P{operation.id}-{i}', sku=f'SKU-{operation.id}-{i}', uom='pcs')
+            OperationLine.objects.create(operation=operation, product=product, quantity_demanded=Decimal('2'))
+        with patch.object(OperationPdfService, '_render_in_background') as background, \
+                self.captureOnCommitCallbacks(execute=True):
+            OperationService.validate_operation(operation.id)
+        background.assert_called_once_with([operation.id])
+        return Operation.objects.get(pk=operation.pk)
+
+
+class OperationPdfCacheTest(PdfStorageMixin, TestCase):
+    def test_query_count_is_constant(self):
+        small, large = self._receipt(2), self._receipt(25)
+        for operation in (small, large):
+            with self.assertNumQueries(2):
+                generate_operation_pdf(OperationPdfService.queryset().get(pk=operation.pk))
+
+    def test_render_once(self):
+        operation = self._receipt(3)
+        self.assertEqual(OperationPdfService.render([operation.id]), 1)
+        self.assertEqual(OperationPdfService.render([operation.id]), 0)
+        stored = OperationPdfService.get_pdf(operation)
+        self.assertTrue(stored.startswith(b'%PDF'))
+
+        # A new validation time means a new document, never the stale file
+        Operation.objects.filter(pk=operation.pk).update(validated_at=operation.validated_at.replace(year=2000))
+        self.assertEqual(OperationPdfService.render([operation.id]), 1)
+
+    def test_download_with_etag(self):
+        operation = self._receipt(2)
+        url = f'/api/inventory/operations/{operation.id}/pdf/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], OperationPdfService.etag(operation))
+        self.assertTrue(OperationPdfService.storage().exists(OperationPdfService.filename(operation)))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        with patch('services.operation_pdf_service.generate_operation_pdf') as render:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH='"something-else"')
+        self.assertEqual(response.status_code, 200)
+        render.assert_not_called()
+
+    def test_not_validated(self):
+        operation = Operation.objects.create(operation_type=Operation.Type.RECEIPT, status=DocumentStatus.DRAFT)
+        response = self.client.get(f'/api/inventory/operations/{operation.id}/pdf/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_backfill_command(self):
+        operations = [self._receipt(1), self._receipt(1)]
+        out = StringIO()
+        call_command('render_operation_pdfs', stdout=out)
+        self.assertIn('2 PDF(s) rendered', out.getvalue())
+        call_command('render_operation_pdfs', days=1, stdout=out)
+        self.assertIn('0 PDF(s) rendered', out.getvalue())
+        for operation in operations:
+            self.assertTrue(OperationPdfService.storage().exists(OperationPdfService.filename(operation)))
+
+
+@override_settings(OPERATION_PDF_EXPORT_WORKERS=1)
+class OperationPdfExportTest(PdfStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.receipts = [self._receipt(2) for _ in range(3)]
+        self.draft = Operation.objects.create(operation_type=Operation.Type.RECEIPT, destination_location=self.location)
+
+    def test_zip(self):
+        response = self.client.get('/api/inventory/operations/export-pdf/', {'operation_type': 'RECEIPT'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Document-Count'], '3')
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f'{op.reference_number}.pdf' for op in self.receipts])
+        self.assertEqual(archive.read(archive.namelist()[0]), OperationPdfService.get_pdf(self.receipts[0]))
+
+    @override_settings(OPERATION_PDF_EXPORT_WORKERS=4)
+    def test_zip_renders_in_the_request(self):
+        with patch('services.operation_pdf_service.process_pool') as pool:
+            response = self.client.get('/api/inventory/operations/export-pdf/')
+            archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 3)
+        pool.assert_not_called()
+
+    def test_merged_pdf(self):
+        response = self.client.get('/api/inventory/operations/export-pdf/', {'file_format': 'pdf'})
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        data = b''.join(response.streaming_content)
+        self.assertTrue(data.startswith(b'%PDF'))
+        self.assertEqual(data.count(b'/Type /Page\n'), 3)
+
+    def test_no_match(self):
+        response = self.client.get('/api/inventory/operations/export-pdf/', {'operation_type': 'DELIVERY'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/inventory/operations/export-pdf/', {'file_format': 'tar'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        path = os.path.join(self.pdf_root, 'export.zip')
+        out = StringIO()
+        call_command('export_operation_pdfs', path, type='RECEIPT', workers=1, stdout=out)
+        self.assertIn('3 document(s)', out.getvalue())
+        self.assertIn('docs/s', out.getvalue())
+        self.assertEqual(len(zipfile.ZipFile(path).namelist()), 3)
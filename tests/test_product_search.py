@@ -0,0 +1,86 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Q
+from django.test import TestCase
+from rest_framework.test import APIClient
+from inventory.models import Product
+from services.product_search_service import ProductSearchService, SkuPrefixIndex
+
+User = get_user_model()
+
+
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        ProductSearchService.invalidate()
+        for sku, name in [
+            ('BR-100', 'Steel Bracket 40mm'),
+            ('BR-1001', 'Brass Bracket'),
+            ('HN-200', 'Door Hinge'),
+            ('WS-300', 'Nylon Washer BR'),
+            ('VA-12', 'Ball Valve 1/2"'),
+        ]:
+            Product.objects.create(sku=sku, name=name, uom='pcs')
+
+    def _legacy(self, terms):
+        queryset = Product.objects.all()
+        for word in terms.split():
+            queryset = queryset.filter(Q(name__icontains=word) | Q(sku__icontains=word))
+        return set(queryset.values_list('sku', flat=True))
+
+    def test_filter_matches_substring_semantics(self):
+        self.assertEqual(ProductSearchService.backend(), 'fts5')
+        for terms in ['bracket', 'BR', 'br-10', 'acke', 'steel 40', 'br washer', '1/2"', 'x', 'nothing', '']:
+            with self.subTest(terms=terms):
+                found = ProductSearchService.filter(Product.objects.all(), terms)
+                self.assertEqual(set(found.values_list('sku', flat=True)), self._legacy(terms))
+
+    def test_index_follows_updates_and_deletes(self):
+        Product.objects.filter(sku='HN-200').update(name='Gate Hinge')
+        self.assertEqual([p.sku for p in ProductSearchService.search('gate')], ['HN-200'])
+        self.assertEqual(ProductSearchService.search('door'), [])
+        Product.objects.filter(sku='HN-200').delete()
+        self.assertEqual(ProductSearchService.search('hinge'), [])
+
+    def test_search_ranking(self):
+        self.assertEqual([p.sku for p in ProductSearchService.search('br-100')], ['BR-100', 'BR-1001'])
+        self.assertEqual([p.sku for p in ProductSearchService.search('bra')], ['BR-1001', 'BR-100'])
+
+    def test_autocomplete_with_stale_index(self):
+        self.assertEqual([r['sku'] for r in ProductSearchService.autocomplete('br', 2)], ['BR-100', 'BR-1001'])
+        # Neither change has invalidated the index (no commit in a TestCase)
+        Product.objects.filter(sku='BR-100').delete()
+        Product.objects.create(sku='BR-2000', name='Corner Bracket', uom='pcs')
+        results = ProductSearchService.autocomplete('br-', 5)
+        self.assertEqual([r['sku'] for r in results], ['BR-1001', 'BR-2000'])
+        self.assertEqual(set(results[0]), {'id', 'sku', 'name', 'uom'})
+
+    def test_invalidated_on_commit(self):
+        index = ProductSearchService.sku_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(sku='BR-3000', name='Shelf Bracket', uom='pcs')
+        self.assertIsNot(ProductSearchService.sku_index(), index)
+        self.assertEqual(len(ProductSearchService.sku_index()), 6)
+
+    def test_prefix_index(self):
+        index = SkuPrefixIndex([('ab-2', 2), ('AB-1', 1), ('AC-1', 3)])
+        self.assertEqual(index.lookup('ab', 10), [1, 2])
+        self.assertEqual(index.lookup('AB', 1), [1])
+        self.assertEqual(index.lookup('B', 10), [])
+
+    def test_api(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='clerk', password='password'))
+        response = client.get('/api/inventory/products/', {'search': 'bracket'})
+        self.assertEqual({p['sku'] for p in response.data}, {'BR-100', 'BR-1001'})
+
+        response = client.get('/api/inventory/products/autocomplete/', {'q': 'hinge'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['sku'] for r in response.data['results']], ['HN-200'])
+        self.assertEqual(client.get('/api/inventory/products/autocomplete/', {'limit': 'x'}).status_code, 400)
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_product_search', stdout=out)
+        self.assertIn('fts5', out.getvalue())
+        self.assertEqual([p.sku for p in ProductSearchService.search('hinge')], ['HN-200'])
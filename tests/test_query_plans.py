@@ -0,0 +1,79 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from inventory.models import (
+    Warehouse, Location, Category, Product, ProductStock, Partner, Operation, OperationLine,
+    StockMovement, LowStockAlert
+)
+
+User = get_user_model()
+
+class ListEndpointQueryPlanTest(TestCase):
+    """
+    List endpoints must issue the same number of queries regardless of how many rows they return.
+    """
+    SMALL = 10
+    LARGE = 100
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='password', role='MANAGER')
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(name='Cat')
+        self.partner = Partner.objects.create(name='Acme', partner_type=Partner.Type.CUSTOMER)
+        self.created = 0
+
+    def _grow(self, count):
+        """
+        Adds `count` rows of every kind the list endpoints return.
+        """
+        start, self.created = self.created, self.created + count
+        for i in range(start, self.created):
+            warehouse = Warehouse.objects.create(name=f'WH {i}', code=f'WH{i}')
+            src = Location.objects.create(warehouse=warehouse, name=f'Src {i}', code='S')
+            dst = Location.objects.create(warehouse=warehouse, name=f'Dst {i}', code='D')
+            product = Product.objects.create(name=f'P{i}', sku=f'SKU{i}', category=self.category, uom='pcs', min_stock_level=5)
+            ProductStock.objects.create(product=product, location=src, quantity=3)
+            op = Operation.objects.create(operation_type=Operation.Type.TRANSFER, source_location=src,
+                                          destination_location=dst, partner=self.partner, created_by=self.user)
+            OperationLine.objects.create(operation=op, product=product, quantity_demanded=1)
+            OperationLine.objects.create(operation=op, product=product, quantity_demanded=2)
+            StockMovement.objects.create(product=product, from_location=src, to_location=dst, quantity=1,
+                                         transaction_type=Operation.Type.TRANSFER, reference_doc=op, user=self.user)
+            LowStockAlert.objects.create(product=product, location=src, current_quantity=3, threshold=5)
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertFlatQueryCount(self, url):
+        small = self._queries(url)
+        self._grow(self.LARGE - self.created)
+        large = self._queries(url)
+        self.assertEqual(small, large, f'{url}: {small} queries for {self.SMALL} rows, {large} for {self.LARGE}')
+
+    def _check(self, url):
+        self._grow(self.SMALL)
+        self.assertFlatQueryCount(url)
+
+    def test_operations(self):
+        self._check('/api/inventory/operations/')
+
+    def test_movements(self):
+        self._check('/api/inventory/movements/')
+
+    def test_products(self):
+        self._check('/api/inventory/products/')
+
+    def test_locations(self):
+        self._check('/api/inventory/locations/')
+
+    def test_alerts(self):
+        self._check('/api/inventory/alerts/')
+
+    def test_reorder_report(self):
+        self._check('/api/inventory/reorder-report/')
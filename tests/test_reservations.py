@@ -0,0 +1,174 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from inventory.models import (
+    Warehouse, Location, Product, ProductStock, Operation, OperationLine, DocumentStatus, StockReservation
+)
+from services.operation_service import OperationService
+from services.reservation_service import ReservationService
+from services.stock_service import StockService
+
+User = get_user_model()
+
+
+@override_settings(OPERATION_PDF_PRERENDER=False)
+class ReservationTest(TestCase):
+    def setUp(self):
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.shelf = Location.objects.create(warehouse=warehouse, name='Shelf', code='SHELF')
+        self.dock = Location.objects.create(warehouse=warehouse, name='Dock', code='DOCK')
+        self.bolt = Product.objects.create(name='Bolt', sku='BOLT', uom='pcs')
+        self.nut = Product.objects.create(name='Nut', sku='NUT', uom='pcs')
+        ProductStock.objects.create(product=self.bolt, location=self.shelf, quantity=Decimal('10'))
+        ProductStock.objects.create(product=self.nut, location=self.shelf, quantity=Decimal('4'))
+
+    def _delivery(self, quantity, product=None, status=DocumentStatus.DRAFT):
+        operation = Operation.objects.create(operation_type=Operation.Type.DELIVERY, source_location=self.shelf,
+                                             status=status)
+        OperationLine.objects.create(operation=operation, product=product or self.bolt, quantity_demanded=Decimal(quantity))
+        return operation
+
+    def _atp(self, product=None, **kwargs):
+        return ReservationService.available_to_promise([(product or self.bolt).id], **kwargs)[(product or self.bolt).id]
+
+    def test_lifecycle(self):
+        operation = self._delivery('6')
+        self.assertEqual(self._atp()['available'], Decimal('10'))
+
+        OperationService.transition_status(operation, DocumentStatus.WAITING)
+        self.assertEqual(self._atp(location_id=self.shelf.id),
+                         {'on_hand': Decimal('10'), 'reserved': Decimal('6'), 'available': Decimal('4')})
+        self.assertEqual(operation.lines.get().quantity_reserved, Decimal('6'))
+
+        OperationService.transition_status(operation, DocumentStatus.READY)
+        self.assertEqual(self._atp()['reserved'], Decimal('6'))
+
+        OperationService.validate_operation(operation.id)
+        self.assertEqual(self._atp(), {'on_hand': Decimal('4'), 'reserved': Decimal('0'), 'available': Decimal('4')})
+        self.assertEqual(operation.lines.get().quantity_reserved, Decimal('0'))
+
+    def test_cancel_and_delete_release(self):
+        canceled, deleted = self._delivery('3'), self._delivery('2')
+        for operation in (canceled, deleted):
+            OperationService.transition_status(operation, DocumentStatus.WAITING)
+        self.assertEqual(self._atp()['reserved'], Decimal('5'))
+        OperationService.transition_status(canceled, DocumentStatus.CANCELED)
+        deleted.delete()
+        self.assertEqual(self._atp()['reserved'], Decimal('0'))
+
+    def test_receipts_do_not_reserve(self):
+        operation = Operation.objects.create(operation_type=Operation.Type.RECEIPT, destination_location=self.shelf)
+        OperationLine.objects.create(operation=operation, product=self.bolt, quantity_demanded=Decimal('5'))
+        OperationService.transition_status(operation, DocumentStatus.WAITING)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_validation_fails_fast_on_promised_stock(self):
+        OperationService.transition_status(self._delivery('8'), DocumentStatus.WAITING)
+        other = self._delivery('5')
+        with patch.object(StockService, 'lock_stocks', wraps=StockService.lock_stocks) as lock:
+            with self.assertRaisesMessage(ValueError, 'Insufficient stock for BOLT at Shelf. Available: 2'):
+                OperationService.validate_operation(other.id)
+        lock.assert_not_called()
+
+        # On hand is still authoritative for partial fulfilment
+        OperationService.validate_operation(other.id, allow_partial=True)
+        self.assertEqual(other.lines.get().quantity_done, Decimal('5'))
+        self.assertEqual(self._atp()['available'], Decimal('-3'))
+
+    def test_own_reservation_counts_as_available(self):
+        operation = self._delivery('10', status=DocumentStatus.DRAFT)
+        OperationService.transition_status(operation, DocumentStatus.WAITING)
+        OperationService.validate_operation(operation.id)
+        self.assertEqual(self._atp()['on_hand'], Decimal('0'))
+
+    def test_api_edit_moves_reservation(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='manager', password='password', role='MANAGER'))
+        response = client.post('/api/inventory/operations/', {
+            'operation_type': 'DELIVERY', 'status': 'WAITING', 'source_location': self.shelf.id,
+            'lines': [{'product': self.bolt.id, 'quantity_demanded': '3'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['lines'][0]['quantity_reserved'], '3.00')
+        self.assertEqual(self._atp()['reserved'], Decimal('3'))
+
+        response = client.patch(f"/api/inventory/operations/{response.data['id']}/", {
+            'source_location': self.dock.id,
+            'lines': [{'product': self.nut.id, 'quantity_demanded': '2'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._atp()['reserved'], Decimal('0'))
+        self.assertEqual(self._atp(self.nut, location_id=self.dock.id)['reserved'], Decimal('2'))
+        self.assertEqual(ReservationService.reconcile(fix=False), [])
+
+    def test_api_create_ready_delivery(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='manager', password='password', role='MANAGER'))
+        payload = {
+            'operation_type': 'DELIVERY', 'status': 'READY', 'source_location': self.shelf.id,
+            'lines': [{'product': self.bolt.id, 'quantity_demanded': '4'}, {'product': self.nut.id, 'quantity_demanded': '1'}],
+        }
+        response = client.post('/api/inventory/operations/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([line['quantity_reserved'] for line in response.data['lines']], ['4.00', '1.00'])
+        self.assertEqual(self._atp()['reserved'], Decimal('4'))
+        self.assertEqual(self._atp(self.nut)['reserved'], Decimal('1'))
+
+        # The operation, its lines and their reservations are created together or not at all
+        with patch.object(ReservationService, 'sync', side_effect=RuntimeError('boom')), \
+                self.assertRaises(RuntimeError):
+            client.post('/api/inventory/operations/', payload, format='json')
+        self.assertEqual(Operation.objects.count(), 1)
+        self.assertEqual(OperationLine.objects.count(), 2)
+
+    def test_form_edit_moves_reservation(self):
+        operation = self._delivery('6')
+        OperationService.transition_status(operation, DocumentStatus.WAITING)
+        line = operation.lines.get()
+        self.client.force_login(User.objects.create_user(username='clerk', password='password'))
+        url = f'/products/operations/{operation.id}/edit/'
+
+        def post(*rows):
+            data = {'notes': '', 'lines-TOTAL_FORMS': len(rows), 'lines-INITIAL_FORMS': 1,
+                    'lines-MIN_NUM_FORMS': 0, 'lines-MAX_NUM_FORMS': 1000}
+            for i, row in enumerate(rows):
+                data.update({f'lines-{i}-{key}': value for key, value in row.items()})
+            self.assertEqual(self.client.post(url, data).status_code, 302)
+
+        post({'id': line.id, 'product': self.bolt.id, 'quantity_demanded': '4'},
+             {'product': self.nut.id, 'quantity_demanded': '2'})
+        self.assertEqual(self._atp()['reserved'], Decimal('4'))
+        self.assertEqual(self._atp(self.nut)['reserved'], Decimal('2'))
+        self.assertEqual(operation.lines.get(pk=line.pk).quantity_reserved, Decimal('4'))
+
+        post({'id': line.id, 'product': self.bolt.id, 'quantity_demanded': '4', 'DELETE': 'on'})
+        self.assertEqual(self._atp()['reserved'], Decimal('0'))
+        self.assertEqual(self._atp(self.nut)['reserved'], Decimal('2'))
+        self.assertEqual(ReservationService.reconcile(fix=False), [])
+
+    def test_atp_endpoint(self):
+        OperationService.transition_status(self._delivery('1', product=self.nut), DocumentStatus.WAITING)
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='clerk', password='password'))
+        response = client.get('/api/inventory/stock/atp/', {'sku': 'NUT,BOLT,NOPE', 'warehouse': self.shelf.warehouse_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(r['sku'], r['available']) for r in response.data['results']],
+                         [('BOLT', Decimal('10')), ('NUT', Decimal('3'))])
+        self.assertEqual(response.data['missing'], ['NOPE'])
+        self.assertEqual(client.get('/api/inventory/stock/atp/').status_code, 400)
+        self.assertEqual(client.get('/api/inventory/stock/atp/', {'sku': 'NUT', 'location': 'x'}).status_code, 400)
+
+    def test_reconcile_command(self):
+        # Put into READY without going through the service
+        self._delivery('4', status=DocumentStatus.READY)
+        out = StringIO()
+        call_command('reconcile_reservations', dry_run=True, stdout=out)
+        self.assertIn('1 drifting row(s) found', out.getvalue())
+        call_command('reconcile_reservations', stdout=out)
+        self.assertEqual(self._atp()['reserved'], Decimal('4'))
+        self.assertEqual(OperationLine.objects.get().quantity_reserved, Decimal('4'))
+        self.assertEqual(ReservationService.reconcile(fix=False), [])
@@ -1,12 +1,16 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 from rest_framework.test import APIClient
 from inventory.models import Operation, DocumentStatus
 from django.utils import timezone
 from datetime import timedelta
 
+User = get_user_model()
+
 class SearchFilteringTest(TestCase):
     def setUp(self):
         self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='viewer', password='password'))
         # Create operations with different dates and names
         self.op1 = Operation.objects.create(
             operation_type=Operation.Type.RECEIPT,
@@ -27,17 +31,17 @@ class SearchFilteringTest(TestCase):
 
     def test_search_by_reference(self):
         response = self.client.get('/api/inventory/operations/?search=REC-001')
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['reference_number'], 'REC-001')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['reference_number'], 'REC-001')
 
     def test_search_by_partner(self):
         response = self.client.get('/api/inventory/operations/?search=Customer B')
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['partner_name'], 'Customer B')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['partner_name'], 'Customer B')
 
     def test_filter_by_date_range(self):
         # Filter for last 5 days (should only find op2)
         start_date = (timezone.now() - timedelta(days=5)).date()
         response = self.client.get(f'/api/inventory/operations/?start_date={start_date}')
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['reference_number'], 'DEL-001')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['reference_number'], 'DEL-001')
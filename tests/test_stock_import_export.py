@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+from inventory.models import (
+    Warehouse, Location, Category, Product, ProductStock, ProductStockTotal, Operation, StockMovement, DocumentStatus
+)
+from services.stock_import_service import StockImportService, ImportFileError, read_rows
+
+User = get_user_model()
+
+def _rows(text, file_format='csv', required=()):
+    return read_rows(io.BytesIO(text.encode()), file_format, required)
+
+class ProductImportTest(TestCase):
+    def test_creates_and_updates_by_sku(self):
+        Product.objects.create(name='Old name', sku='SKU-1', uom='pcs')
+        result = StockImportService.import_products(_rows(
+            "sku,name,category,uom,min_stock_level\n"
+            "SKU-1,New name,Tools,pcs,5\n"
+            "SKU-2,Hammer,Tools,pcs,10\n"
+        ))
+        self.assertEqual((result['created'], result['updated'], result['error_count']), (1, 1, 0))
+        self.assertEqual(Product.objects.get(sku='SKU-1').name, 'New name')
+        self.assertEqual(Product.objects.get(sku='SKU-2').category.name, 'Tools')
+        self.assertEqual(Category.objects.filter(name='Tools').count(), 1)
+
+    def test_rejects_invalid_rows_with_line_numbers(self):
+        result = StockImportService.import_products(_rows(
+            "sku,name,min_stock_level\n"
+            ",No sku,1\n"
+            "SKU-3,,1\n"
+            "SKU-4,Bad level,-2\n"
+            "SKU-5,Good,3\n"
+        ))
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([e['line'] for e in result['errors']], [2, 3, 4])
+
+    def test_rejects_unusable_min_stock_levels(self):
+        result = StockImportService.import_products(_rows(
+            "sku,name,min_stock_level\n"
+            "L-1,NaN,nan\n"
+            "L-2,Infinite,inf\n"
+            "L-3,Huge,1e400\n"
+            "L-4,Fraction,2.7\n"
+            "L-5,Too big,2147483648\n"
+            "L-6,Whole,2.0\n"
+        ))
+        self.assertEqual([e['line'] for e in result['errors']], [2, 3, 4, 5, 6])
+        self.assertEqual(list(Product.objects.values_list('sku', 'min_stock_level')), [('L-6', 2)])
+
+        # JSON numbers go through the same checks; null leaves the level alone
+        result = StockImportService.import_products(_rows(
+            '{"sku": "L-6", "min_stock_level": 1e400}\n{"sku": "L-6", "min_stock_level": null}', 'jsonl'
+        ))
+        self.assertEqual((result['updated'], result['error_count']), (1, 1))
+        self.assertEqual(Product.objects.get(sku='L-6').min_stock_level, 2)
+
+    def test_jsonl_and_chunking(self):
+        lines = "\n".join(json.dumps({'sku': f'J-{i}', 'name': f'Item {i}', 'min_stock_level': 1}) for i in range(25))
+        result = StockImportService.import_products(_rows(lines, 'jsonl'), chunk_size=10)
+        self.assertEqual(result['created'], 25)
+
+    def test_missing_column(self):
+        with self.assertRaises(ImportFileError):
+            list(_rows("name\nx\n", required=('sku',)))
+
+class OpeningBalanceImportTest(TestCase):
+    def setUp(self):
+        self.warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.loc_a = Location.objects.create(warehouse=self.warehouse, name='A', code='A')
+        self.loc_b = Location.objects.create(warehouse=self.warehouse, name='B', code='B')
+        self.products = [Product.objects.create(name=f'P{i}', sku=f'P{i}', min_stock_level=5) for i in range(3)]
+        ProductStock.objects.create(product=self.products[0], location=self.loc_a, quantity=Decimal('7'))
+
+    def _csv(self):
+        return _rows(
+            "sku,warehouse,location,quantity\n"
+            "P0,WH1,A,20\n"
+            "P1,WH1,A,15\n"
+            "P2,WH1,B,3\n"
+            "P9,WH1,A,1\n"
+            "P1,WH1,Z,1\n"
+            "P1,WH1,B,-4\n"
+        )
+
+    def test_single_adjustment_with_bulk_ledger(self):
+        result = StockImportService.import_opening_balances(self._csv(), chunk_size=2)
+
+        self.assertEqual(result['rows'], 3)
+        self.assertEqual([e['line'] for e in result['errors']], [5, 6, 7])
+        operation = Operation.objects.get(reference_number=result['operation'])
+        self.assertEqual(operation.operation_type, Operation.Type.ADJUSTMENT)
+        self.assertEqual(operation.status, DocumentStatus.DONE)
+        self.assertEqual(operation.lines.count(), 3)
+
+        self.assertEqual(ProductStock.objects.get(product=self.products[0], location=self.loc_a).quantity, Decimal('20'))
+        self.assertEqual(ProductStock.objects.get(product=self.products[2], location=self.loc_b).quantity, Decimal('3'))
+        self.assertEqual(StockMovement.objects.filter(reference_doc=operation).count(), 3)
+        self.assertEqual(ProductStockTotal.objects.get(product=self.products[0]).quantity, Decimal('20'))
+
+    def test_dry_run_writes_nothing(self):
+        result = StockImportService.import_opening_balances(self._csv(), dry_run=True)
+        self.assertEqual(result['rows'], 3)
+        self.assertIsNone(result['operation'])
+        self.assertFalse(Operation.objects.exists())
+        self.assertEqual(ProductStock.objects.get(product=self.products[0], location=self.loc_a).quantity, Decimal('7'))
+
+class ImportExportApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = User.objects.create_user(username='manager', password='password', role='MANAGER')
+        self.client.force_authenticate(user=self.manager)
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.location = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        Product.objects.create(name='Widget', sku='W-1', uom='pcs')
+
+    def test_stock_import_then_export(self):
+        upload = SimpleUploadedFile('balances.csv', b"sku,warehouse,location,quantity\nW-1,WH1,A,12.5\n")
+        response = self.client.post('/api/inventory/stock/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rows'], 1)
+
+        response = self.client.get('/api/inventory/stock/export/')
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows, [['sku', 'name', 'warehouse', 'location', 'quantity'], ['W-1', 'Widget', 'WH1', 'A', '12.50']])
+
+        response = self.client.get('/api/inventory/stock/export/?file_format=jsonl')
+        row = json.loads(b''.join(response.streaming_content).decode().splitlines()[0])
+        self.assertEqual(row['quantity'], '12.50')
+
+    def test_product_import_and_export(self):
+        upload = SimpleUploadedFile('products.jsonl', b'{"sku": "W-2", "name": "Gadget", "min_stock_level": 4}\n')
+        response = self.client.post('/api/inventory/products/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 1)
+
+        response = self.client.get('/api/inventory/products/export/')
+        text = b''.join(response.streaming_content).decode()
+        self.assertIn('W-2,Gadget,,pcs,4', text)
+
+    def test_import_requires_manager(self):
+        staff = User.objects.create_user(username='staff', password='password', role='STAFF')
+        self.client.force_authenticate(user=staff)
+        upload = SimpleUploadedFile('balances.csv', b"sku,warehouse,location,quantity\n")
+        response = self.client.post('/api/inventory/stock/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 403)
+
+    def test_bad_file(self):
+        upload = SimpleUploadedFile('balances.csv', b"sku,quantity\nW-1,1\n")
+        response = self.client.post('/api/inventory/stock/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,109 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from inventory.models import Warehouse, Location, Product, Operation, ProductStock, StockMovement, StockSnapshot
+from services.snapshot_service import SnapshotService
+from services.stock_service import StockService
+
+User = get_user_model()
+
+class SnapshotServiceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='snap', password='password')
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.loc_a = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        self.loc_b = Location.objects.create(warehouse=warehouse, name='B', code='B')
+        self.product = Product.objects.create(name='Widget', sku='W-1', uom='pcs')
+        self.operation = Operation.objects.create(operation_type=Operation.Type.ADJUSTMENT)
+
+    def _backdate(self, after_id, when):
+        StockMovement.objects.filter(id__gt=after_id).update(timestamp=when)
+
+    def test_as_of_replays_only_after_snapshot(self):
+        now = timezone.now()
+        StockService.increase_stock(self.product, self.loc_a, Decimal('100'), self.operation, self.user)
+        self._backdate(0, now - datetime.timedelta(days=3))
+        snapshot = SnapshotService.take()
+        StockSnapshot.objects.filter(id=snapshot.id).update(taken_at=now - datetime.timedelta(days=2))
+
+        StockService.move_stock(self.product, self.loc_a, self.loc_b, Decimal('30'), self.operation, self.user)
+        self._backdate(snapshot.last_movement_id, now - datetime.timedelta(days=1))
+        StockService.decrease_stock(self.product, self.loc_b, Decimal('5'), self.operation, self.user)
+
+        quantities, used, replayed = SnapshotService.stock_as_of(now - datetime.timedelta(hours=36))
+        self.assertEqual(used, snapshot)
+        self.assertEqual(replayed, 0)
+        self.assertEqual(quantities, {(self.product.id, self.loc_a.id): Decimal('100')})
+
+        quantities, _, replayed = SnapshotService.stock_as_of(now - datetime.timedelta(hours=12))
+        self.assertGreater(replayed, 0)
+        self.assertEqual(quantities[(self.product.id, self.loc_a.id)], Decimal('70'))
+        self.assertEqual(quantities[(self.product.id, self.loc_b.id)], Decimal('30'))
+
+        quantities, _, _ = SnapshotService.stock_as_of(timezone.now(), location_id=self.loc_b.id)
+        self.assertEqual(quantities, {(self.product.id, self.loc_b.id): Decimal('25')})
+
+    def test_before_any_snapshot_replays_ledger(self):
+        StockService.increase_stock(self.product, self.loc_a, Decimal('10'), self.operation, self.user)
+        self._backdate(0, timezone.now() - datetime.timedelta(days=5))
+        SnapshotService.take()
+        quantities, snapshot, replayed = SnapshotService.stock_as_of(timezone.now() - datetime.timedelta(days=4))
+        self.assertIsNone(snapshot)
+        self.assertEqual(replayed, 1)
+        self.assertEqual(quantities, {(self.product.id, self.loc_a.id): Decimal('10')})
+
+    def test_verify_detects_drift(self):
+        StockService.increase_stock(self.product, self.loc_a, Decimal('10'), self.operation, self.user)
+        SnapshotService.take()
+        StockService.increase_stock(self.product, self.loc_b, Decimal('4'), self.operation, self.user)
+        self.assertEqual(SnapshotService.verify(), [])
+
+        ProductStock.objects.filter(location=self.loc_b).update(quantity=Decimal('6'))
+        mismatches = SnapshotService.verify()
+        self.assertEqual(mismatches, [{
+            'product_id': self.product.id, 'location_id': self.loc_b.id, 'live': Decimal('6'), 'replayed': Decimal('4'),
+        }])
+        with self.assertRaises(CommandError):
+            call_command('verify_stock_snapshots', stdout=StringIO())
+
+    def test_command_interval_and_prune(self):
+        out = StringIO()
+        call_command('take_stock_snapshot', stdout=out)
+        call_command('take_stock_snapshot', if_older_than=1, stdout=out)
+        self.assertEqual(StockSnapshot.objects.count(), 1)
+        call_command('take_stock_snapshot', keep=1, stdout=out)
+        self.assertEqual(StockSnapshot.objects.count(), 1)
+
+class StockAsOfApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='viewer', password='password'))
+        warehouse = Warehouse.objects.create(name='Main', code='WH1')
+        self.location = Location.objects.create(warehouse=warehouse, name='A', code='A')
+        self.product = Product.objects.create(name='Widget', sku='W-1', uom='pcs')
+        operation = Operation.objects.create(operation_type=Operation.Type.ADJUSTMENT)
+        StockService.increase_stock(self.product, self.location, Decimal('12'), operation)
+        SnapshotService.take()
+
+    def test_json_and_csv(self):
+        today = timezone.localdate().isoformat()
+        response = self.client.get(f'/api/inventory/stock/as-of/?at={today}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['snapshot'])
+        self.assertEqual(response.data['results'], [
+            {'sku': 'W-1', 'name': 'Widget', 'warehouse': 'WH1', 'location': 'A', 'quantity': Decimal('12.00')}
+        ])
+
+        response = self.client.get(f'/api/inventory/stock/as-of/?at={today}&file_format=csv')
+        text = b''.join(response.streaming_content).decode()
+        self.assertIn('W-1,Widget,WH1,A,12.00', text)
+
+    def test_bad_date(self):
+        response = self.client.get('/api/inventory/stock/as-of/?at=yesterday')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,75 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase
+from inventory.models import Warehouse, Location, Product, Operation, DocumentStatus, ProductStock, ProductStockTotal, WarehouseStockTotal
+from services.stock_service import StockService
+from services.operation_service import OperationService
+from services.stock_summary_service import StockSummaryService
+
+
+class StockTotalsTest(TestCase):
+    def setUp(self):
+        self.wh1 = Warehouse.objects.create(name='WH1', code='WH1')
+        self.wh2 = Warehouse.objects.create(name='WH2', code='WH2')
+        self.loc_a = Location.objects.create(warehouse=self.wh1, name='A', code='A')
+        self.loc_b = Location.objects.create(warehouse=self.wh1, name='B', code='B')
+        self.loc_c = Location.objects.create(warehouse=self.wh2, name='C', code='C')
+        self.product = Product.objects.create(name='P', sku='P', uom='pcs')
+
+    def _totals(self):
+        total = ProductStockTotal.objects.get(product=self.product).quantity
+        per_warehouse = dict(WarehouseStockTotal.objects.filter(product=self.product).values_list('warehouse__code', 'quantity'))
+        return total, per_warehouse
+
+    def test_stock_service_keeps_totals_in_step(self):
+        op = Operation.objects.create(operation_type=Operation.Type.RECEIPT)
+        StockService.increase_stock(self.product, self.loc_a, Decimal('30'), op)
+        StockService.increase_stock(self.product, self.loc_c, Decimal('5'), op)
+        StockService.decrease_stock(self.product, self.loc_a, Decimal('10'), op)
+        StockService.adjust_stock(self.product, self.loc_c, Decimal('8'), op)
+
+        self.assertEqual(self._totals(), (Decimal('28'), {'WH1': Decimal('20'), 'WH2': Decimal('8')}))
+
+    def test_stock_service_does_not_trigger_the_refresh_signal(self):
+        op = Operation.objects.create(operation_type=Operation.Type.RECEIPT)
+        # New rows included: the unlocked recompute would race with concurrent apply_deltas
+        with patch.object(StockSummaryService, 'refresh_products') as refresh:
+            StockService.increase_stock(self.product, self.loc_a, Decimal('3'), op)
+            StockService.adjust_stock(self.product, self.loc_b, Decimal('4'), op)
+            StockService.move_stock(self.product, self.loc_a, self.loc_c, Decimal('1'), op)
+        refresh.assert_not_called()
+        self.assertEqual(self._totals(), (Decimal('7'), {'WH1': Decimal('6'), 'WH2': Decimal('1')}))
+
+    def test_batch_validation_updates_totals(self):
+        ProductStock.objects.create(product=self.product, location=self.loc_a, quantity=50)
+        op = Operation.objects.create(operation_type=Operation.Type.TRANSFER, source_location=self.loc_a,
+                                      destination_location=self.loc_c, status=DocumentStatus.READY)
+        op.lines.create(product=self.product, quantity_demanded=15)
+        op.lines.create(product=self.product, quantity_demanded=5)
+        OperationService.validate_operation(op.id)
+
+        self.assertEqual(self._totals(), (Decimal('50'), {'WH1': Decimal('30'), 'WH2': Decimal('20')}))
+
+    def test_direct_edits_refresh_totals(self):
+        stock = ProductStock.objects.create(product=self.product, location=self.loc_b, quantity=7)
+        self.assertEqual(self._totals()[0], 7)
+        stock.delete()
+        self.assertFalse(ProductStockTotal.objects.filter(product=self.product).exists())
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        ProductStock.objects.create(product=self.product, location=self.loc_a, quantity=12)
+        ProductStockTotal.objects.filter(product=self.product).update(quantity=99)
+        WarehouseStockTotal.objects.all().delete()
+
+        out = StringIO()
+        call_command('reconcile_stock_totals', '--dry-run', stdout=out)
+        self.assertIn('2 drifting row(s) found', out.getvalue())
+        self.assertEqual(ProductStockTotal.objects.get(product=self.product).quantity, 99)
+
+        call_command('reconcile_stock_totals', stdout=StringIO())
+        self.assertEqual(self._totals(), (Decimal('12'), {'WH1': Decimal('12')}))
+        out = StringIO()
+        call_command('reconcile_stock_totals', '--dry-run', stdout=out)
+        self.assertIn('in sync', out.getvalue())